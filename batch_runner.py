@@ -0,0 +1,164 @@
+"""
+Run a directory of tapes headlessly in parallel and write a JSON report
+(screenshot hashes, final registers, throughput) for regression checks.
+Spustí adresář pásek bez výstupu paralelně a zapíše report JSON.
+
+Usage: python batch_runner.py games/ --frames 1500 --report report.json [--128] [--jit]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Keyboard matrix positions (half-row port, bit)
+# Pozice v matici klávesnice (port půlřady, bit)
+KEY_J = (0xBF, 3)
+KEY_P = (0xDF, 0)
+KEY_ENTER = (0xBF, 0)
+KEY_SYMBOL = (0x7F, 1)
+
+# 48K: LOAD "" ENTER (J is LOAD in keyword mode, Symbol+P is ")
+# 128K: ENTER picks the highlighted "Tape Loader" menu entry
+LOAD_KEYS_48K = [[KEY_J], [KEY_SYMBOL, KEY_P], [KEY_SYMBOL, KEY_P], [KEY_ENTER]]
+LOAD_KEYS_128K = [[KEY_ENTER]]
+
+# Frames each key combination is held, then released, while typing
+# Snímky držení a pak uvolnění každé kombinace kláves při psaní
+KEY_FRAMES = 5
+
+REGISTERS = ('a', 'f', 'bc', 'de', 'hl', 'ix', 'iy', 'sp', 'pc', 'i', 'r', 'im', 'iff1', 'iff2')
+
+def setup_frames(is_128k, boot_frames):
+    """
+    Frames spent booting and typing LOAD, before the measured run.
+    Snímky spotřebované startem a psaním LOAD před vlastním během.
+    """
+    return boot_frames + 2 * KEY_FRAMES * len(LOAD_KEYS_128K if is_128k else LOAD_KEYS_48K)
+
+def screen_hash(machine):
+    """
+    Hash of the last rendered screen (palette indices, border included).
+    The frame must have been run with video=True; hashing never renders
+    again, so the FLASH phase does not depend on how often shots are taken.
+    Hash posledního vykresleného snímku; sám nikdy nevykresluje.
+    """
+    return hashlib.sha1(machine.ula.screen_buffer.tobytes()).hexdigest()
+
+def run_title(job):
+    """
+    Worker: boot, type LOAD "", run the requested frames and report.
+    Runs in its own process with its own machine.
+    Pracovní proces: start, LOAD "", běh zadaného počtu snímků a report.
+    """
+    from src.machine import Machine
+
+    result = {'title': os.path.basename(job['path']), 'path': job['path']}
+    try:
+        machine = Machine(is_128k=job['is_128k'], rom=job['rom'], jit=job['jit'])
+        if not machine.load_tape(job['path']):
+            result['error'] = 'tape could not be parsed'
+            return result
+
+        start = time.perf_counter()
+        machine.run(job['boot_frames'])
+        machine.type_keys(LOAD_KEYS_128K if job['is_128k'] else LOAD_KEYS_48K,
+                          hold_frames=KEY_FRAMES, release_frames=KEY_FRAMES)
+        shots = []
+        while machine.frame_count < job['frames']:
+            frame = machine.frame_count + 1
+            shot = bool(job['shot_every']) and frame % job['shot_every'] == 0
+            machine.run_frame(video=shot or frame >= job['frames'])
+            if shot:
+                shots.append([frame, screen_hash(machine)])
+        elapsed = time.perf_counter() - start
+
+        cpu = machine.cpu
+        result.update({
+            'frames': machine.frame_count,
+            'blocks_loaded': machine.cpu.tape.current_block,
+            'blocks_total': len(machine.cpu.tape.blocks),
+            'screen_hash': screen_hash(machine),
+            'screenshots': shots,
+            'registers': {name: int(getattr(cpu, name)) for name in REGISTERS},
+            'cycles': int(cpu.cycles),
+            'seconds': round(elapsed, 3),
+            'fps': round(machine.frame_count / elapsed, 1),
+            'realtime': round(machine.frame_count / machine.fps / elapsed, 2),
+            'mhz': round(cpu.cycles / elapsed / 1e6, 2),
+        })
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    return result
+
+def find_tapes(directory):
+    """Sorted .tap/.tzx files below directory."""
+    tapes = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(('.tap', '.tzx')):
+                tapes.append(os.path.join(root, name))
+    return sorted(tapes)
+
+def run_batch(tapes, frames, is_128k=False, jit=False, rom=None, workers=None,
+              boot_frames=150, shot_every=0):
+    """
+    Run every tape in a process pool; results keep the order of tapes.
+    Spustí všechny pásky ve fondu procesů; výsledky v pořadí pásek.
+
+    :raises ValueError: frames leave no frame to run after boot and typing.
+    """
+    minimum = setup_frames(is_128k, boot_frames) + 1
+    if frames < minimum:
+        raise ValueError(f"frames must be at least {minimum} (boot and LOAD typing use "
+                         f"{minimum - 1})")
+    jobs = [{'path': path, 'frames': frames, 'is_128k': is_128k, 'jit': jit, 'rom': rom,
+             'boot_frames': boot_frames, 'shot_every': shot_every} for path in tapes]
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_title, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            status = result.get('error') or f"{result['fps']} fps"
+            print(f"{result['title']}: {status}", file=sys.stderr)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless batch run of a tape library")
+    parser.add_argument('directory', help="Directory with .tap/.tzx files")
+    parser.add_argument('--frames', type=int, default=1500, help="Frames per title (boot and typing included)")
+    parser.add_argument('--report', default='batch_report.json', help="JSON report path")
+    parser.add_argument('--128', dest='is_128k', action='store_true', help="Emulate the 128K model")
+    parser.add_argument('--jit', action='store_true', help="Use the Numba CPU core")
+    parser.add_argument('--rom', help="ROM image (default roms/48.rom or roms/128.rom)")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: all cores)")
+    parser.add_argument('--boot-frames', type=int, default=150, help="Frames before typing LOAD")
+    parser.add_argument('--shot-every', type=int, default=0, help="Also hash the screen every N frames")
+    args = parser.parse_args()
+    minimum = setup_frames(args.is_128k, args.boot_frames) + 1
+    if args.frames < minimum:
+        parser.error(f"--frames must be at least {minimum} (boot and LOAD typing use {minimum - 1})")
+
+    tapes = find_tapes(args.directory)
+    start = time.perf_counter()
+    results = run_batch(tapes, args.frames, args.is_128k, args.jit, args.rom, args.workers,
+                        args.boot_frames, args.shot_every)
+    elapsed = time.perf_counter() - start
+    frames = sum(r.get('frames', 0) for r in results)
+    report = {
+        'config': {'frames': args.frames, 'is_128k': args.is_128k, 'jit': args.jit,
+                   'boot_frames': args.boot_frames, 'workers': args.workers or os.cpu_count()},
+        'titles': results,
+        'total': {'titles': len(results), 'errors': sum('error' in r for r in results),
+                  'seconds': round(elapsed, 3),
+                  'fps': round(frames / elapsed, 1) if elapsed > 0 else 0},
+    }
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{len(results)} titles, {frames} frames in {elapsed:.1f}s -> {args.report}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Cost of one frame of audio for each quality level (beeper + AY, 128K timing).
+Cena jednoho snímku zvuku pro každou úroveň kvality (pípák + AY, časování 128K).
+Only render_audio() is timed; queueing the beeper and AY events is not.
+Měří se jen render_audio(), ne zápis událostí pípáku a AY.
+
+Usage: python benchmarks/bench_audio.py [frames]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.audio_filter import QUALITY_LEVELS
+from src.ay38910 import AY38910
+from src.memory import Memory
+from src.ula import ULA
+
+SAMPLE_RATE = 44100
+FRAME_CYCLES = 70908
+SAMPLES_PER_FRAME = 882
+
+class Clock:
+    cycles = 0
+
+def bench(quality, frames):
+    """Return the mean milliseconds per frame spent in render_audio()."""
+    ula = ULA(Memory(is_128k=True), is_128k=True)
+    clock = Clock()
+    ula.set_cpu(clock)
+    ula.set_audio_quality(quality)
+    ay = AY38910(mixing_mode='abc')
+    total = 0.0
+    for frame in range(frames):
+        base = frame * FRAME_CYCLES
+        # A player reloading every register in its interrupt
+        # Přehrávač, který v přerušení přepíše všechny registry
+        for register in range(14):
+            ay.write_address(register)
+            value = 0x38 if register == 7 else (register * 37 + frame) & 0xFF
+            ay.write_data(value, base + 200 + register * 30)
+        # Beeper square wave of about 1 kHz
+        # Obdélník pípáku asi 1 kHz
+        for toggle in range(100):
+            clock.cycles = base + toggle * 700
+            ula.write_port(0xFE, 0x10 if toggle & 1 else 0x00)
+        start = time.perf_counter()
+        ula.render_audio(SAMPLES_PER_FRAME, FRAME_CYCLES, ay=ay, sample_rate=SAMPLE_RATE)
+        total += time.perf_counter() - start
+    return total / frames * 1000
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for quality, (factor, taps) in QUALITY_LEVELS.items():
+        print(f"{quality:9s} {factor}x oversampling, {taps:3d} taps: {bench(quality, frames):.3f} ms/frame")
+
+if __name__ == '__main__':
+    main()
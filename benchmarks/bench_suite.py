@@ -0,0 +1,303 @@
+"""
+Reproducible performance suite: fixed workloads, each reporting emulated MHz,
+frames per second and allocations per frame, with a baseline comparison.
+Reprodukovatelná sada měření výkonu: pevné zátěže, každá hlásí emulované MHz,
+snímky za sekundu a alokace na snímek, s porovnáním proti základní úrovni.
+
+Usage: python benchmarks/bench_suite.py [workload ...] [--jit] [--frames N]
+                                        [--save baseline.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from src.machine import Machine, ROM_DIR
+from src.memory import Memory
+from src.ula import ULA
+
+SAMPLE_RATE = 44100
+WARMUP_FRAMES = 3 # JIT compilation, first full redraw / Kompilace JIT, první překreslení
+ALLOC_FRAMES = 10 # Frames traced for allocations / Snímky sledované kvůli alokacím
+
+# Synthetic ROMs: DI, then an endless loop (no interrupts, so the workload is
+# exactly the loop). Syntetické ROM: DI a nekonečná smyčka bez přerušení.
+LDIR_ROM = [
+    0xF3,                   # DI
+    0x21, 0x00, 0x80,       # loop: LD HL,0x8000
+    0x11, 0x00, 0xA0,       #       LD DE,0xA000
+    0x01, 0x00, 0x10,       #       LD BC,0x1000
+    0xED, 0xB0,             #       LDIR
+    0x18, 0xF3,             #       JR loop
+]
+INDEX_ROM = [
+    0xF3,                   # DI
+    0xDD, 0x21, 0x00, 0x80, # outer: LD IX,0x8000
+    0xFD, 0x21, 0x00, 0xC0, #        LD IY,0xC000
+    0x06, 0x00,             #        LD B,0 (256 passes)
+    0xDD, 0x7E, 0x01,       # inner: LD A,(IX+1)
+    0xFD, 0x86, 0x02,       #        ADD A,(IY+2)
+    0xDD, 0x77, 0x03,       #        LD (IX+3),A
+    0xFD, 0xCB, 0x05, 0xC6, #        SET 0,(IY+5)
+    0xDD, 0xCB, 0x04, 0x46, #        BIT 0,(IX+4)
+    0xDD, 0x23,             #        INC IX
+    0xFD, 0x2B,             #        DEC IY
+    0x10, 0xE9,             #        DJNZ inner
+    0x18, 0xDD,             #        JR outer
+]
+BEEPER_ROM = [
+    0xF3,                   # DI
+    0xAF,                   # XOR A
+    0xEE, 0x10,             # loop: XOR 0x10 (speaker bit)
+    0xD3, 0xFE,             #       OUT (0xFE),A
+    0x43,                   #       LD B,E (half period)
+    0x10, 0xFE,             # wait: DJNZ wait
+    0x1C,                   #       INC E (pitch sweep)
+    0x18, 0xF6,             #       JR loop
+]
+AY_ROM = [
+    0xF3,                   # DI
+    0x01, 0xFD, 0xFF,       # LD BC,0xFFFD
+    0xAF,                   # XOR A
+    0xED, 0x79,             # loop: OUT (C),A (select register)
+    0x06, 0xBF,             #       LD B,0xBF
+    0xED, 0x59,             #       OUT (C),E (write data)
+    0x06, 0xFF,             #       LD B,0xFF
+    0x1C,                   #       INC E
+    0x3C,                   #       INC A
+    0xE6, 0x0F,             #       AND 0x0F
+    0x18, 0xF2,             #       JR loop
+]
+
+def make_rom(code, size=0x4000):
+    rom = bytearray(size)
+    rom[0:len(code)] = bytes(code)
+    return bytes(rom)
+
+class Clock:
+    cycles = 0
+
+# Each builder returns frame(): run one frame, return the emulated T-states
+# (0 for workloads without a CPU).
+# Každý builder vrací frame(): provede jeden snímek a vrátí emulované takty.
+
+def build_machine_workload(rom, is_128k=False, audio=False, video=False):
+    def build(jit):
+        machine = Machine(is_128k=is_128k, rom=rom, jit=jit)
+        def frame():
+            cycles = machine.cpu.cycles
+            machine.run_frame(video=video, audio=audio)
+            return machine.cpu.cycles - cycles
+        return frame
+    return build
+
+def build_boot(jit):
+    """48K ROM boot to the copyright message (needs roms/48.rom)."""
+    return build_machine_workload(os.path.join(ROM_DIR, '48.rom'), video=True)(jit)
+
+def build_render(jit):
+    """Full-screen render: every frame redraws paper and a striped border."""
+    memory = Memory()
+    memory.memory[0x4000:0x5B00] = bytes(range(256)) * 27
+    ula = ULA(memory, indexed=True)
+    clock = Clock()
+    ula.set_cpu(clock)
+    state = {'frame': 0}
+
+    def frame():
+        count = state['frame']
+        state['frame'] += 1
+        base = count * ula.CYCLES_PER_FRAME
+        # 192 border stripes and a changed attribute area
+        # 192 pruhů okraje a změněná plocha atributů
+        for line in range(192):
+            clock.cycles = base + 14336 + line * 224
+            ula.write_port(0xFE, (line + count) & 0x07)
+        memory.memory[0x5800:0x5B00] = bytes(((i + count) & 0x3F) | 0x40 for i in range(768))
+        ula.full_redraw = True
+        ula.render_screen()
+        return 0
+    return frame
+
+def build_audio_events(jit):
+    """Beeper render_audio with 2000 speaker edges per frame."""
+    ula = ULA(Memory())
+    clock = Clock()
+    ula.set_cpu(clock)
+    state = {'frame': 0}
+    samples = int(SAMPLE_RATE * ula.CYCLES_PER_FRAME / 3500000)
+
+    def frame():
+        base = state['frame'] * ula.CYCLES_PER_FRAME
+        state['frame'] += 1
+        for edge in range(2000):
+            clock.cycles = base + edge * 34
+            ula.write_port(0xFE, 0x10 if edge & 1 else 0x00)
+        ula.render_audio(samples, ula.CYCLES_PER_FRAME, sample_rate=SAMPLE_RATE)
+        return 0
+    return frame
+
+# name: (builder, pinned frame count, description)
+# jméno: (builder, pevný počet snímků, popis)
+WORKLOADS = {
+    'boot48': (build_boot, 150, "48K ROM boot to the copyright screen"),
+    'ldir': (build_machine_workload(make_rom(LDIR_ROM)), 100, "LDIR block copies"),
+    'index': (build_machine_workload(make_rom(INDEX_ROM)), 100, "IX/IY indexed and DDCB/FDCB instructions"),
+    'beeper': (build_machine_workload(make_rom(BEEPER_ROM), audio=True), 100,
+               "Beeper tone sweep with audio rendering"),
+    'ay128': (build_machine_workload(make_rom(AY_ROM, 0x8000), is_128k=True, audio=True), 100,
+              "128K AY register writes with audio rendering"),
+    'render': (build_render, 200, "Full-screen render with a striped border"),
+    'audio_events': (build_audio_events, 200, "render_audio with dense beeper events"),
+}
+
+def measure(name, frames=None, jit=False):
+    """
+    Run one workload: timed pass, then a short pass under tracemalloc.
+    Spustí jednu zátěž: měřený běh a krátký běh pod tracemalloc.
+
+    :return: dict with frames, seconds, fps, mhz (None without CPU),
+             ms_per_frame, alloc_kib_per_frame (peak traced allocation
+             within a frame) and blocks_per_frame (net new memory blocks).
+    """
+    builder, pinned, _ = WORKLOADS[name]
+    frames = frames or pinned
+    frame = builder(jit)
+    for _ in range(WARMUP_FRAMES):
+        frame()
+
+    cycles = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        cycles += frame()
+    elapsed = time.perf_counter() - start
+
+    # CPython has no allocation counter: report the peak of traced memory
+    # within each frame and the net growth of allocated blocks instead
+    # CPython nemá čítač alokací: hlásí se špička sledované paměti během
+    # snímku a čistý přírůstek alokovaných bloků
+    peak_total = 0
+    blocks_total = 0
+    tracemalloc.start()
+    try:
+        for _ in range(ALLOC_FRAMES):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            blocks = sys.getallocatedblocks()
+            frame()
+            blocks_total += sys.getallocatedblocks() - blocks
+            peak_total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'frames': frames,
+        'seconds': round(elapsed, 4),
+        'fps': round(frames / elapsed, 2),
+        'mhz': round(cycles / elapsed / 1e6, 3) if cycles else None,
+        'ms_per_frame': round(elapsed / frames * 1000, 4),
+        'alloc_kib_per_frame': round(peak_total / ALLOC_FRAMES / 1024, 2),
+        'blocks_per_frame': round(blocks_total / ALLOC_FRAMES, 1),
+    }
+
+def run_suite(names=None, frames=None, jit=False):
+    """
+    Measure the selected workloads; ones that cannot run (missing ROM) are
+    reported with an 'error'.
+    Změří vybrané zátěže; nespustitelné (chybí ROM) se hlásí s 'error'.
+    """
+    results = {}
+    for name in names or WORKLOADS:
+        try:
+            results[name] = measure(name, frames, jit)
+        except OSError as e:
+            results[name] = {'error': str(e)}
+    return {
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'machine': platform.machine(), 'jit': jit},
+        'results': results,
+    }
+
+def compare(current, baseline, threshold=0.10):
+    """
+    Workloads slower than the baseline by more than threshold (fps), or
+    allocating more than threshold more per frame (plus 1 KiB slack).
+    Zátěže pomalejší než základní úroveň o víc než threshold, nebo
+    alokující o víc než threshold víc na snímek (plus 1 KiB rezerva).
+
+    :return: list of (name, reason) for each regression.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base or 'error' in base or 'error' in result:
+            continue
+        if result['fps'] < base['fps'] * (1 - threshold):
+            regressions.append((name, f"{result['fps']:.1f} fps vs {base['fps']:.1f} fps "
+                                      f"({result['fps'] / base['fps'] - 1:+.1%})"))
+        if result['alloc_kib_per_frame'] > base['alloc_kib_per_frame'] * (1 + threshold) + 1:
+            regressions.append((name, f"{result['alloc_kib_per_frame']:.1f} KiB/frame vs "
+                                      f"{base['alloc_kib_per_frame']:.1f} KiB/frame"))
+    return regressions
+
+def format_results(suite, baseline=None):
+    lines = [f"{'workload':14s} {'MHz':>8s} {'fps':>9s} {'ms/frame':>9s} {'KiB/frame':>10s} "
+             f"{'blocks':>7s}" + (f" {'vs base':>8s}" if baseline else "")]
+    for name, result in suite['results'].items():
+        if 'error' in result:
+            lines.append(f"{name:14s} skipped: {result['error']}")
+            continue
+        mhz = f"{result['mhz']:8.2f}" if result['mhz'] else f"{'-':>8s}"
+        line = (f"{name:14s} {mhz} {result['fps']:9.1f} {result['ms_per_frame']:9.3f} "
+                f"{result['alloc_kib_per_frame']:10.1f} {result['blocks_per_frame']:7.1f}")
+        base = baseline['results'].get(name) if baseline else None
+        if base and 'error' not in base:
+            line += f" {result['fps'] / base['fps'] - 1:+8.1%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulator performance suite")
+    parser.add_argument('workloads', nargs='*', help="Workloads to run (default: all, see --list)")
+    parser.add_argument('--frames', type=int, help="Override the pinned frame counts")
+    parser.add_argument('--jit', action='store_true', help="Use the Numba CPU core")
+    parser.add_argument('--save', help="Write the results as a baseline JSON")
+    parser.add_argument('--compare', help="Baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Allowed slowdown before a workload is flagged (default 0.10)")
+    parser.add_argument('--list', action='store_true', help="List the workloads")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (_, frames, description) in WORKLOADS.items():
+            print(f"{name:14s} {frames:4d} frames  {description}")
+        return 0
+    unknown = [name for name in args.workloads if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workload(s): {', '.join(unknown)} (see --list)")
+
+    suite = run_suite(args.workloads, args.frames, args.jit)
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+    print(format_results(suite, baseline))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(suite, f, indent=2)
+    if baseline:
+        regressions = compare(suite, baseline, args.threshold)
+        for name, reason in regressions:
+            print(f"REGRESSION {name}: {reason}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,514 @@
+"""
+Fast runner for the SingleStepTests Z80 suite (tests/z80_standard, see
+download_tests.py). Same checks as tests/test_standard_z80.py, but:
+- one CPU and one 64K RAM per worker process, reset between cases by
+  clearing only the addresses the previous case touched,
+- opcode files sharded across a process pool,
+- parsed JSON cached as compact NumPy arrays (.cache/*.npz),
+- incremental: a file is re-run only if it failed last time, its JSON
+  changed, or the bytecode of a function it executed has changed.
+Rychlý spouštěč sady SingleStepTests: jedno CPU na pracovní proces, soubory
+rozdělené mezi procesy, binární cache naparsovaných testů a opakování jen
+souborů, jejichž obsluhy se změnily.
+
+Usage: python conformance_runner.py [00 cb40 ...] [--all] [--jit] [--workers N]
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from src.cpu import Z80
+from src.cpu_jit import JitZ80
+from src.memory import Memory
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TEST_DIR = os.path.join(ROOT, 'tests', 'z80_standard')
+SRC_DIR = os.path.join(ROOT, 'src')
+
+# Bump when the layout of the cached arrays changes
+# Zvýšit při změně formátu uložených polí
+CACHE_FORMAT = 1
+
+# Register columns of the cached state arrays
+# Sloupce registrů v uložených polích stavů
+REGISTERS = ('a', 'f', 'b', 'c', 'd', 'e', 'h', 'l', 'pc', 'sp', 'ix', 'iy',
+             'i', 'r', 'im', 'iff1', 'iff2', 'wz', 'q', 'af_', 'bc_', 'de_', 'hl_')
+# Columns compared after the step (Q is not part of the expected state)
+# Sloupce porovnávané po kroku (Q není součástí očekávaného stavu)
+CHECKED = [(index, name) for index, name in enumerate(REGISTERS) if name != 'q']
+BLANK_RAM = bytes(0x10000)
+
+# --- Binary cache of parsed test files ---
+# Binární cache naparsovaných testovacích souborů
+
+def parse_test_file(path):
+    """
+    Convert a SingleStepTests JSON file into flat arrays.
+    Převede soubor JSON na plochá pole.
+
+    :return: dict of arrays: names, initial/final (n, len(REGISTERS)) uint16,
+             initial_ram/final_ram (m, 2) with *_index offsets per case,
+             ports (k, 3) [port, value, is_write] with ports_index.
+    """
+    with open(path, 'r') as f:
+        tests = json.load(f)
+
+    arrays = {'names': np.array([test['name'] for test in tests], dtype=str)}
+    for side in ('initial', 'final'):
+        regs, ram, index = [], [], [0]
+        for test in tests:
+            state = test[side]
+            regs.append([state.get(name, 0) for name in REGISTERS])
+            ram.extend(state['ram'])
+            index.append(len(ram))
+        arrays[side] = np.array(regs, dtype=np.uint16).reshape(-1, len(REGISTERS))
+        arrays[side + '_ram'] = np.array(ram, dtype=np.uint16).reshape(-1, 2)
+        arrays[side + '_ram_index'] = np.array(index, dtype=np.int32)
+
+    ports, index = [], [0]
+    for test in tests:
+        ports.extend([port, value, kind == 'w'] for port, value, kind in test.get('ports', []))
+        index.append(len(ports))
+    arrays['ports'] = np.array(ports, dtype=np.uint16).reshape(-1, 3)
+    arrays['ports_index'] = np.array(index, dtype=np.int32)
+    return arrays
+
+def _source_key(path):
+    stat = os.stat(path)
+    return [CACHE_FORMAT, stat.st_size, stat.st_mtime_ns]
+
+def load_test_file(path, cache_dir=None):
+    """
+    Parsed arrays of a test file, from the cache when it is still valid.
+    Naparsovaná pole testovacího souboru, z cache, pokud je stále platná.
+    """
+    if cache_dir is None:
+        return parse_test_file(path)
+    key = _source_key(path)
+    cache_path = os.path.join(cache_dir, os.path.basename(path) + '.npz')
+    try:
+        with np.load(cache_path) as data:
+            if data['source'].tolist() == key:
+                return {name: data[name] for name in data.files if name != 'source'}
+    except (OSError, KeyError, ValueError):
+        pass
+
+    arrays = parse_test_file(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write and rename, so a concurrent reader never sees a partial file
+    # Zápis a přejmenování, aby souběžný čtenář neviděl neúplný soubor
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        np.savez(f, source=np.array(key, dtype=np.int64), **arrays)
+    os.replace(temp_path, cache_path)
+    return arrays
+
+def iter_cases(arrays):
+    """
+    Yield (name, initial, initial_ram, final, final_ram, reads, writes) per case
+    as plain Python lists.
+    Vrací jednotlivé případy jako obyčejné seznamy Pythonu.
+    """
+    names = arrays['names'].tolist()
+    initial, final = arrays['initial'].tolist(), arrays['final'].tolist()
+    initial_ram, final_ram = arrays['initial_ram'].tolist(), arrays['final_ram'].tolist()
+    initial_index = arrays['initial_ram_index'].tolist()
+    final_index = arrays['final_ram_index'].tolist()
+    ports, ports_index = arrays['ports'].tolist(), arrays['ports_index'].tolist()
+    for k, name in enumerate(names):
+        case_ports = ports[ports_index[k]:ports_index[k + 1]]
+        yield (name, initial[k], initial_ram[initial_index[k]:initial_index[k + 1]],
+               final[k], final_ram[final_index[k]:final_index[k + 1]],
+               [value for _, value, is_write in case_ports if not is_write],
+               [(port, value) for port, value, is_write in case_ports if is_write])
+
+# --- Handler fingerprints ---
+# Otisky obsluh
+
+def _hash_code(code, digest, deep):
+    """Feed the bytecode, names and constants of code into digest (line numbers excluded)."""
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            if deep:
+                _hash_code(const, digest, True)
+        else:
+            digest.update(repr(const).encode())
+
+def _code_hash(code, deep):
+    digest = hashlib.sha1()
+    _hash_code(code, digest, deep)
+    return digest.hexdigest()
+
+def code_digests(paths=None):
+    """
+    Fingerprints of the current sources, keyed 'file:qualname':
+    functions and methods (including their nested lambdas), 'file:Class'
+    and 'file:<module>' for class and module level statements, 'file:*'
+    for the whole file. Comments and line moves do not change them.
+    Otisky aktuálních zdrojů podle 'soubor:kvalifikované_jméno'.
+    """
+    if paths is None:
+        paths = [os.path.join(SRC_DIR, name) for name in sorted(os.listdir(SRC_DIR))
+                 if name.endswith('.py')]
+        paths.append(os.path.abspath(__file__))
+    digests = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            module = compile(f.read(), path, 'exec')
+        prefix = os.path.relpath(path, ROOT).replace(os.sep, '/') + ':'
+        digests[prefix + '*'] = _code_hash(module, True)
+        digests[prefix + '<module>'] = _code_hash(module, False)
+        pending = [module]
+        while pending:
+            for const in pending.pop().co_consts:
+                if not isinstance(const, types.CodeType) or '<locals>' in const.co_qualname:
+                    continue
+                if const.co_flags & inspect.CO_NEWLOCALS:
+                    digests[prefix + const.co_qualname] = _code_hash(const, True)
+                else:
+                    # Class body: its methods get their own entries
+                    # Tělo třídy: metody mají vlastní položky
+                    digests[prefix + const.co_qualname] = _code_hash(const, False)
+                    pending.append(const)
+    return digests
+
+def dependencies(codes):
+    """
+    Fingerprint keys covering the executed code objects.
+    Nested functions map to their enclosing function, methods also depend
+    on their class body, and code generated at import time (exec) depends
+    on every touched file as a whole.
+    Klíče otisků pokrývající provedené objekty kódu.
+    """
+    keys = {os.path.basename(__file__) + ':*'}
+    files = set()
+    generated = False
+    for code in codes:
+        filename = code.co_filename
+        if filename.startswith('<'):
+            generated = generated or not filename.startswith('<frozen')
+            continue
+        # Normalized: src may have been imported through a path like benchmarks/../src
+        # Normalizováno: src mohl být importován přes cestu jako benchmarks/../src
+        filename = os.path.normpath(filename)
+        if not filename.startswith(SRC_DIR + os.sep):
+            continue
+        prefix = os.path.relpath(filename, ROOT).replace(os.sep, '/') + ':'
+        files.add(prefix)
+        qualname = code.co_qualname.split('.<locals>')[0]
+        keys.add(prefix + qualname)
+        keys.add(prefix + '<module>')
+        if '.' in qualname:
+            keys.add(prefix + qualname.split('.')[0])
+    if generated:
+        keys.update(prefix + '*' for prefix in files)
+    return keys
+
+# --- Worker ---
+# Pracovní proces
+
+class TrackedMemory(Memory):
+    def __init__(self):
+        """
+        Flat 64K RAM without ROM that records the addresses written by the CPU.
+        Plochá 64K RAM bez ROM, která si pamatuje adresy zapsané procesorem.
+        """
+        super().__init__()
+        self.written = []
+
+    def write_byte(self, address, value):
+        address &= 0xFFFF
+        self.memory[address] = value & 0xFF
+        self.written.append(address)
+
+class ConformanceHarness:
+    def __init__(self, jit=False):
+        """
+        One CPU, one flat 64K RAM and one port log reused for every case.
+        Jedno CPU, jedna plochá 64K RAM a jeden záznam portů pro všechny případy.
+
+        :param jit: Test the Numba core (its memory writes bypass write_byte,
+                    so the whole RAM is cleared between cases).
+        """
+        self.jit = jit
+        self.reads = []
+        self.read_index = 0
+        self.writes = []
+        self.dirty = []
+
+        # Code run while building the CPU (opcode tables) is a dependency of every file
+        # Kód provedený při stavbě CPU (tabulky opkódů) je závislostí každého souboru
+        codes = set()
+        self._trace_into(codes)
+        try:
+            self.memory = TrackedMemory()
+            if jit:
+                self.cpu = JitZ80(self.memory, io_bus=self)
+                self.cpu.rom_writable = True # No ROM in the flat RAM
+            else:
+                self.cpu = Z80(self.memory, io_bus=self)
+        finally:
+            sys.setprofile(None)
+        self.setup_codes = codes
+        self.ram = self.memory.memory
+
+    # I/O bus seen by the CPU: reads replay the expected values, writes are logged
+    # Sběrnice I/O pro CPU: čtení vrací očekávané hodnoty, zápisy se zaznamenají
+    def read_byte(self, port, cycles=0):
+        if self.read_index < len(self.reads):
+            value = self.reads[self.read_index]
+            self.read_index += 1
+            return value
+        return 0xFF
+
+    def write_byte(self, port, value):
+        self.writes.append((port, value))
+
+    @staticmethod
+    def _trace_into(codes):
+        def profile(frame, event, arg):
+            if event == 'call':
+                codes.add(frame.f_code)
+        sys.setprofile(profile)
+
+    def run_case(self, case):
+        """
+        Run one case on the reused CPU.
+        Spustí jeden případ na znovu použitém CPU.
+
+        :return: List of mismatch descriptions (empty if the case passed).
+        """
+        name, initial, initial_ram, final, final_ram, reads, writes = case
+        cpu, ram = self.cpu, self.ram
+
+        # Reset only what the previous case touched
+        # Vynulovat jen to, na co sáhl předchozí případ
+        if self.jit:
+            ram[:] = BLANK_RAM
+        else:
+            for address in self.dirty:
+                ram[address] = 0
+            for address in self.memory.written:
+                ram[address] = 0
+            self.memory.written.clear()
+        self.dirty = [address for address, _ in initial_ram]
+        for address, value in initial_ram:
+            ram[address] = value
+
+        self.reads = reads
+        self.read_index = 0
+        self.writes = []
+
+        (cpu.a, cpu.f, cpu.b, cpu.c, cpu.d, cpu.e, cpu.h, cpu.l, cpu.pc, cpu.sp,
+         cpu.ix, cpu.iy, cpu.i, cpu.r, cpu.im, cpu.iff1, cpu.iff2, cpu.wz, cpu.q,
+         af, bc, de, hl) = initial
+        cpu.a_alt, cpu.f_alt = af >> 8, af & 0xFF
+        cpu.b_alt, cpu.c_alt = bc >> 8, bc & 0xFF
+        cpu.d_alt, cpu.e_alt = de >> 8, de & 0xFF
+        cpu.h_alt, cpu.l_alt = hl >> 8, hl & 0xFF
+        cpu.halted = False
+        cpu.cycles = 0
+
+        try:
+            cpu.step()
+        except Exception as e:
+            return [f"Exception during step: {e}"]
+
+        actual = [cpu.a, cpu.f, cpu.b, cpu.c, cpu.d, cpu.e, cpu.h, cpu.l, cpu.pc, cpu.sp,
+                  cpu.ix, cpu.iy, cpu.i, cpu.r, cpu.im, cpu.iff1, cpu.iff2, cpu.wz, 0,
+                  (cpu.a_alt << 8) | cpu.f_alt, (cpu.b_alt << 8) | cpu.c_alt,
+                  (cpu.d_alt << 8) | cpu.e_alt, (cpu.h_alt << 8) | cpu.l_alt]
+        errors = [f"{reg}: expected {hex(final[index])}, got {hex(actual[index])}"
+                  for index, reg in CHECKED if actual[index] != final[index]]
+        for address, value in final_ram:
+            if ram[address] != value:
+                errors.append(f"RAM[{hex(address)}]: expected {hex(value)}, got {hex(ram[address])}")
+        if self.writes != writes:
+            if len(self.writes) != len(writes):
+                errors.append(f"I/O Writes: expected {len(writes)} writes, got {len(self.writes)}")
+            else:
+                for i, ((exp_port, exp_val), (act_port, act_val)) in enumerate(zip(writes, self.writes)):
+                    if (exp_port, exp_val) != (act_port, act_val):
+                        errors.append(f"I/O Write {i}: expected Port {hex(exp_port)}={hex(exp_val)}, "
+                                      f"got {hex(act_port)}={hex(act_val)}")
+        return errors
+
+    def run_file(self, path, cache_dir=None, max_failures=5):
+        """
+        Run every case of a test file, recording the code it executes.
+        Spustí všechny případy souboru a zaznamená provedený kód.
+
+        :return: dict with file, cases, failed, failures (first max_failures),
+                 dependencies (fingerprint keys) and seconds.
+        """
+        start = time.perf_counter()
+        cases = iter_cases(load_test_file(path, cache_dir))
+        count = failed = 0
+        failures = []
+        codes = set(self.setup_codes)
+        self._trace_into(codes)
+        try:
+            for case in cases:
+                errors = self.run_case(case)
+                count += 1
+                if errors:
+                    failed += 1
+                    if len(failures) < max_failures:
+                        failures.append(f"{case[0]}:\n  " + "\n  ".join(errors))
+        finally:
+            sys.setprofile(None)
+
+        keys = dependencies(codes)
+        if self.jit:
+            # The compiled loop is invisible to the profiler
+            # Kompilovaná smyčka není pro profiler viditelná
+            keys.add('src/cpu_jit.py:*')
+        return {'file': os.path.basename(path), 'cases': count, 'failed': failed,
+                'failures': failures, 'dependencies': sorted(keys),
+                'seconds': round(time.perf_counter() - start, 3)}
+
+_harness = None
+
+def _init_worker(jit):
+    global _harness
+    _harness = ConformanceHarness(jit)
+
+def _run_file(path, cache_dir):
+    return _harness.run_file(path, cache_dir)
+
+# --- Suite ---
+# Sada
+
+def find_test_files(directory=TEST_DIR, names=None):
+    """
+    Test files in directory, optionally only the given opcodes ('00', 'cb40', 'ddcb00.json').
+    Testovací soubory v adresáři, volitelně jen zadané opkódy.
+    """
+    if names:
+        return [os.path.join(directory, name if name.endswith('.json') else name + '.json')
+                for name in names]
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.endswith('.json') and name != 'test_format.json']
+
+def _state_path(cache_dir, jit):
+    return os.path.join(cache_dir, 'state-jit.json' if jit else 'state-python.json')
+
+def load_state(cache_dir, jit=False):
+    try:
+        with open(_state_path(cache_dir, jit), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def needs_run(entry, path, digests):
+    """
+    True unless the file passed last time and neither its JSON nor any
+    fingerprint it depends on has changed since.
+    Pravda, pokud soubor minule neprošel nebo se změnil on či jeho závislosti.
+    """
+    if not entry or not entry.get('passed'):
+        return True
+    if entry.get('source') != _source_key(path):
+        return True
+    return any(digests.get(key) != value for key, value in entry['dependencies'].items())
+
+def run_suite(paths, jit=False, workers=None, cache_dir=None, force=False):
+    """
+    Run the selected test files (largest first, across a process pool) and
+    update the incremental state in cache_dir.
+    Spustí vybrané soubory (největší první, ve fondu procesů) a aktualizuje
+    přírůstkový stav v cache_dir.
+
+    :param workers: Worker processes (None: all cores, 0: run in this process).
+    :param cache_dir: Binary cache and state directory (None disables both).
+    :param force: Run every file, ignoring the incremental state.
+    :return: List of per-file results in the order of paths; skipped files
+             carry 'skipped': True.
+    """
+    digests = code_digests()
+    state = load_state(cache_dir, jit) if cache_dir else {}
+    results = {}
+    pending = []
+    for path in paths:
+        name = os.path.basename(path)
+        if not force and cache_dir and not needs_run(state.get(name), path, digests):
+            entry = state[name]
+            results[path] = {'file': name, 'cases': entry['cases'], 'failed': 0,
+                             'failures': [], 'skipped': True}
+        else:
+            pending.append(path)
+    # Largest files first keeps the pool busy until the end
+    # Největší soubory první, aby byl fond vytížen až do konce
+    pending.sort(key=os.path.getsize, reverse=True)
+
+    def record(path, result):
+        results[path] = result
+        if cache_dir:
+            state[result['file']] = {
+                'source': _source_key(path), 'passed': result['failed'] == 0,
+                'cases': result['cases'],
+                'dependencies': {key: digests.get(key) for key in result.pop('dependencies')},
+            }
+        else:
+            result.pop('dependencies')
+
+    if workers == 0 or len(pending) <= 1:
+        harness = ConformanceHarness(jit)
+        for path in pending:
+            record(path, harness.run_file(path, cache_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(jit,)) as pool:
+            futures = {pool.submit(_run_file, path, cache_dir): path for path in pending}
+            for future in as_completed(futures):
+                record(futures[future], future.result())
+
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(_state_path(cache_dir, jit), 'w') as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+    return [results[path] for path in paths]
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel, incremental SingleStepTests runner")
+    parser.add_argument('files', nargs='*', help="Opcode files to run (default: all)")
+    parser.add_argument('--dir', default=TEST_DIR, help="Directory with the JSON test files")
+    parser.add_argument('--cache-dir', help="Cache directory (default: <dir>/.cache)")
+    parser.add_argument('--no-cache', action='store_true', help="Parse the JSON and run every file")
+    parser.add_argument('--all', action='store_true', help="Ignore the incremental state")
+    parser.add_argument('--jit', action='store_true', help="Test the Numba CPU core")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: all cores, 0: serial)")
+    args = parser.parse_args()
+
+    paths = find_test_files(args.dir, args.files)
+    if not paths:
+        print(f"No test files in {args.dir} (run download_tests.py)")
+        return 1
+    cache_dir = None if args.no_cache else (args.cache_dir or os.path.join(args.dir, '.cache'))
+
+    start = time.perf_counter()
+    results = run_suite(paths, args.jit, args.workers, cache_dir, args.all)
+    elapsed = time.perf_counter() - start
+
+    failed_files = [r for r in results if r['failed']]
+    for result in failed_files:
+        print(f"Failed {result['failed']} of {result['cases']} tests in {result['file']}. First few failures:")
+        print("\n".join(result['failures']))
+    skipped = sum(r.get('skipped', False) for r in results)
+    cases = sum(r['cases'] for r in results if not r.get('skipped'))
+    print(f"{len(results)} files ({skipped} unchanged, skipped), {cases} cases run, "
+          f"{len(failed_files)} files failing, {elapsed:.1f}s")
+    return 1 if failed_files else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
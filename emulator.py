@@ -3,11 +3,17 @@ import os
 import pygame
 try:
     from src.cpu import Z80
+    from src.cpu_jit import JitZ80, NUMBA_AVAILABLE
     from src.memory import Memory
     from src.io import IOBus
     from src.ula import ULA
     from src.tape import Tape
     from src.hardware_128k import Hardware128K
+    from src.audio_sync import AudioClockSync
+    from src.profiler import OpcodeProfiler
+    from src.snapshot import (is_snapshot_file, load_snapshot, save_snapshot,
+                              capture_snapshot, restore_snapshot)
+    from src.display import scale_indexed, map_palette
     print("DEBUG: Imports complete.", file=sys.stderr, flush=True)
 except Exception as e:
     print(f"DEBUG: Import failed: {e}", file=sys.stderr, flush=True)
@@ -69,6 +75,19 @@ def main():
     pygame.display.set_caption('ZX Spectrum Emulator')
     
     is_128k = "--128" in sys.argv
+
+    # Snapshot (.sna/.z80) given on the command line; a 128K one selects the 128K model
+    # Snímek (.sna/.z80) z příkazové řádky; 128K snímek zvolí model 128K
+    snapshot = None
+    snapshot_path = next((arg for arg in sys.argv[1:]
+                          if not arg.startswith("--") and is_snapshot_file(arg)), None)
+    if snapshot_path:
+        try:
+            snapshot = load_snapshot(snapshot_path)
+        except (OSError, ValueError) as e:
+            print(f"CRITICAL ERROR: Snapshot {snapshot_path} could not be loaded: {e}")
+            return
+        is_128k = is_128k or snapshot.is_128k
     
     mixing_mode = 'mono'
     if "--abc" in sys.argv: mixing_mode = 'abc'
@@ -98,8 +117,12 @@ def main():
             return
 
     io_bus = IOBus()
-    ula = ULA(memory, is_128k=is_128k)
+    ula = ULA(memory, is_128k=is_128k, indexed=True)
     io_bus.add_device(ula)
+    if "--audio-accurate" in sys.argv:
+        # Oversampled synthesis with FIR decimation
+        # Převzorkovaná syntéza s FIR decimací
+        ula.set_audio_quality('accurate')
     
     if is_128k:
         hw128 = Hardware128K(memory, mixing_mode=mixing_mode)
@@ -114,11 +137,40 @@ def main():
         target_fps = 50.08  # 3.5 MHz / 69888
 
     frame_duration_ns = int(1_000_000_000 / target_fps)
+
+    # Audio-clock pacing: the sound card drives the frame rate
+    # Časování podle zvukových hodin: rychlost snímků řídí zvuková karta
+    audio_sync = None
+    if "--audio-sync" in sys.argv:
+        if audio_engine.is_running:
+            audio_sync = AudioClockSync(SAMPLE_RATE, target_fps, audio_engine.buffer_size // 2)
+            print("--- Saturnin: Audio-clock frame pacing enabled ---")
+        else:
+            print("WARNING: --audio-sync requested but audio output is not running, using the timer")
     
     # 2. INICIALIZACE CPU
-    cpu = Z80(memory, io_bus)
+    cpu_class = Z80
+    if "--jit" in sys.argv:
+        if NUMBA_AVAILABLE:
+            cpu_class = JitZ80
+            print("--- Saturnin: Numba JIT core enabled ---")
+        else:
+            print("WARNING: --jit requested but numba is not installed, using the Python core")
+    cpu = cpu_class(memory, io_bus)
     cpu.ula = ula
     cpu.pc = 0x0000 
+
+    # Per-opcode profiling (--profile, --profile=histogram.json or .csv)
+    # Profilování po opkódech
+    profiler = None
+    profile_arg = next((arg for arg in sys.argv if arg.startswith("--profile")), None)
+    if profile_arg:
+        if cpu_class is Z80:
+            profiler = OpcodeProfiler(cpu)
+            profiler.enable()
+            print("--- Saturnin: Opcode profiling enabled ---")
+        else:
+            print("WARNING: --profile needs the Python core, ignored with --jit")
     
     # 3. TAPE LOADING
     tape = Tape()
@@ -128,7 +180,7 @@ def main():
     
     # Parse arguments for tape path (skip flags)
     for arg in sys.argv[1:]:
-        if not arg.startswith("--"):
+        if not arg.startswith("--") and not is_snapshot_file(arg):
             tape_path = arg
     
     if os.path.exists(tape_path):
@@ -140,6 +192,20 @@ def main():
     
     # Link CPU to ULA for audio timing
     ula.set_cpu(cpu)
+    if is_128k:
+        # AY writes are timestamped for sub-frame accurate music
+        # Zápisy do AY nesou takt pro hudbu přesnou v rámci snímku
+        hw128.set_cpu(cpu)
+    if "--beam" in sys.argv:
+        # Mid-frame screen writes (multicolour effects)
+        # Zápisy do obrazovky během snímku (vícebarevné efekty)
+        ula.set_beam_accurate(True)
+        if cpu_class is not Z80:
+            print("WARNING: --beam has no effect on writes made by the JIT core")
+
+    if snapshot:
+        restore_snapshot(snapshot, cpu, memory, ula, hw128 if is_128k else None)
+        print(f"--- Saturnin: Snapshot {snapshot_path} restored ---")
 
     # Initialize Debugger
     from src.debug import Debugger
@@ -149,6 +215,12 @@ def main():
     print('--- Saturnin: Vstupuji do hlavní smyčky ---')
     print(f"DEBUG: Timing Target: {target_fps:.2f} FPS, {frame_cycles} cycles/frame")
 
+    # 8-bit paletted surface sharing memory with the ULA screen buffer
+    # 8bitová plocha s paletou sdílející paměť s bufferem obrazovky ULA
+    frame_surface = pygame.image.frombuffer(ula.screen_buffer, (SCREEN_WIDTH, SCREEN_HEIGHT), 'P')
+    frame_surface.set_palette(ula.palette)
+    window_palette = map_palette(screen, ula.palette)
+
     running = True
     start_real_time = time.perf_counter()
     next_frame_time_ns = time.perf_counter_ns()
@@ -167,9 +239,17 @@ def main():
                 current_width = WINDOW_WIDTH_DEBUG if debug_enabled else WINDOW_WIDTH
                 screen = pygame.display.set_mode((current_width, WINDOW_HEIGHT))
                 debugger.surface = screen # Update surface reference
+                ula.full_redraw = True # New display surface starts blank
+                window_palette = map_palette(screen, ula.palette)
                 if not debug_enabled:
                     debugger.paused = False # Resume if disabling debugger
             
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F2:
+                # Quick save / Rychlé uložení
+                save_snapshot("snapshot.z80", capture_snapshot(cpu, memory, ula,
+                                                               hw128 if is_128k else None))
+                print("--- Saturnin: Snapshot saved to snapshot.z80 ---")
+            
             # Pass events to debugger only if enabled
             if debug_enabled:
                 debugger.handle_input(event)
@@ -197,11 +277,8 @@ def main():
                 pass
         else:
             # Normal Execution
-            target_cycles = cpu.cycles + frame_cycles
             try:
-                while cpu.cycles < target_cycles:
-                    cpu.step()
-                cpu.interrupt()
+                cpu.run_frame(frame_cycles)
             except Exception as e:
                 print(f'CPU Error: {e}')
                 if debug_enabled: # Only pause if debugger is enabled (or enable it?)
@@ -215,35 +292,60 @@ def main():
         if not hasattr(main, 'frame_count'): main.frame_count = 0
         main.frame_count += 1
         
-        target_total_samples = int(main.frame_count * SAMPLE_RATE / target_fps)
-        samples_to_render = target_total_samples - total_samples_rendered
+        if audio_sync:
+            samples_to_render = audio_sync.samples_for_frame(audio_engine.buffered_samples)
+        else:
+            target_total_samples = int(main.frame_count * SAMPLE_RATE / target_fps)
+            samples_to_render = target_total_samples - total_samples_rendered
         
         ay_obj = hw128.ay if is_128k else None
-        audio_buffer = ula.render_audio(samples_to_render, actual_cycles, ay=ay_obj)
+        audio_buffer = ula.render_audio(samples_to_render, actual_cycles, ay=ay_obj, sample_rate=SAMPLE_RATE)
         total_samples_rendered += samples_to_render
         
+        audio_paced = False
         if not (debug_enabled and debugger.paused):
             audio_engine.add_samples(audio_buffer)
+            audio_paced = audio_sync is not None
         
         t1 = time.perf_counter()
-        buffer = ula.render_screen()
+        ula.render_screen()
         t_render = (time.perf_counter() - t1) * 1000
         
-        surface = pygame.image.frombuffer(buffer, (SCREEN_WIDTH, SCREEN_HEIGHT), 'RGB')
-        scaled = pygame.transform.scale(surface, (WINDOW_WIDTH, WINDOW_HEIGHT))
-        screen.blit(scaled, (0, 0))
+        # Scale and blit only the areas the ULA changed
+        # Škálovat a kreslit jen oblasti, které ULA změnila
+        updated = []
+        if ula.dirty_rects and screen.get_bytesize() in (2, 4):
+            # Replicate pixels straight into the window surface
+            # Pixely se kopírují přímo do plochy okna
+            pixels = pygame.surfarray.pixels2d(screen)
+            for x, y, w, h in ula.dirty_rects:
+                scale_indexed(pixels, ula.screen_buffer, window_palette, (x, y, w, h), SCALE)
+                updated.append(pygame.Rect(x * SCALE, y * SCALE, w * SCALE, h * SCALE))
+            del pixels # Unlock the surface
+        else:
+            for x, y, w, h in ula.dirty_rects:
+                area = pygame.transform.scale(frame_surface.subsurface((x, y, w, h)), (w * SCALE, h * SCALE))
+                updated.append(screen.blit(area, (x * SCALE, y * SCALE)))
         
         # Draw Debug Info
         if debug_enabled:
             debugger.draw(cpu, memory, ula)
-        
-        pygame.display.flip()
+            pygame.display.flip()
+        elif updated:
+            pygame.display.update(updated)
         
         # Frame Rate Limiter (Precise 50Hz)
         now_ns = time.perf_counter_ns()
         elapsed_ns = now_ns - next_frame_time_ns
         
-        if elapsed_ns < 0:
+        if audio_paced:
+            # Sleep until the queue is played down to its target fill
+            # Spát, dokud se fronta nepřehraje na cílové naplnění
+            wait = audio_sync.wait_time(audio_engine.buffered_samples)
+            if wait > 0:
+                time.sleep(wait)
+            next_frame_time_ns = time.perf_counter_ns() + frame_duration_ns
+        elif elapsed_ns < 0:
             # We are ahead, sleep
             sleep_sec = -elapsed_ns / 1_000_000_000.0
             if sleep_sec > 0.002:
@@ -273,6 +375,12 @@ def main():
             print(f"PERF: CPU: {t_cpu:.2f}ms, Render: {t_render:.2f}ms, Total: {t_total:.2f}ms")
             print(f"TIME: Real: {real_elapsed:.2f}s, Emulated: {emulated_elapsed:.2f}s, Ratio: {ratio:.2%}")
 
+    if profiler:
+        profiler.disable()
+        print(profiler.report(20))
+        if "=" in profile_arg:
+            profiler.dump(profile_arg.split("=", 1)[1])
+
     audio_engine.stop()
     pygame.quit()
 
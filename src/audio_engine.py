@@ -1,27 +1,45 @@
 import miniaudio
 import numpy as np
-import threading
 import sys
+from src.audio_ring import AudioRing
 
 class AudioEngine:
     def __init__(self, sample_rate=44100, buffer_size=4096):
         self.sample_rate = sample_rate
         self.buffer_size = buffer_size
         
-        # Ring Buffer
+        # Lock-free ring between the emulator thread and the audio callback
         # 2 channels (Stereo)
-        self.ring_buffer = np.zeros((buffer_size, 2), dtype=np.float32)
-        self.write_index = 0
-        self.read_index = 0
-        self.buffer_lock = threading.Lock()
-        
-        # Underrun/Overrun stats
-        self.underruns = 0
-        self.overruns = 0
+        self.ring = AudioRing(buffer_size, 2)
+        # Output block reused by every callback (grown only if the device
+        # asks for more frames than ever before)
+        # Výstupní blok sdílený všemi voláními (zvětší se jen při větším požadavku)
+        self._output = np.zeros((buffer_size, 2), dtype=np.float32)
+        self._output_bytes = memoryview(self._output).cast('B')
         
         self.device = None
         self.is_running = False
 
+    @property
+    def underruns(self):
+        """Callbacks that found fewer frames than requested."""
+        return self.ring.underruns
+
+    @property
+    def overruns(self):
+        """add_samples calls that had to drop frames."""
+        return self.ring.overruns
+
+    @property
+    def buffered_samples(self):
+        """Frames queued for playback."""
+        return self.ring.buffered
+
+    @property
+    def fill_level(self):
+        """Queue fill as a fraction of buffer_size (0.0 - 1.0)."""
+        return self.ring.fill_level
+
     def start(self):
         if self.is_running:
             return
@@ -59,75 +77,23 @@ class AudioEngine:
         """
         if not self.is_running:
             return
-
-        num_samples = len(samples)
-        if num_samples == 0:
-            return
-            
-        # Ensure stereo
-        if samples.ndim == 1:
-            # Expand mono to stereo
-            stereo_samples = np.column_stack((samples, samples))
-        else:
-            stereo_samples = samples
-
-        with self.buffer_lock:
-            space_avail = self.buffer_size - (self.write_index - self.read_index)
-            
-            if space_avail < num_samples:
-                self.overruns += 1
-                to_write = space_avail
-            else:
-                to_write = num_samples
-                
-            if to_write == 0:
-                return
-
-            end_idx = self.write_index + to_write
-            idx_start = self.write_index % self.buffer_size
-            idx_end = end_idx % self.buffer_size
-            
-            if idx_end > idx_start:
-                self.ring_buffer[idx_start:idx_end] = stereo_samples[:to_write]
-            else:
-                part1_len = self.buffer_size - idx_start
-                self.ring_buffer[idx_start:] = stereo_samples[:part1_len]
-                self.ring_buffer[:idx_end] = stereo_samples[part1_len:to_write]
-                
-            self.write_index += to_write
+        self.ring.write(samples)
 
     def _generator(self):
         """
         miniaudio generator.
-        Yields audio data.
+        Yields audio data as a view of the reused output block; never
+        blocks on the emulator thread.
         """
         required_frames = yield b"" # Initial yield to receive first request
         
         while True:
             # required_frames is sent by miniaudio
-            with self.buffer_lock:
-                available = self.write_index - self.read_index
-                
-                to_read = min(available, required_frames)
-                
-                output = np.zeros((required_frames, 2), dtype=np.float32)
-                
-                if to_read > 0:
-                    end_idx = self.read_index + to_read
-                    idx_start = self.read_index % self.buffer_size
-                    idx_end = end_idx % self.buffer_size
-                    
-                    if idx_end > idx_start:
-                        output[:to_read] = self.ring_buffer[idx_start:idx_end]
-                    else:
-                        part1_len = self.buffer_size - idx_start
-                        output[:part1_len] = self.ring_buffer[idx_start:]
-                        output[part1_len:to_read] = self.ring_buffer[:idx_end]
-                    
-                    self.read_index += to_read
-                
-                if to_read < required_frames:
-                    self.underruns += 1
-                    # Already zeros, effectively silence
-            
-            required_frames = yield output.tobytes()
+            if required_frames > len(self._output):
+                self._output = np.zeros((required_frames, 2), dtype=np.float32)
+                self._output_bytes = memoryview(self._output).cast('B')
+            self.ring.read_into(self._output, required_frames)
+            # miniaudio copies the bytes before the next callback, so the
+            # block can be reused
+            # miniaudio bajty zkopíruje před dalším voláním, blok lze znovu použít
+            required_frames = yield self._output_bytes[:required_frames * self._output.strides[0]]
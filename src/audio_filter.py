@@ -0,0 +1,66 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Audio quality levels: (oversampling factor, FIR taps)
+# 'fast' synthesizes at the device rate, 'accurate' at 4x the device rate
+# (176.4 kHz for 44.1 kHz output, above the PSG tick rate) and low-pass
+# filters down, so tones above the output Nyquist no longer alias.
+# Úrovně kvality zvuku: (faktor převzorkování, počet koeficientů FIR)
+QUALITY_LEVELS = {
+    'fast': (1, 0),
+    'accurate': (4, 64),
+}
+
+def design_lowpass(taps, factor, cutoff=0.45):
+    """
+    Windowed-sinc (Blackman) low-pass kernel for decimation by factor.
+    Návrh dolní propusti (sinc s Blackmanovým oknem) pro decimaci.
+
+    :param taps: Kernel length.
+    :param factor: Decimation factor.
+    :param cutoff: Cut-off as a fraction of the output sample rate.
+    :return: float32 kernel with unit DC gain.
+    """
+    fc = cutoff / factor
+    n = np.arange(taps) - (taps - 1) / 2.0
+    kernel = 2 * fc * np.sinc(2 * fc * n) * np.blackman(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+class Decimator:
+    def __init__(self, factor, taps, channels=2):
+        """
+        Polyphase FIR decimator: filters and keeps every factor-th sample,
+        computing only the kept outputs. The filter history is carried
+        between calls, so frames join seamlessly. It is primed with the first
+        input sample: the beeper/AY mix carries a DC offset, and a zero
+        history would fade the first block in from silence (a click).
+        Polyfázový FIR decimátor: filtruje a ponechá každý factor-tý vzorek,
+        počítá jen ponechané výstupy. Historie filtru se přenáší mezi voláními
+        a na začátku se vyplní prvním vzorkem (bez lupnutí ze stejnosměrné složky).
+        """
+        self.factor = factor
+        self.taps = taps
+        # Reversed for the sliding-window dot product
+        # Obrácené pořadí pro skalární součin s klouzavým oknem
+        self.kernel = design_lowpass(taps, factor)[::-1].copy()
+        self.channels = channels
+        self.history = None # Primed by the first block / Vyplní první blok
+
+    def process(self, samples):
+        """
+        Decimate a block of len(samples) // factor output samples.
+        Decimovat blok na len(samples) // factor výstupních vzorků.
+
+        :param samples: float32 array (n * factor, channels).
+        :return: float32 array (n, channels).
+        """
+        if self.history is None:
+            if not len(samples):
+                return np.zeros((0, self.channels), dtype=np.float32)
+            self.history = np.repeat(samples[:1], self.taps - 1, axis=0).astype(np.float32)
+        data = np.concatenate((self.history, samples))
+        self.history = data[len(data) - (self.taps - 1):].copy()
+        # Window k ends at the last input sample of output sample k
+        # Okno k končí posledním vstupním vzorkem výstupního vzorku k
+        windows = sliding_window_view(data[self.factor - 1:], self.taps, axis=0)[::self.factor]
+        return (windows @ self.kernel).astype(np.float32)
@@ -0,0 +1,95 @@
+import numpy as np
+
+class AudioRing:
+    def __init__(self, capacity, channels=2):
+        """
+        Single-producer/single-consumer ring of float32 audio frames.
+        The emulator thread only advances write_index, the audio callback
+        only advances read_index. Each index is published with a single
+        attribute store after the data is copied (atomic under the GIL),
+        so neither side ever takes a lock or waits for the other.
+        Kruhový buffer pro jednoho zapisovatele a jednoho čtenáře. Vlákno
+        emulátoru posouvá jen write_index, zvukové zpětné volání jen
+        read_index; index se zveřejní jediným přiřazením až po zkopírování
+        dat, takže žádná strana nečeká na zámek.
+
+        :param capacity: Ring size in frames.
+        :param channels: Samples per frame.
+        """
+        self.capacity = capacity
+        self.channels = channels
+        self.buffer = np.zeros((capacity, channels), dtype=np.float32)
+        # Monotonic frame counters; the position in the ring is index % capacity
+        # Monotónní čítače snímků; pozice v bufferu je index % capacity
+        self.write_index = 0
+        self.read_index = 0
+
+        # Underrun/Overrun stats
+        self.underruns = 0
+        self.overruns = 0
+
+    @property
+    def buffered(self):
+        """Frames waiting to be played."""
+        return self.write_index - self.read_index
+
+    @property
+    def fill_level(self):
+        """Buffered frames as a fraction of the capacity (0.0 - 1.0)."""
+        return (self.write_index - self.read_index) / self.capacity
+
+    def write(self, samples):
+        """
+        Producer side: append frames, dropping what does not fit.
+        Mono input (N,) is written to every channel without a temporary copy.
+        Strana zapisovatele: přidá snímky, co se nevejde, zahodí.
+
+        :return: Number of frames written.
+        """
+        write_index = self.write_index
+        space = self.capacity - (write_index - self.read_index)
+        count = len(samples)
+        if count > space:
+            self.overruns += 1
+            count = space
+        if count <= 0:
+            return 0
+
+        start = write_index % self.capacity
+        first = min(count, self.capacity - start)
+        if samples.ndim == 1:
+            # Broadcast mono to all channels
+            # Mono se rozkopíruje do všech kanálů
+            self.buffer[start:start + first] = samples[:first, None]
+            self.buffer[:count - first] = samples[first:count, None]
+        else:
+            self.buffer[start:start + first] = samples[:first]
+            self.buffer[:count - first] = samples[first:count]
+        # Publish only after the data is in place
+        # Zveřejnit až po zápisu dat
+        self.write_index = write_index + count
+        return count
+
+    def read_into(self, out, frames):
+        """
+        Consumer side: copy up to frames frames into out[:frames] and fill
+        the rest with silence. Never allocates.
+        Strana čtenáře: zkopíruje až frames snímků do out[:frames], zbytek
+        doplní tichem. Nikdy nealokuje.
+
+        :return: Number of frames read.
+        """
+        read_index = self.read_index
+        count = min(self.write_index - read_index, frames)
+        if count > 0:
+            start = read_index % self.capacity
+            first = min(count, self.capacity - start)
+            out[:first] = self.buffer[start:start + first]
+            out[first:count] = self.buffer[:count - first]
+            self.read_index = read_index + count
+        else:
+            count = 0
+        if count < frames:
+            self.underruns += 1
+            out[count:frames] = 0.0
+        return count
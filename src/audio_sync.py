@@ -0,0 +1,56 @@
+class AudioClockSync:
+    # Largest deviation of the resampling ratio from nominal (±0.5 %, inaudible)
+    # Největší odchylka poměru převzorkování od nominálu (±0,5 %, neslyšitelné)
+    MAX_ADJUST = 0.005
+
+    def __init__(self, sample_rate, fps, target_fill, smoothing=0.05):
+        """
+        Frame pacing slaved to the audio output.
+        The emulator sleeps while the audio queue holds more than target_fill
+        frames (the sound card clock drives the emulation, no busy wait), and
+        the number of samples rendered per frame is nudged by up to ±0.5 %
+        so the queue settles at target_fill instead of drifting into
+        underruns or overruns.
+        Časování snímků řízené zvukovým výstupem. Emulátor spí, dokud fronta
+        zvuku obsahuje víc než target_fill snímků, a počet vzorků na snímek
+        se upravuje nejvýše o ±0,5 %, aby se fronta ustálila na target_fill.
+
+        :param sample_rate: Output sample rate (Hz).
+        :param fps: Emulated frames per second.
+        :param target_fill: Desired queue fill in frames.
+        :param smoothing: Weight of the newest fill reading in the running
+                          average (the device drains the queue in bursts).
+        """
+        self.sample_rate = sample_rate
+        self.nominal_samples = sample_rate / fps
+        self.target_fill = target_fill
+        self.smoothing = smoothing
+        self.fill_average = float(target_fill)
+        self.ratio = 1.0
+        self.remainder = 0.0
+
+    def samples_for_frame(self, buffered):
+        """
+        Number of output samples to render for the next frame.
+        Počet výstupních vzorků pro další snímek.
+
+        :param buffered: Frames currently queued for playback.
+        """
+        self.fill_average += (buffered - self.fill_average) * self.smoothing
+        error = (self.target_fill - self.fill_average) / self.target_fill
+        # Emptier queue -> slightly more samples per frame, fuller -> fewer
+        # Prázdnější fronta -> o něco víc vzorků na snímek, plnější -> méně
+        self.ratio = 1.0 + max(-1.0, min(1.0, error)) * self.MAX_ADJUST
+        exact = self.nominal_samples * self.ratio + self.remainder
+        count = int(exact)
+        self.remainder = exact - count
+        return count
+
+    def wait_time(self, buffered):
+        """
+        Seconds to sleep before emulating the next frame: the time the
+        device needs to play the queue down to target_fill.
+        Sekundy spánku před dalším snímkem: doba, za kterou zařízení
+        přehraje frontu na target_fill.
+        """
+        return max(buffered - self.target_fill, 0) / self.sample_rate
@@ -1,5 +1,117 @@
 import numpy as np
 
+# Noise generator: 17-bit LFSR, feedback = bit 0 XOR bit 3 (x^17 + x^3 + 1,
+# maximal length). The whole sequence is precomputed once so any number of
+# steps is a table lookup.
+# Generátor šumu: 17bitový LFSR. Celá sekvence je předpočítaná, libovolný
+# počet kroků je jedno vyhledání v tabulce.
+NOISE_PERIOD = (1 << 17) - 1
+
+def _build_noise_tables():
+    """
+    Return (bits, states, positions): output bit and LFSR state after k steps
+    from state 1, and the step index of every non-zero state.
+    """
+    # Output bits obey b[k + 17] = b[k] ^ b[k + 3]; squaring the polynomial
+    # gives b[k + 17 * 2^j] = b[k] ^ b[k + 3 * 2^j], which fills large blocks at once
+    # Bity splňují b[k + 17] = b[k] ^ b[k + 3]; umocnění polynomu dovolí
+    # doplňovat velké bloky najednou
+    bits = np.zeros(NOISE_PERIOD + 17, dtype=np.uint8)
+    bits[0] = 1
+    length = 17
+    while length < len(bits):
+        shift = 1
+        while 17 * shift * 2 <= length:
+            shift *= 2
+        start = length - 17 * shift
+        count = min(14 * shift, len(bits) - length)
+        bits[length:length + count] = bits[start:start + count] ^ bits[start + 3 * shift:start + 3 * shift + count]
+        length += count
+    # Bit i of the state after k steps is the output bit after k + i steps
+    # Bit i stavu po k krocích je výstupní bit po k + i krocích
+    states = np.zeros(NOISE_PERIOD, dtype=np.int32)
+    for bit in range(17):
+        states |= bits[bit:bit + NOISE_PERIOD].astype(np.int32) << bit
+    positions = np.zeros(1 << 17, dtype=np.int32)
+    positions[states] = np.arange(NOISE_PERIOD, dtype=np.int32)
+    return bits[:NOISE_PERIOD], states, positions
+
+NOISE_BITS, NOISE_STATES, NOISE_POSITIONS = _build_noise_tables()
+
+def _envelope_next(step, direction, holding, shape):
+    """
+    One envelope generator step: (step, direction, holding) -> next state.
+    Jeden krok generátoru obálky.
+    """
+    if holding:
+        return step, direction, holding
+
+    # Bits: 3: Continue, 2: Attack, 1: Alternate, 0: Hold
+    cont = (shape >> 3) & 1
+    attack = (shape >> 2) & 1
+    alt = (shape >> 1) & 1
+    hold = shape & 1
+
+    step += direction
+    if 0 <= step <= 15:
+        return step, direction, False
+    if not cont:
+        # 00xx shapes: One cycle then 0
+        return 0, direction, True
+    if hold:
+        if alt:
+            # 1011 / 1111: hold at the opposite end
+            return (0 if direction == 1 else 15), direction, True
+        # 1001: \___ (Hold 0), 1101: /¯¯¯ (Hold 15)
+        return (15 if direction == 1 else 0), direction, True
+    if alt:
+        # Triangle repeat
+        if direction == 1:
+            return 15, -1, False
+        return 0, 1, False
+    # Sawtooth repeat
+    return (0 if attack else 15), direction, False
+
+_envelope_sequences = {}
+
+def _envelope_sequence(shape, state):
+    """
+    States reached from state by repeated envelope steps, as (states, loop):
+    the sequence is periodic from index loop on (the state space is tiny).
+    Stavy dosažené opakovanými kroky obálky; od indexu loop je posloupnost periodická.
+    """
+    key = (shape, state)
+    sequence = _envelope_sequences.get(key)
+    if sequence is None:
+        states = [state]
+        seen = {state: 0}
+        while True:
+            state = _envelope_next(*state, shape)
+            if state in seen:
+                break
+            seen[state] = len(states)
+            states.append(state)
+        sequence = (states, np.array([s[0] for s in states], dtype=np.intp), seen[state])
+        _envelope_sequences[key] = sequence
+    return sequence
+
+def _counter_events(ticks, counter, period):
+    """
+    Number of counter wraps after each cumulative tick count, for a counter
+    that increments every tick and wraps to 0 on reaching period.
+    Returns (events, final counter).
+    Počet přetečení čítače po každém kumulativním počtu tiků.
+    """
+    # First wrap after max(period - counter, 1) ticks, then every period ticks
+    # První přetečení po max(period - counter, 1) ticích, pak každých period tiků
+    first = max(period - counter, 1)
+    events = (ticks + (period - first)) // period
+    total = int(ticks[-1])
+    if total < first:
+        return events, counter + total
+    return events, (total - first) % period
+
+
 class AY38910:
     def __init__(self, clock_hz=1773400, mixing_mode='mono'):
         """
@@ -16,6 +128,12 @@ class AY38910:
         
         self.registers = [0] * 16
         self.current_register = 0
+        # Register values the generator is currently playing; timestamped
+        # writes reach them only when rendering passes their cycle
+        # Hodnoty registrů, které generátor právě hraje; zápisy s časem
+        # se do nich promítnou, až vykreslování dojde k jejich taktu
+        self.sound_registers = [0] * 16
+        self.write_log = [] # (cycle, register, value)
         
         # Channel state
         self.tone_counters = [0, 0, 0] # 12-bit counters
@@ -31,6 +149,7 @@ class AY38910:
         self.envelope_step = 15
         self.envelope_holding = False
         self.envelope_idle = True
+        self.env_direction = None # Taken from the shape on first use
         
         # Logarithmic volume table (AY-3-8910 is known for this)
         # Using a standard table for PSG
@@ -49,14 +168,28 @@ class AY38910:
         """
         self.current_register = value & 0x0F
 
-    def write_data(self, value):
+    def write_data(self, value, cycle=None):
         """
         Write data to the current register.
         Zapsat data do aktuálního registru.
+
+        :param cycle: CPU cycle of the write. The sound changes at that point
+                      of the frame being rendered; None applies it at once.
         """
         self.registers[self.current_register] = value
-        
-        if self.current_register == 13:
+        if cycle is None:
+            self._apply_write(self.current_register, value)
+        else:
+            self.write_log.append((cycle, self.current_register, value))
+
+    def _apply_write(self, register, value):
+        """
+        Make a register write audible.
+        Promítnout zápis registru do zvuku.
+        """
+        self.sound_registers[register] = value
+
+        if register == 13:
             # Reset envelope
             self.envelope_counter = 0
             self.envelope_step = 15
@@ -73,163 +206,141 @@ class AY38910:
             return 0xFF
         return self.registers[self.current_register]
 
-    def render_audio(self, num_samples, sample_rate):
+    def render_audio(self, num_samples, sample_rate, start_cycle=None, cycles=None):
         """
         Generate AY-3-8910 audio samples.
         Generovat audio vzorky AY-3-8910.
-        
+
+        Logged register writes split the frame: every sample ending after a
+        write's cycle hears it. Writes less than 0.5 ms after the previous
+        split (a player reloading all registers in its interrupt) join that
+        split, so a burst costs one extra block rather than one per register.
+        Zaznamenané zápisy registrů dělí snímek na úseky; zápisy do 0,5 ms
+        po předchozím rozdělení se k němu připojí.
+
         :param num_samples: Number of samples to generate.
         :param sample_rate: Output sample rate (Hz).
+        :param start_cycle: CPU cycle of the first sample (None: apply all logged writes first).
+        :param cycles: CPU cycles covered by the samples.
         :return: numpy array of floats (num_samples, 2) for stereo or (num_samples,) for mono.
         """
+        log = self.write_log
+        if not log:
+            return self._render_block(num_samples, sample_rate)
+        if start_cycle is None or not cycles or num_samples <= 0:
+            for _, register, value in log:
+                self._apply_write(register, value)
+            log.clear()
+            return self._render_block(num_samples, sample_rate)
+
+        end_cycle = start_cycle + cycles
+        min_block = max(sample_rate // 2000, 1)
+        blocks = []
+        done = 0
+        index = 0
+        while index < len(log) and log[index][0] < end_cycle:
+            cycle, register, value = log[index]
+            boundary = min(max((cycle - start_cycle) * num_samples // cycles, 0), num_samples)
+            if boundary - done >= min_block:
+                blocks.append(self._render_block(boundary - done, sample_rate))
+                done = boundary
+            self._apply_write(register, value)
+            index += 1
+        blocks.append(self._render_block(num_samples - done, sample_rate))
+        # Writes beyond this frame wait for the next one
+        # Zápisy za koncem snímku čekají na další
+        del log[:index]
+        return np.concatenate(blocks) if len(blocks) > 1 else blocks[0]
+
+    def _render_block(self, num_samples, sample_rate):
+        """
+        Generate samples with the current sound registers.
+        Generovat vzorky se současnými hodnotami registrů.
+
+        The whole block is computed at once: for every output sample the number
+        of PSG ticks elapsed so far gives the tone and noise toggle counts and
+        envelope steps by period arithmetic, the noise bits come from the
+        precomputed LFSR table.
+        Celý blok se počítá najednou: z počtu tiků PSG do každého vzorku se
+        aritmetikou period určí přepnutí tónů, šumu a kroky obálky.
+        """
         is_stereo = self.mixing_mode in ['abc', 'acb']
-        if is_stereo:
-            samples = np.zeros((num_samples, 2), dtype=np.float32)
-        else:
-            samples = np.zeros(num_samples, dtype=np.float32)
-        
-        # PSG ticks per output sample
-        psg_ticks_per_sample = self.psg_clock_hz / sample_rate
-        
-        period_a = ((self.registers[1] & 0x0F) << 8) | self.registers[0]
-        period_b = ((self.registers[3] & 0x0F) << 8) | self.registers[2]
-        period_c = ((self.registers[5] & 0x0F) << 8) | self.registers[4]
-        periods = [period_a, period_b, period_c]
-        
-        mixer = self.registers[7]
-        noise_period = self.registers[6] & 0x1F
-        env_period = (self.registers[12] << 8) | self.registers[11]
-        env_shape = self.registers[13] & 0x0F
-        
-        if not hasattr(self, 'env_direction'):
+        regs = self.sound_registers
+        mixer = regs[7]
+        noise_period = max(regs[6] & 0x1F, 1)
+        env_period = max((regs[12] << 8) | regs[11], 1)
+        env_shape = regs[13] & 0x0F
+
+        if self.env_direction is None:
             self.env_direction = 1 if (env_shape & 0x04) else -1
 
-        for i in range(num_samples):
-            self.psg_ticks_remainder += psg_ticks_per_sample
-            num_ticks = int(self.psg_ticks_remainder)
-            self.psg_ticks_remainder -= num_ticks
-            
-            if num_ticks > 0:
-                for _ in range(num_ticks):
-                    self._step_psg(periods, noise_period, env_period, env_shape)
-            
-            env_val = self.envelope_step
-            channel_outputs = [0.0, 0.0, 0.0]
-            
-            for chan in range(3):
-                tone_out = self.tone_states[chan] if not (mixer & (1 << chan)) else 1
-                noise_out = self.noise_state if not (mixer & (1 << (chan + 3))) else 1
-                
-                if tone_out and noise_out:
-                    amp_reg = self.registers[8 + chan]
-                    if amp_reg & 0x10: # Envelope
-                        channel_outputs[chan] = self.vol_table[env_val]
-                    else:
-                        channel_outputs[chan] = self.vol_table[amp_reg & 0x0F]
-            
-            # Mixing
-            if is_stereo:
-                if self.mixing_mode == 'abc':
-                    # ABC: A=L, B=L+R, C=R
-                    samples[i, 0] = (channel_outputs[0] + channel_outputs[1] * 0.7) / 1.7
-                    samples[i, 1] = (channel_outputs[2] + channel_outputs[1] * 0.7) / 1.7
-                elif self.mixing_mode == 'acb':
-                    # ACB: A=L, C=L+R, B=R
-                    samples[i, 0] = (channel_outputs[0] + channel_outputs[2] * 0.7) / 1.7
-                    samples[i, 1] = (channel_outputs[1] + channel_outputs[2] * 0.7) / 1.7
-            else:
-                # Mono
-                samples[i] = (channel_outputs[0] + channel_outputs[1] + channel_outputs[2]) / 3.0
-            
-        return samples
+        if num_samples <= 0:
+            return np.zeros((0, 2) if is_stereo else 0, dtype=np.float32)
 
-    def _step_psg(self, periods, noise_period, env_period, env_shape):
-        """Step the internal PSG state by one PSG clock tick."""
-        # Update Tones
+        # PSG ticks completed by the end of each sample; the clock phase is
+        # kept as an exact fraction so blocks join without drift
+        # Tiky PSG dokončené do konce každého vzorku; fáze hodin se drží
+        # jako přesný zlomek, takže bloky na sebe navazují bez driftu
+        denominator = 16 * sample_rate
+        phase = round(self.psg_ticks_remainder * denominator)
+        totals = phase + np.arange(1, num_samples + 1, dtype=np.int64) * self.clock_hz
+        ticks = totals // denominator
+        self.psg_ticks_remainder = float(totals[-1] % denominator) / denominator
+
+        # Noise: LFSR steps -> position in the precomputed sequence
+        # Šum: kroky LFSR -> pozice v předpočítané sekvenci
+        noise_steps, self.noise_counter = _counter_events(ticks, self.noise_counter, noise_period)
+        position = (int(NOISE_POSITIONS[self.noise_rng]) + noise_steps) % NOISE_PERIOD
+        noise = np.where(noise_steps > 0, NOISE_BITS[position], self.noise_state)
+        if noise_steps[-1] > 0:
+            self.noise_rng = int(NOISE_STATES[position[-1]])
+            self.noise_state = int(noise[-1])
+
+        # Envelope: steps -> index in the (periodic) state sequence
+        # Obálka: kroky -> index v (periodické) posloupnosti stavů
+        if self.envelope_idle:
+            env_values = np.full(num_samples, self.envelope_step, dtype=np.intp)
+        else:
+            env_steps, self.envelope_counter = _counter_events(ticks, self.envelope_counter, env_period * 16)
+            states, steps, loop = _envelope_sequence(
+                env_shape, (self.envelope_step, self.env_direction, self.envelope_holding))
+            index = np.where(env_steps < len(states), env_steps,
+                             loop + (env_steps - loop) % (len(states) - loop))
+            env_values = steps[index]
+            self.envelope_step, self.env_direction, self.envelope_holding = states[index[-1]]
+
+        channel_outputs = []
         for chan in range(3):
-            p = periods[chan]
-            if p == 0: p = 1
-            self.tone_counters[chan] += 1
-            if self.tone_counters[chan] >= p:
-                self.tone_counters[chan] = 0
-                self.tone_states[chan] ^= 1
-                
-        # Update Noise
-        n_p = noise_period
-        if n_p == 0: n_p = 1
-        self.noise_counter += 1
-        if self.noise_counter >= n_p:
-            self.noise_counter = 0
-            feedback = (self.noise_rng ^ (self.noise_rng >> 3)) & 1
-            self.noise_rng = (self.noise_rng >> 1) | (feedback << 16)
-            self.noise_state = self.noise_rng & 1
-            
-        # Update Envelope
-        if not self.envelope_idle:
-            e_p = env_period
-            if e_p == 0: e_p = 1
-            self.envelope_counter += 1
-            if self.envelope_counter >= (e_p * 16):
-                self.envelope_counter = 0
-                self._step_envelope(env_shape)
-
-    def _step_envelope(self, shape):
-        """Step the envelope generator."""
-        if self.envelope_holding:
-            return
-
-        # Bits: 3: Continue, 2: Attack, 1: Alternate, 0: Hold
-        cont = (shape >> 3) & 1
-        attack = (shape >> 2) & 1
-        alt = (shape >> 1) & 1
-        hold = (shape >> 0) & 1
-
-        if not hasattr(self, 'env_direction'):
-            self.env_direction = 1 if attack else -1
-
-        self.envelope_step += self.env_direction
-
-        if self.envelope_step < 0 or self.envelope_step > 15:
-            if not cont:
-                # 00xx shapes: One cycle then 0
-                self.envelope_step = 0
-                self.envelope_holding = True
+            period = max(((regs[chan * 2 + 1] & 0x0F) << 8) | regs[chan * 2], 1)
+            toggles, self.tone_counters[chan] = _counter_events(ticks, self.tone_counters[chan], period)
+            tone = (toggles & 1) ^ self.tone_states[chan]
+            self.tone_states[chan] = int(tone[-1])
+
+            audible = np.ones(num_samples, dtype=bool)
+            if not (mixer & (1 << chan)):
+                audible &= tone.astype(bool)
+            if not (mixer & (1 << (chan + 3))):
+                audible &= noise.astype(bool)
+
+            amp_reg = regs[8 + chan]
+            if amp_reg & 0x10: # Envelope
+                volume = self.vol_table[env_values]
             else:
-                if hold:
-                    # 1x01 or 1x11 shapes
-                    if alt:
-                        # 1011: \¯¯¯ (Decay then 15), 1111: /___ (Attack then 0)
-                        # Actually:
-                        # 1011: \ followed by hold at 15
-                        # 1111: / followed by hold at 0
-                        # Wait, bit 0 is hold. 
-                        # Shape 11 (1011) is Decay, Alternate, Hold. 
-                        # Decay (15->0), then alternate (Attack 0->15), then hold at 15.
-                        # Shape 15 (1111) is Attack, Alternate, Hold.
-                        # Attack (0->15), then alternate (Decay 15->0), then hold at 0.
-                        if self.env_direction == 1:
-                                # We were attacking, now hold at 0? No, hold at end of alternate.
-                                # This is getting complex. Let's use a simpler state machine.
-                                self.envelope_step = 0
-                                self.envelope_holding = True
-                        else:
-                                self.envelope_step = 15
-                                self.envelope_holding = True
-                    else:
-                        # 1001: \___ (Hold 0), 1101: /¯¯¯ (Hold 15)
-                        self.envelope_step = 15 if (self.env_direction == 1) else 0
-                        self.envelope_holding = True
-                else:
-                    if alt:
-                        # Triangle repeat
-                        if self.env_direction == 1:
-                            self.envelope_step = 15
-                            self.env_direction = -1
-                        else:
-                            self.envelope_step = 0
-                            self.env_direction = 1
-                    else:
-                        # Sawtooth repeat
-                        self.envelope_step = 0 if attack else 15
-
-    
\ No newline at end of file
+                volume = self.vol_table[amp_reg & 0x0F]
+            channel_outputs.append(np.where(audible, volume, np.float32(0.0)))
+
+        # Mixing
+        if is_stereo:
+            samples = np.zeros((num_samples, 2), dtype=np.float32)
+            if self.mixing_mode == 'abc':
+                # ABC: A=L, B=L+R, C=R
+                samples[:, 0] = (channel_outputs[0] + channel_outputs[1] * 0.7) / 1.7
+                samples[:, 1] = (channel_outputs[2] + channel_outputs[1] * 0.7) / 1.7
+            elif self.mixing_mode == 'acb':
+                # ACB: A=L, C=L+R, B=R
+                samples[:, 0] = (channel_outputs[0] + channel_outputs[2] * 0.7) / 1.7
+                samples[:, 1] = (channel_outputs[1] + channel_outputs[2] * 0.7) / 1.7
+        else:
+            # Mono
+            samples = (channel_outputs[0] + channel_outputs[1] + channel_outputs[2]) / 3.0
+        return samples
@@ -1,4 +1,224 @@
+# --- Flag Lookup Tables ---
+# Tabulky příznaků
+# Precomputed S, Z, F5, F3 (and P/V parity) bits for every 8-bit result.
+# Předpočítané bity S, Z, F5, F3 (a parita P/V) pro každý 8bitový výsledek.
+SZ53_TABLE = bytes((r & 0xA8) | (0x40 if r == 0 else 0) for r in range(256))
+SZ53P_TABLE = bytes(SZ53_TABLE[r] | (0x04 if bin(r).count('1') % 2 == 0 else 0) for r in range(256))
+
+# INC r / DEC r flags indexed by the result (C is merged in by the handler)
+# H is set on a nibble wrap, P/V on the 0x7F <-> 0x80 signed overflow.
+# Příznaky INC r / DEC r indexované výsledkem (C doplní obsluha)
+INC_FLAGS_TABLE = bytes(
+    SZ53_TABLE[r] | (0x10 if (r & 0x0F) == 0x00 else 0) | (0x04 if r == 0x80 else 0)
+    for r in range(256))
+DEC_FLAGS_TABLE = bytes(
+    SZ53_TABLE[r] | 0x02 | (0x10 if (r & 0x0F) == 0x0F else 0) | (0x04 if r == 0x7F else 0)
+    for r in range(256))
+
+# --- Specialized Register Handlers ---
+# Specializované obsluhy registrů
+# The 0x40-0xBF block and the INC/DEC/LD r,n groups are the hottest instructions
+# in any Spectrum program. Instead of resolving register names through
+# getattr/setattr at run time, one small function per register/operation pair is
+# generated from the templates below when the module is imported.
+# Blok 0x40-0xBF a skupiny INC/DEC/LD r,n jsou nejčastější instrukce.
+# Místo hledání registrů přes getattr/setattr za běhu se při importu modulu
+# vygeneruje jedna malá funkce pro každou dvojici registr/operace.
+
+_REG_NAMES = ['b', 'c', 'd', 'e', 'h', 'l', 'hl_indir', 'a']
+
+def _reg_read(r):
+    """Source expression for reading register r (or (HL))."""
+    if r == 'hl_indir':
+        return 'self.read_byte((self.h << 8) | self.l)'
+    return 'self.' + r
+
+def _reg_write(r, value):
+    """Statement storing value into register r (or (HL))."""
+    if r == 'hl_indir':
+        return f'self.write_byte((self.h << 8) | self.l, {value})'
+    return f'self.{r} = {value}'
+
+# ALU bodies; 'val' holds the operand, flags are built with table lookups
+# Těla ALU; 'val' obsahuje operand, příznaky se skládají z tabulek
+_ALU_TEMPLATES = [
+    # ADD A, r
+    ('add_a', """
+    a = self.a
+    res = a + val
+    self.a = res & 0xFF
+    self.f = SZ53[res & 0xFF] | ((a ^ val ^ res) & 0x10) | (((a ^ res) & (val ^ res) & 0x80) >> 5) | (res >> 8)"""),
+    # ADC A, r
+    ('adc_a', """
+    a = self.a
+    res = a + val + (self.f & 0x01)
+    self.a = res & 0xFF
+    self.f = SZ53[res & 0xFF] | ((a ^ val ^ res) & 0x10) | (((a ^ res) & (val ^ res) & 0x80) >> 5) | (res >> 8)"""),
+    # SUB r
+    ('sub', """
+    a = self.a
+    res = a - val
+    self.a = res & 0xFF
+    self.f = SZ53[res & 0xFF] | ((a ^ val ^ res) & 0x10) | (((a ^ val) & (a ^ res) & 0x80) >> 5) | 0x02 | ((res >> 8) & 0x01)"""),
+    # SBC A, r
+    ('sbc_a', """
+    a = self.a
+    res = a - val - (self.f & 0x01)
+    self.a = res & 0xFF
+    self.f = SZ53[res & 0xFF] | ((a ^ val ^ res) & 0x10) | (((a ^ val) & (a ^ res) & 0x80) >> 5) | 0x02 | ((res >> 8) & 0x01)"""),
+    # AND r
+    ('and', """
+    res = self.a & val
+    self.a = res
+    self.f = SZ53P[res] | 0x10"""),
+    # XOR r
+    ('xor', """
+    res = self.a ^ val
+    self.a = res
+    self.f = SZ53P[res]"""),
+    # OR r
+    ('or', """
+    res = self.a | val
+    self.a = res
+    self.f = SZ53P[res]"""),
+    # CP r - undocumented bits 5 and 3 come from the operand
+    ('cp', """
+    a = self.a
+    res = a - val
+    self.f = (SZ53[res & 0xFF] & 0xC0) | (val & 0x28) | ((a ^ val ^ res) & 0x10) | (((a ^ val) & (a ^ res) & 0x80) >> 5) | 0x02 | ((res >> 8) & 0x01)"""),
+]
+
+def _generate_register_handlers():
+    """
+    Generate specialized handlers for the register instruction groups.
+    Generuje specializované obsluhy pro skupiny registrových instrukcí.
+
+    :return: dict opcode -> plain function taking the Z80 instance.
+    """
+    sources = []
+    names = {}
+
+    def add(opcode, name, body):
+        sources.append(f"def {name}(self):{body}\n")
+        names[opcode] = name
+
+    for i, r in enumerate(_REG_NAMES):
+        # LD r, n (0x06, 0x0E, ... 0x3E); LD (HL), n (0x36) keeps its own handler
+        if r != 'hl_indir':
+            add(0x06 + (i << 3), f'ld_{r}_n', f"""
+    pc = self.pc
+    {_reg_write(r, 'self.read_byte(pc)')}
+    self.pc = (pc + 1) & 0xFFFF""")
+
+        # INC r / DEC r - C flag is preserved
+        if r == 'hl_indir':
+            inc_body = """
+    hl = (self.h << 8) | self.l
+    res = (self.read_byte(hl) + 1) & 0xFF
+    self.f = (self.f & 0x01) | INC_FLAGS[res]
+    self.write_byte(hl, res)"""
+            dec_body = inc_body.replace('+ 1', '- 1').replace('INC_FLAGS', 'DEC_FLAGS')
+        else:
+            inc_body = f"""
+    res = (self.{r} + 1) & 0xFF
+    self.f = (self.f & 0x01) | INC_FLAGS[res]
+    self.{r} = res"""
+            dec_body = inc_body.replace('+ 1', '- 1').replace('INC_FLAGS', 'DEC_FLAGS')
+        add(0x04 + (i << 3), f'inc_{r}', inc_body)
+        add(0x05 + (i << 3), f'dec_{r}', dec_body)
+
+        # LD r, r' (0x40 - 0x7F), 0x76 is HALT
+        for j, src in enumerate(_REG_NAMES):
+            opcode = 0x40 + (i << 3) + j
+            if opcode == 0x76:
+                continue
+            add(opcode, f'ld_{r}_{src}', f"""
+    {_reg_write(r, _reg_read(src))}""")
+
+        # ALU A, r (0x80 - 0xBF)
+        for op_index, (op_name, body) in enumerate(_ALU_TEMPLATES):
+            add(0x80 + (op_index << 3) + i, f'{op_name}_{r}', f"""
+    val = {_reg_read(r)}""" + body)
+
+    namespace = {
+        'SZ53': SZ53_TABLE,
+        'SZ53P': SZ53P_TABLE,
+        'INC_FLAGS': INC_FLAGS_TABLE,
+        'DEC_FLAGS': DEC_FLAGS_TABLE,
+    }
+    exec(compile('\n'.join(sources), '<z80-register-handlers>', 'exec'), namespace)
+    return {opcode: namespace[name] for opcode, name in names.items()}
+
+# Generated once per process and bound to each Z80 instance in _init_opcodes
+# Generováno jednou za proces a navázáno na každou instanci Z80 v _init_opcodes
+REGISTER_HANDLERS = _generate_register_handlers()
+
+
+# --- Q Register Tracking ---
+# Sledování registru Q
+# Q holds a copy of F when the last instruction wrote the flags and 0 otherwise
+# (SCF/CCF read it for their undocumented bits 5 and 3). Whether an instruction
+# writes F is a static property of its opcode, so instead of intercepting every
+# F store with a property, each dispatch table has a matching Q table that is
+# consulted once after the handler returns.
+# Q obsahuje kopii F, pokud poslední instrukce zapsala příznaky, jinak 0.
+# Zda instrukce zapisuje F, je statická vlastnost opkódu, proto má každá
+# tabulka obsluh odpovídající tabulku Q, která se použije po provedení obsluhy.
+Q_CLEAR = 0   # Instruction leaves F alone -> Q = 0
+Q_LATCH = 1   # Instruction writes F -> Q = F
+Q_PREFIX = 2  # Prefix byte, the sub-table dispatcher updates Q itself
+
+def _q_table(latched, prefixes=()):
+    """Build a 256-entry Q table from the opcodes that write F."""
+    table = bytearray(256)
+    for opcode in latched:
+        table[opcode] = Q_LATCH
+    for opcode in prefixes:
+        table[opcode] = Q_PREFIX
+    return bytes(table)
+
+Q_MAIN_TABLE = _q_table(
+    list(range(0x80, 0xC0))                              # ALU A, r
+    + [0x04 + (i << 3) for i in range(8)]                # INC r
+    + [0x05 + (i << 3) for i in range(8)]                # DEC r
+    + [0xC6, 0xCE, 0xD6, 0xDE, 0xE6, 0xEE, 0xF6, 0xFE]   # ALU A, n
+    + [0x09, 0x19, 0x29, 0x39]                           # ADD HL, ss
+    + [0x07, 0x0F, 0x17, 0x1F]                           # RLCA, RRCA, RLA, RRA
+    + [0x27, 0x2F, 0x37, 0x3F]                           # DAA, CPL, SCF, CCF
+    + [0x08, 0xF1],                                      # EX AF, AF' and POP AF load F
+    prefixes=[0xCB, 0xDD, 0xED, 0xFD])
+
+# Shifts/rotates and BIT write F, RES/SET do not (also used for DDCB/FDCB)
+# Posuny/rotace a BIT zapisují F, RES/SET ne (platí i pro DDCB/FDCB)
+Q_CB_TABLE = _q_table(range(0x00, 0x80))
+
+Q_ED_TABLE = _q_table(
+    [0x40 + (i << 3) for i in range(8)]                  # IN r, (C)
+    + [0x42, 0x52, 0x62, 0x72, 0x4A, 0x5A, 0x6A, 0x7A]   # SBC/ADC HL, ss
+    + [0x44, 0x4C, 0x54, 0x5C, 0x64, 0x6C, 0x74, 0x7C]   # NEG
+    + [0x57, 0x5F, 0x67, 0x6F]                           # LD A, I / LD A, R / RRD / RLD
+    + list(range(0xA0, 0xA4)) + list(range(0xA8, 0xAC))  # LDI, CPI, INI, OUTI, LDD ...
+    + list(range(0xB0, 0xB4)) + list(range(0xB8, 0xBC))) # ... and the repeating forms
+
+# Every DD/FD form writes F exactly when its unprefixed counterpart does
+# (ADD IX, INC/DEC (IX+d), ALU (IX+d), IXH/IXL ALU...), 0xCB leads to DDCB/FDCB.
+# Každá forma DD/FD zapisuje F právě tehdy, když její protějšek bez předpony.
+Q_INDEX_TABLE = Q_MAIN_TABLE
+
+
 class Z80:
+    # Fixed attribute layout: no per-instance __dict__, faster register access
+    # Pevné rozložení atributů: bez __dict__ instance, rychlejší přístup k registrům
+    __slots__ = (
+        'memory', 'io_bus', 'ula', 'tape',
+        'a', 'f', 'b', 'c', 'd', 'e', 'h', 'l',
+        'a_alt', 'f_alt', 'b_alt', 'c_alt', 'd_alt', 'e_alt', 'h_alt', 'l_alt',
+        'ix', 'iy', 'pc', 'sp', 'i', 'r', 'wz', 'q',
+        'iff1', 'iff2', 'im', 'halted', 'cycles', 'trap_addresses',
+        'opcodes', 'opcodes_cb', 'opcodes_ed', 'opcodes_dd', 'opcodes_fd',
+        'opcodes_ddcb', 'opcodes_fdcb',
+    )
+
     def __init__(self, memory, io_bus=None):
         self.memory = memory
         self.io_bus = io_bus
@@ -7,7 +227,7 @@ class Z80:
         # Main register set
         # Hlavní sada registrů
         self.a = 0
-        self._f = 0
+        self.f = 0
         self.b = 0
         self.c = 0
         self.d = 0
@@ -18,7 +238,7 @@ class Z80:
         # Alternate register set
         # Alternativní sada registrů
         self.a_alt = 0
-        self._f_alt = 0
+        self.f_alt = 0
         self.b_alt = 0
         self.c_alt = 0
         self.d_alt = 0
@@ -47,54 +267,27 @@ class Z80:
         self.halted = False
         self.cycles = 0
         self.tape = None
-        self.q = 0 # Internal register for flag logic (ProcessorTests)
-        self._flags_updated = False
+        # PC values that need check_traps() before the instruction is fetched
+        # Hodnoty PC, které před načtením instrukce vyžadují check_traps()
+        self.trap_addresses = {0x0556} # LD-BYTES
+        self.q = 0 # Internal register for flag logic (ProcessorTests), see Q_MAIN_TABLE
         
         self.opcodes = [self._unimplemented_opcode] * 256
         self._init_opcodes()
 
-    @property
-    def f(self):
-        return self._f
-
-    @f.setter
-    def f(self, value):
-        self._f = value
-        self._flags_updated = True
-
-    @property
-    def f_alt(self):
-        return self._f_alt
-
-    @f_alt.setter
-    def f_alt(self, value):
-        self._f_alt = value
-        # Note: shadow flags update doesn't usually affect Q in the same way? 
-        # But ProcessorTests might expect it. LD A, I affects flags and sets Q.
-        # EX AF, AF' swaps them.
-        pass
-
     def _init_opcodes(self):
         self.opcodes[0x00] = self._nop
         self.opcodes[0xF3] = self._di
         self.opcodes[0xFB] = self._ei
         
-        # LD r, n (Immediate load) 8-bit
-        # LD r, n (Přímé načtení) 8-bitový
-        self.opcodes[0x3E] = lambda: self._ld_r_n('a')
-        self.opcodes[0x06] = lambda: self._ld_r_n('b')
-        self.opcodes[0x0E] = lambda: self._ld_r_n('c')
-        self.opcodes[0x16] = lambda: self._ld_r_n('d')
-        self.opcodes[0x1E] = lambda: self._ld_r_n('e')
-        self.opcodes[0x26] = lambda: self._ld_r_n('h')
-        self.opcodes[0x2E] = lambda: self._ld_r_n('l')
-
-        # LD r, r' (Register to Register)
-        # LD r, r' (Registr do registru)
-        self.opcodes[0x78] = lambda: self._ld_r_r('a', 'b')
-        self.opcodes[0x79] = lambda: self._ld_r_r('a', 'c')
-        # ... (more LD instructions would go here)
-        
+        # Register groups: LD r, n / INC r / DEC r / LD r, r' / ALU A, r
+        # Specialized handlers are generated once per process (see REGISTER_HANDLERS)
+        # and only bound to this instance here.
+        # Skupiny registrů: LD r, n / INC r / DEC r / LD r, r' / ALU A, r
+        # Specializované obsluhy se generují jednou za proces a zde se jen navážou.
+        for opcode, handler in REGISTER_HANDLERS.items():
+            self.opcodes[opcode] = handler.__get__(self)
+
         # 16-bit Load Instructions
         # 16bitové instrukce načítání
 
@@ -139,13 +332,6 @@ class Z80:
         # Logika - CP n
         self.opcodes[0xFE] = self._cp_n
         
-        # INC r
-        # INC r (Inkrementace)
-        self.opcodes[0x3C] = lambda: self._inc_r('a')
-        # DEC r
-        # DEC r (Dekrementace)
-        self.opcodes[0x3D] = lambda: self._dec_r('a')
-
         # 16-bit Arithmetic - ADD HL, ss
         # 16bitová aritmetika - ADD HL, ss
         # ss: BC (0x09), DE (0x19), HL (0x29), SP (0x39)
@@ -170,40 +356,6 @@ class Z80:
         self.opcodes[0x3A] = self._ld_a_nn_indir
         self.opcodes[0x36] = self._ld_hl_n
         
-        # ALU Register Operations (0x80 - 0xBF)
-        # 0x80 - 0x87: ADD A, r
-        # 0x88 - 0x8F: ADC A, r
-        # 0x90 - 0x97: SUB r
-        # 0x98 - 0x9F: SBC A, r
-        # 0xA0 - 0xA7: AND r
-        # 0xA8 - 0xAF: XOR r
-        # 0xB0 - 0xB7: OR r
-        # 0xB8 - 0xBF: CP r
-        
-        regs = ['b', 'c', 'd', 'e', 'h', 'l', 'hl_indir', 'a']
-        
-        for i in range(8):
-            r = regs[i]
-            # Capture loop variable 'r' and 'i' with default args or helper
-            # Python closures bind late, so use partial or default arg hack
-            
-            # ADD A, r
-            self.opcodes[0x80 + i] = (lambda reg=r: self._alu_op(0, reg))
-            # ADC A, r
-            self.opcodes[0x88 + i] = (lambda reg=r: self._alu_op(1, reg))
-            # SUB r
-            self.opcodes[0x90 + i] = (lambda reg=r: self._alu_op(2, reg))
-            # SBC A, r
-            self.opcodes[0x98 + i] = (lambda reg=r: self._alu_op(3, reg))
-            # AND r
-            self.opcodes[0xA0 + i] = (lambda reg=r: self._alu_op(4, reg))
-            # XOR r
-            self.opcodes[0xA8 + i] = (lambda reg=r: self._alu_op(5, reg))
-            # OR r
-            self.opcodes[0xB0 + i] = (lambda reg=r: self._alu_op(6, reg))
-            # CP r
-            self.opcodes[0xB8 + i] = (lambda reg=r: self._alu_op(7, reg))
-
         # Misc Instructions
         self.opcodes[0x27] = self._daa  # DAA
         self.opcodes[0x2F] = self._cpl  # CPL
@@ -332,31 +484,6 @@ class Z80:
         # EXX (D9) - Výměna BC, DE, HL za stínové registry
         self.opcodes[0xD9] = self._exx
         
-        # 8-bit Load Block (0x40 - 0x7F)
-        # LD r, r'
-        regs = ['b', 'c', 'd', 'e', 'h', 'l', 'hl_indir', 'a']
-        for dest_i in range(8):
-            for src_i in range(8):
-                opcode = 0x40 + (dest_i << 3) + src_i
-                if opcode == 0x76: continue # HALT exception
-                
-                dest = regs[dest_i]
-                src = regs[src_i]
-                self.opcodes[opcode] = (lambda d=dest, s=src: self._ld_r_r(d, s))
-                
-        # 8-bit Arithmetic (INC/DEC)
-        for i in range(8):
-            r = regs[i]
-            # INC r (x0 xxx (dest) 100) -> 0x04, 0x0C ...
-            # INC codes: 0x04, 0x0C, 0x14, 0x1C, 0x24, 0x2C, 0x34, 0x3C
-            inc_opcode = 0x04 + (i << 3)
-            self.opcodes[inc_opcode] = (lambda reg=r: self._inc_r(reg))
-            
-            # DEC r (x0 xxx (dest) 101) -> 0x05, 0x0D ...
-            # DEC codes: 0x05, 0x0D, 0x15, 0x1D, 0x25, 0x2D, 0x35, 0x3D
-            dec_opcode = 0x05 + (i << 3)
-            self.opcodes[dec_opcode] = (lambda reg=r: self._dec_r(reg))
-            
         # Control Flow
         self.opcodes[0x10] = self._djnz_e
         
@@ -371,6 +498,17 @@ class Z80:
         # Manipulace s bity a rotace (předpona CB)
         self.opcodes[0xCB] = self._prefix_cb
 
+        # Prefixed instruction tables (built once, after the unprefixed table)
+        # Every prefixed instruction then costs a single indexed call.
+        # Tabulky instrukcí s předponou (sestaveny jednou, po tabulce bez předpony)
+        # Každá instrukce s předponou pak stojí jediné indexované volání.
+        self.opcodes_cb = self._build_cb_table()
+        self.opcodes_ed = self._build_ed_table()
+        self.opcodes_dd = self._build_index_table('ix')
+        self.opcodes_fd = self._build_index_table('iy')
+        self.opcodes_ddcb = self._build_index_cb_table()
+        self.opcodes_fdcb = self._build_index_cb_table()
+
     def read_byte(self, addr):
         """
         Read a byte from memory with cycle penalty and contention.
@@ -414,14 +552,6 @@ class Z80:
     def hl_indir(self, value):
         self.write_byte(self.hl, value)
 
-    @property
-    def hl_indir(self):
-        return self.read_byte(self.hl)
-        
-    @hl_indir.setter
-    def hl_indir(self, value):
-        self.write_byte(self.hl, value)
-
     def _djnz_e(self):
         # DJNZ e (10 e)
         # B = B - 1
@@ -507,104 +637,97 @@ class Z80:
     def _prefix_ed(self):
         """
         Handle extended instructions with ED prefix.
+        Dispatches through the prebuilt 256-entry ED table.
         Obsluha rozšířených instrukcí s předponou ED.
+        Provádí se přes předpřipravenou 256položkovou tabulku ED.
         """
         opcode = self._fetch_opcode()
-        
-        # Block Transfer
-        # Blokové přenosy
+        self.opcodes_ed[opcode]()
+        self.q = self.f if Q_ED_TABLE[opcode] else 0
+
+    def _build_ed_table(self):
+        """
+        Build the dispatch table for ED-prefixed instructions.
+        Sestaví tabulku obsluh pro instrukce s předponou ED.
+        """
+        # Unassigned ED opcodes only report themselves (same as the old decoder did)
+        # Nepřiřazené ED opkódy se pouze ohlásí (stejně jako původní dekodér)
+        table = [(lambda op=op: print(f"Unimplemented ED opcode: {hex(op)}")) for op in range(256)]
+
         # Block Transfer
         # Blokové přenosy
-        if opcode == 0xA0: self._ldi()
-        elif opcode == 0xB0: self._ldir()
-        elif opcode == 0xA8: self._ldd()
-        elif opcode == 0xB8: self._lddr()
-        
+        table[0xA0] = self._ldi
+        table[0xB0] = self._ldir
+        table[0xA8] = self._ldd
+        table[0xB8] = self._lddr
+
         # Block Compare
         # Blokové porovnání
-        elif opcode == 0xA1: self._cpi()
-        elif opcode == 0xB1: self._cpir()
-        elif opcode == 0xA9: self._cpd()
-        elif opcode == 0xB9: self._cpdr()
-        
-        # Extended Loads
+        table[0xA1] = self._cpi
+        table[0xB1] = self._cpir
+        table[0xA9] = self._cpd
+        table[0xB9] = self._cpdr
+
+        # Extended Loads - LD dd, (nn) / LD (nn), dd
         # Rozšířené načítání
-        elif opcode == 0x4B: self._ld_dd_indir_nn('bc')
-        elif opcode == 0x5B: self._ld_dd_indir_nn('de')
-        elif opcode == 0x6B: self._ld_dd_indir_nn('hl')
-        elif opcode == 0x7B: self._ld_dd_indir_nn('sp')
-        elif opcode == 0x43: self._ld_nn_indir_dd('bc')
-        elif opcode == 0x53: self._ld_nn_indir_dd('de')
-        elif opcode == 0x63: self._ld_nn_indir_dd('hl')
-        elif opcode == 0x73: self._ld_nn_indir_dd('sp')
-        
-        elif opcode == 0x57: self._ld_a_i()
-        elif opcode == 0x47: self._ld_i_a()
-        elif opcode == 0x5F: self._ld_a_r()
-        elif opcode == 0x4F: self._ld_r_a()
-        
-        # Extended Arithmetic
+        for i, dd in enumerate(['bc', 'de', 'hl', 'sp']):
+            table[0x4B + (i << 4)] = (lambda dd=dd: self._ld_dd_indir_nn(dd))
+            table[0x43 + (i << 4)] = (lambda dd=dd: self._ld_nn_indir_dd(dd))
+
+        table[0x57] = self._ld_a_i
+        table[0x47] = self._ld_i_a
+        table[0x5F] = self._ld_a_r
+        table[0x4F] = self._ld_r_a
+
+        # Extended Arithmetic - ADC HL, ss / SBC HL, ss
         # Rozšířená aritmetika
-        elif opcode == 0x4A: self._adc_hl_ss('bc')
-        elif opcode == 0x5A: self._adc_hl_ss('de')
-        elif opcode == 0x6A: self._adc_hl_ss('hl')
-        elif opcode == 0x7A: self._adc_hl_ss('sp')
-        elif opcode == 0x42: self._sbc_hl_ss('bc')
-        elif opcode == 0x52: self._sbc_hl_ss('de')
-        elif opcode == 0x62: self._sbc_hl_ss('hl')
-        elif opcode == 0x72: self._sbc_hl_ss('sp')
-        
-        elif opcode in [0x44, 0x4C, 0x54, 0x5C, 0x64, 0x6C, 0x74, 0x7C]: 
-            self._neg()
-            
+        for i, ss in enumerate(['bc', 'de', 'hl', 'sp']):
+            table[0x4A + (i << 4)] = (lambda ss=ss: self._adc_hl_ss(ss))
+            table[0x42 + (i << 4)] = (lambda ss=ss: self._sbc_hl_ss(ss))
+
+        for opcode in [0x44, 0x4C, 0x54, 0x5C, 0x64, 0x6C, 0x74, 0x7C]:
+            table[opcode] = self._neg
+
         # Interrupts
         # Přerušení
-        elif opcode in [0x46, 0x4E, 0x66, 0x6E]: self._im(0)
-        elif opcode in [0x56, 0x76]: self._im(1)
-        elif opcode in [0x5E, 0x7E]: self._im(2)
-        
-        elif opcode == 0x4D: self._reti()
-        elif opcode in [0x45, 0x55, 0x5D, 0x65, 0x6D, 0x75, 0x7D]: self._retn()
-        
+        for opcode in [0x46, 0x4E, 0x66, 0x6E]:
+            table[opcode] = (lambda: self._im(0))
+        for opcode in [0x56, 0x76]:
+            table[opcode] = (lambda: self._im(1))
+        for opcode in [0x5E, 0x7E]:
+            table[opcode] = (lambda: self._im(2))
+
+        table[0x4D] = self._reti
+        for opcode in [0x45, 0x55, 0x5D, 0x65, 0x6D, 0x75, 0x7D]:
+            table[opcode] = self._retn
+
         # Digit Rotates
         # Rotace číslic
-        elif opcode == 0x6F: self._rld()
-        elif opcode == 0x67: self._rrd()
-        
-        # Extended I/O
+        table[0x6F] = self._rld
+        table[0x67] = self._rrd
+
+        # Extended I/O - IN r, (C) / OUT (C), r
         # Rozšířené V/V
-        elif opcode == 0x40: self._in_r_c('b')
-        elif opcode == 0x48: self._in_r_c('c')
-        elif opcode == 0x50: self._in_r_c('d')
-        elif opcode == 0x58: self._in_r_c('e')
-        elif opcode == 0x60: self._in_r_c('h')
-        elif opcode == 0x68: self._in_r_c('l')
-        elif opcode == 0x78: self._in_r_c('a')
-        elif opcode == 0x70: self._in_r_c('f') # Reads to flags/dummy? Documentation says '0' or flags. Usually reads to F or dummy.
-        
-        elif opcode == 0x41: self._out_c_r('b')
-        elif opcode == 0x49: self._out_c_r('c')
-        elif opcode == 0x51: self._out_c_r('d')
-        elif opcode == 0x59: self._out_c_r('e')
-        elif opcode == 0x61: self._out_c_r('h')
-        elif opcode == 0x69: self._out_c_r('l')
-        elif opcode == 0x79: self._out_c_r('a')
-        elif opcode == 0x71: self._out_c_r('0')
-        
+        # 0x70 reads into flags only, 0x71 outputs 0
+        # 0x70 čte pouze do příznaků, 0x71 vysílá 0
+        io_regs = ['b', 'c', 'd', 'e', 'h', 'l', 'f', 'a']
+        for i, r in enumerate(io_regs):
+            table[0x40 + (i << 3)] = (lambda r=r: self._in_r_c(r))
+            table[0x41 + (i << 3)] = (lambda r=('0' if r == 'f' else r): self._out_c_r(r))
+
         # Block I/O
         # Blokové V/V
-        elif opcode == 0xA2: self._ini()
-        elif opcode == 0xB2: self._inir()
-        elif opcode == 0xAA: self._ind()
-        elif opcode == 0xBA: self._indr()
-        
-        elif opcode == 0xA3: self._outi()
-        elif opcode == 0xB3: self._otir()
-        elif opcode == 0xAB: self._outd()
-        elif opcode == 0xBB: self._otdr()
-        
-        else:
-            print(f"Unimplemented ED opcode: {hex(opcode)}")
+        table[0xA2] = self._ini
+        table[0xB2] = self._inir
+        table[0xAA] = self._ind
+        table[0xBA] = self._indr
+
+        table[0xA3] = self._outi
+        table[0xB3] = self._otir
+        table[0xAB] = self._outd
+        table[0xBB] = self._otdr
+
+        return table
 
     # --- Block Transfer Helpers ---
     
@@ -1031,20 +1154,90 @@ class Z80:
             return
 
         # Trap check for fast loading
-        if self.pc == 0x0556: # LD-BYTES address
+        if self.pc in self.trap_addresses:
             if self.check_traps():
                 return
                 
-        self._flags_updated = False
         opcode = self._fetch_opcode()
         self.opcodes[opcode]()
-        
+
         # After instruction execution, update internal Q register for flag logic
-        if self._flags_updated:
-            self.q = self._f
-        else:
+        # (prefixed instructions are handled by their own dispatcher)
+        q_kind = Q_MAIN_TABLE[opcode]
+        if q_kind == Q_LATCH:
+            self.q = self.f
+        elif q_kind == Q_CLEAR:
             self.q = 0
 
+    def run_until(self, target_cycles):
+        """
+        Execute instructions until the cycle counter reaches target_cycles.
+        Behaves exactly like calling step() in a loop, but skips the method
+        call per instruction and keeps the dispatch table, memory reader,
+        contention lookup and the cycle counter in locals. The handlers
+        update self.cycles, self.pc and self.r themselves, so the counter
+        is written back right before dispatch (and before a trap check) and
+        read back afterwards; pc and r are read and written once per fetch.
+        Provádí instrukce, dokud čítač taktů nedosáhne target_cycles.
+        Chová se přesně jako volání step() ve smyčce; tabulka obsluh, čtení
+        paměti, kolize a čítač taktů jsou v lokálních proměnných. Obsluhy
+        mění self.cycles samy, proto se čítač zapisuje před voláním obsluhy
+        a po něm se znovu načte.
+        """
+        opcodes = self.opcodes
+        read_byte = self.memory.read_byte
+        traps = self.trap_addresses
+        ula = self.ula
+        get_contention = ula.get_contention if ula else None
+
+        cycles = self.cycles
+        while cycles < target_cycles:
+            if self.halted:
+                # HALT executes internal NOPs (4 T-states each) until the next
+                # interrupt; jump straight to the end instead of looping.
+                # HALT provádí interní NOPy (4 takty) až do přerušení;
+                # místo smyčky skočíme rovnou na konec.
+                self.cycles = cycles + (((target_cycles - cycles + 3) >> 2) << 2)
+                return
+
+            pc = self.pc
+            if pc in traps:
+                self.cycles = cycles
+                if self.check_traps():
+                    cycles = self.cycles
+                    continue
+
+            # M1 cycle (same as _fetch_opcode)
+            # Cyklus M1 (stejné jako _fetch_opcode)
+            if get_contention is not None:
+                cycles += get_contention(cycles, pc)
+            opcode = read_byte(pc)
+            self.pc = (pc + 1) & 0xFFFF
+            r = self.r
+            self.r = (r & 0x80) | ((r + 1) & 0x7F)
+            self.cycles = cycles + 4
+
+            opcodes[opcode]()
+            cycles = self.cycles
+
+            q_kind = Q_MAIN_TABLE[opcode]
+            if q_kind == Q_LATCH:
+                self.q = self.f
+            elif q_kind == Q_CLEAR:
+                self.q = 0
+
+    def run_frame(self, frame_cycles=None):
+        """
+        Execute one video frame worth of T-states and raise the frame interrupt.
+        Provede takty jednoho snímku a vyvolá přerušení snímku.
+
+        :param frame_cycles: T-states per frame, defaults to the ULA frame length.
+        """
+        if frame_cycles is None:
+            frame_cycles = self.ula.CYCLES_PER_FRAME if self.ula else 69888
+        self.run_until(self.cycles + frame_cycles)
+        self.interrupt()
+
     def check_traps(self):
         """
         Check and execute ROM traps.
@@ -1116,69 +1309,74 @@ class Z80:
     def _prefix_cb(self):
         """
         Handle bit manipulation and rotate instructions with CB prefix.
+        Dispatches through the prebuilt 256-entry CB table.
         Obsluha instrukcí pro manipulaci s bity a rotace s předponou CB.
+        Provádí se přes předpřipravenou 256položkovou tabulku CB.
         """
         opcode = self._fetch_opcode()
-        
-        # Decode instruction
-        # Dekódování instrukce
-        # x = (opcode >> 6) & 3
-        # y = (opcode >> 3) & 7
-        # z = opcode & 7
-        
-        x = (opcode >> 6) & 3
-        y = (opcode >> 3) & 7
-        z = opcode & 7
-        
-        # Get operand
-        # Získání operandu
-        val = 0
-        if z == 0: val = self.b
-        elif z == 1: val = self.c
-        elif z == 2: val = self.d
-        elif z == 3: val = self.e
-        elif z == 4: val = self.h
-        elif z == 5: val = self.l
-        elif z == 6: val = self.read_byte(self.hl)
-        elif z == 7: val = self.a
-        
-        res = val
-        
-        # Execute operation
-        # Provedení operace
-        if x == 0: # Rotate/Shift
-            if y == 0: res = self._rlc(val)
-            elif y == 1: res = self._rrc(val)
-            elif y == 2: res = self._rl(val)
-            elif y == 3: res = self._rr(val)
-            elif y == 4: res = self._sla(val)
-            elif y == 5: res = self._sra(val)
-            elif y == 6: 
-                # SLL (undocumented) - functionally typically SLA or set bit 0
-                # Z80 docs say SLL shifts left and sets bit 0.
-                res = self._sll(val)
-            elif y == 7: res = self._srl(val)
-        elif x == 1: # BIT
-            if z == 6: # (HL)
-                self._bit(y, val, bits53_val=(self.wz >> 8) & 0xFF)
+        self.opcodes_cb[opcode]()
+        self.q = self.f if Q_CB_TABLE[opcode] else 0
+
+    def _build_cb_table(self):
+        """
+        Build the dispatch table for CB-prefixed instructions.
+        The x/y/z bit fields are decoded here once instead of on every execution.
+        Sestaví tabulku obsluh pro instrukce s předponou CB.
+        Bitová pole x/y/z se dekódují jen jednou zde, ne při každém provedení.
+        """
+        # Opcode layout: x = bits 7-6, y = bits 5-3, z = bits 2-0
+        # Rozložení opkódu: x = bity 7-6, y = bity 5-3, z = bity 2-0
+        regs = ['b', 'c', 'd', 'e', 'h', 'l', 'hl_indir', 'a']
+        shifts = [self._rlc, self._rrc, self._rl, self._rr,
+                  self._sla, self._sra, self._sll, self._srl]
+
+        def make_shift(op, r):
+            if r == 'hl_indir':
+                def handler():
+                    hl = self.hl
+                    self.write_byte(hl, op(self.read_byte(hl)))
             else:
-                self._bit(y, val)
-            return # BIT doesn't write back
-        elif x == 2: # RES
-            res = self._res(y, val)
-        elif x == 3: # SET
-            res = self._set(y, val)
-            
-        # Write back result
-        # Zápis výsledku zpět
-        if z == 0: self.b = res
-        elif z == 1: self.c = res
-        elif z == 2: self.d = res
-        elif z == 3: self.e = res
-        elif z == 4: self.h = res
-        elif z == 5: self.l = res
-        elif z == 6: self.write_byte(self.hl, res)
-        elif z == 7: self.a = res
+                def handler():
+                    setattr(self, r, op(getattr(self, r)))
+            return handler
+
+        def make_bit(bit, r):
+            if r == 'hl_indir':
+                # BIT b, (HL) takes undocumented bits 5 and 3 from WZ high byte
+                # BIT b, (HL) bere nedokumentované bity 5 a 3 z horního bajtu WZ
+                def handler():
+                    self._bit(bit, self.read_byte(self.hl), bits53_val=(self.wz >> 8) & 0xFF)
+            else:
+                def handler():
+                    self._bit(bit, getattr(self, r))
+            return handler
+
+        def make_modify(op, bit, r):
+            # RES / SET write the modified value back; flags are untouched
+            # RES / SET zapíší upravenou hodnotu zpět; příznaky se nemění
+            if r == 'hl_indir':
+                def handler():
+                    hl = self.hl
+                    self.write_byte(hl, op(bit, self.read_byte(hl)))
+            else:
+                def handler():
+                    setattr(self, r, op(bit, getattr(self, r)))
+            return handler
+
+        table = [None] * 256
+        for opcode in range(256):
+            x = (opcode >> 6) & 3
+            y = (opcode >> 3) & 7
+            r = regs[opcode & 7]
+            if x == 0:
+                table[opcode] = make_shift(shifts[y], r)
+            elif x == 1:
+                table[opcode] = make_bit(y, r)
+            elif x == 2:
+                table[opcode] = make_modify(self._res, y, r)
+            else:
+                table[opcode] = make_modify(self._set, y, r)
+        return table
 
     # --- Bit Manipulation Helpers ---
 
@@ -1354,15 +1552,6 @@ class Z80:
         self.iff1 = 1
         self.iff2 = 1
 
-    def _ld_r_n(self, r):
-        val = self.read_byte(self.pc)
-        self.pc = (self.pc + 1) & 0xFFFF
-        setattr(self, r, val)
-
-    def _ld_r_r(self, dest, src):
-        val = getattr(self, src)
-        setattr(self, dest, val)
-
     # --- ALU Helpers ---
 
     def _update_flags_add(self, op1, op2, res, carry_in):
@@ -1439,30 +1628,6 @@ class Z80:
         # N, C are 0
         self.f = f
 
-    # --- ALU Register/Value Engine ---
-    
-    def _alu_op(self, op_index, reg_name, is_val=False):
-        """
-        Generic ALU operation for registers (including (HL)).
-        op_index: 0=ADD, 1=ADC, 2=SUB, 3=SBC, 4=AND, 5=XOR, 6=OR, 7=CP
-        """
-        val = 0
-        if is_val:
-            val = reg_name # reg_name is actually the value
-        elif reg_name == 'hl_indir':
-            val = self.read_byte(self.hl)
-        else:
-            val = getattr(self, reg_name)
-        
-        if op_index == 0: self._add_val(val, False)   # ADD A, r
-        elif op_index == 1: self._add_val(val, True)  # ADC A, r
-        elif op_index == 2: self._sub_val(val, False) # SUB r
-        elif op_index == 3: self._sub_val(val, True)  # SBC A, r
-        elif op_index == 4: self._and_val(val)        # AND r
-        elif op_index == 5: self._xor_val(val)        # XOR r
-        elif op_index == 6: self._or_val(val)         # OR r
-        elif op_index == 7: self._cp_val(val)         # CP r
-
     def _ld_nn_indir_dd(self, dd):
         """
         LD (nn), dd (dd=BC, DE, HL, SP, IX, IY)
@@ -2093,170 +2258,206 @@ class Z80:
         self.wz = (val_target + 1) & 0xFFFF
 
     def _prefix_dd(self):
-        self._prefix_idx('ix')
+        """
+        Handle DD (IX) prefix instructions.
+        Obsluha instrukcí s předponou DD (IX).
+        """
+        opcode = self._fetch_opcode()
+        self.opcodes_dd[opcode]()
+        q_kind = Q_INDEX_TABLE[opcode]
+        if q_kind == Q_LATCH:
+            self.q = self.f
+        elif q_kind == Q_CLEAR:
+            self.q = 0
 
     def _prefix_fd(self):
-        self._prefix_idx('iy')
-
-    def _prefix_idx(self, idx_reg):
         """
-        Handle DD/FD prefix instructions.
-        Obsluha instrukcí s předponou DD/FD.
+        Handle FD (IY) prefix instructions.
+        Obsluha instrukcí s předponou FD (IY).
         """
         opcode = self._fetch_opcode()
-        
+        self.opcodes_fd[opcode]()
+        q_kind = Q_INDEX_TABLE[opcode]
+        if q_kind == Q_LATCH:
+            self.q = self.f
+        elif q_kind == Q_CLEAR:
+            self.q = 0
+
+    def _build_index_table(self, idx_reg):
+        """
+        Build the dispatch table for DD (IX) or FD (IY) prefixed instructions.
+        Opcodes without an index form fall through to the unprefixed handler.
+        Sestaví tabulku obsluh pro instrukce s předponou DD (IX) nebo FD (IY).
+        Opkódy bez indexové varianty propadají na obsluhu bez předpony.
+        """
+        idx_h = idx_reg + 'h'
+        idx_l = idx_reg + 'l'
+
+        # Fallback to standard opcode if not specifically handled for index registers.
+        # Výchozí je standardní opkód, pokud není obsloužen pro indexové registry.
+        table = list(self.opcodes)
+
         # 16-bit Load: LD IX/IY, nn (0x21), LD (nn), IX/IY (0x22), LD IX/IY, (nn) (0x2A)
-        if opcode == 0x21: self._ld_dd_nn(idx_reg)
-        elif opcode == 0x22: self._ld_nn_indir_dd(idx_reg)
-        elif opcode == 0x2A: self._ld_dd_indir_nn(idx_reg)
-        elif opcode == 0xF9: self.sp = getattr(self, idx_reg) # LD SP, IX/IY
-        
+        table[0x21] = (lambda: self._ld_dd_nn(idx_reg))
+        table[0x22] = (lambda: self._ld_nn_indir_dd(idx_reg))
+        table[0x2A] = (lambda: self._ld_dd_indir_nn(idx_reg))
+
+        # LD SP, IX/IY (0xF9)
+        def ld_sp_idx():
+            self.sp = getattr(self, idx_reg)
+        table[0xF9] = ld_sp_idx
+
         # PUSH/POP IX/IY (0xE5/0xE1)
-        elif opcode == 0xE5: self._push_qq(idx_reg)
-        elif opcode == 0xE1: self._pop_qq(idx_reg)
-        
+        table[0xE5] = (lambda: self._push_qq(idx_reg))
+        table[0xE1] = (lambda: self._pop_qq(idx_reg))
+
         # 16-bit Arithmetic: ADD IX/IY, ss (09, 19, 29, 39)
-        elif opcode == 0x09: self._add_16(idx_reg, 'bc')
-        elif opcode == 0x19: self._add_16(idx_reg, 'de')
-        elif opcode == 0x29: self._add_16(idx_reg, idx_reg)
-        elif opcode == 0x39: self._add_16(idx_reg, 'sp')
-        
+        for i, ss in enumerate(['bc', 'de', idx_reg, 'sp']):
+            table[0x09 + (i << 4)] = (lambda ss=ss: self._add_16(idx_reg, ss))
+
         # INC/DEC IX/IY (0x23/0x2B)
-        elif opcode == 0x23: self._inc_ss(idx_reg)
-        elif opcode == 0x2B: self._dec_ss(idx_reg)
-        
+        table[0x23] = (lambda: self._inc_ss(idx_reg))
+        table[0x2B] = (lambda: self._dec_ss(idx_reg))
+
         # EX (SP), IX/IY (0xE3)
-        elif opcode == 0xE3:
+        def ex_sp_idx():
             val_sp = self._read_word_sp()
-            old_idx = getattr(self, idx_reg)
-            self._write_word_sp(old_idx)
+            self._write_word_sp(getattr(self, idx_reg))
             setattr(self, idx_reg, val_sp)
             self.wz = val_sp
-        
+        table[0xE3] = ex_sp_idx
+
         # JP (IX/IY) (0xE9)
-        elif opcode == 0xE9: self.pc = getattr(self, idx_reg)
-        
+        def jp_idx():
+            self.pc = getattr(self, idx_reg)
+        table[0xE9] = jp_idx
+
         # Bit Instructions (DDCB / FDCB)
-        elif opcode == 0xCB: self._prefix_idx_cb(idx_reg)
-        
+        table[0xCB] = self._prefix_ddcb if idx_reg == 'ix' else self._prefix_fdcb
+
         # --- Displacement Instructions (IX+d) ---
         # If opcode uses (HL), it now uses (IX+d)
-        elif opcode in [0x34, 0x35, 0x36, 0x46, 0x4E, 0x56, 0x5E, 0x66, 0x6E, 0x7E, 
-                        0x70, 0x71, 0x72, 0x73, 0x74, 0x75, 0x77, 
-                        0x86, 0x8E, 0x96, 0x9E, 0xA6, 0xAE, 0xB6, 0xBE]:
-            
+        # Pokud opkód používá (HL), nyní používá (IX+d)
+        def inc_idx_d():
             addr = self._get_effective_addr(idx_reg)
-            
-            if opcode == 0x34: # INC (IX+d)
-                val = self.read_byte(addr)
-                res = (val + 1) & 0xFF
-                c_flag = self.f & 0x01
-                self._update_flags_add(val, 1, res, 0)
-                self.f = (self.f & 0xFE) | c_flag
-                self.write_byte(addr, res)
-            elif opcode == 0x35: # DEC (IX+d)
-                val = self.read_byte(addr)
-                res = (val - 1) & 0xFF
-                c_flag = self.f & 0x01
-                self._update_flags_sub(val, 1, res, 0)
-                self.f = (self.f & 0xFE) | c_flag
-                self.write_byte(addr, res)
-            elif opcode == 0x36: # LD (IX+d), n
-                val = self._read_byte_pc()
-                self.write_byte(addr, val)
-            elif opcode == 0x46: self.b = self.read_byte(addr)
-            elif opcode == 0x4E: self.c = self.read_byte(addr)
-            elif opcode == 0x56: self.d = self.read_byte(addr)
-            elif opcode == 0x5E: self.e = self.read_byte(addr)
-            elif opcode == 0x66: self.h = self.read_byte(addr)
-            elif opcode == 0x6E: self.l = self.read_byte(addr)
-            elif opcode == 0x7E: self.a = self.read_byte(addr)
-            elif opcode == 0x70: self.write_byte(addr, self.b)
-            elif opcode == 0x71: self.write_byte(addr, self.c)
-            elif opcode == 0x72: self.write_byte(addr, self.d)
-            elif opcode == 0x73: self.write_byte(addr, self.e)
-            elif opcode == 0x74: self.write_byte(addr, self.h)
-            elif opcode == 0x75: self.write_byte(addr, self.l)
-            elif opcode == 0x77: self.write_byte(addr, self.a)
-            elif opcode == 0x86: self._add_val(self.read_byte(addr), False)
-            elif opcode == 0x8E: self._add_val(self.read_byte(addr), True)
-            elif opcode == 0x96: self._sub_val(self.read_byte(addr), False)
-            elif opcode == 0x9E: self._sub_val(self.read_byte(addr), True)
-            elif opcode == 0xA6: self._and_val(self.read_byte(addr))
-            elif opcode == 0xAE: self._xor_val(self.read_byte(addr))
-            elif opcode == 0xB6: self._or_val(self.read_byte(addr))
-            elif opcode == 0xBE: self._cp_val(self.read_byte(addr))
+            val = self.read_byte(addr)
+            res = (val + 1) & 0xFF
+            c_flag = self.f & 0x01
+            self._update_flags_add(val, 1, res, 0)
+            self.f = (self.f & 0xFE) | c_flag
+            self.write_byte(addr, res)
+        table[0x34] = inc_idx_d
+
+        def dec_idx_d():
+            addr = self._get_effective_addr(idx_reg)
+            val = self.read_byte(addr)
+            res = (val - 1) & 0xFF
+            c_flag = self.f & 0x01
+            self._update_flags_sub(val, 1, res, 0)
+            self.f = (self.f & 0xFE) | c_flag
+            self.write_byte(addr, res)
+        table[0x35] = dec_idx_d
+
+        def ld_idx_d_n():
+            # Displacement comes before the immediate operand
+            # Posun předchází přímému operandu
+            addr = self._get_effective_addr(idx_reg)
+            self.write_byte(addr, self._read_byte_pc())
+        table[0x36] = ld_idx_d_n
+
+        regs = ['b', 'c', 'd', 'e', 'h', 'l', None, 'a']
+
+        def make_ld_r_idx_d(r):
+            def handler():
+                setattr(self, r, self.read_byte(self._get_effective_addr(idx_reg)))
+            return handler
+
+        def make_ld_idx_d_r(r):
+            def handler():
+                addr = self._get_effective_addr(idx_reg)
+                self.write_byte(addr, getattr(self, r))
+            return handler
+
+        for i, r in enumerate(regs):
+            if r is None:
+                continue
+            # LD r, (IX+d) - H and L keep their meaning here
+            # LD r, (IX+d) - H a L si zde zachovávají svůj význam
+            table[0x46 + (i << 3)] = make_ld_r_idx_d(r)
+            # LD (IX+d), r
+            table[0x70 + i] = make_ld_idx_d_r(r)
+
+        alu_ops = [
+            lambda v: self._add_val(v, False),  # ADD A, (IX+d)
+            lambda v: self._add_val(v, True),   # ADC A, (IX+d)
+            lambda v: self._sub_val(v, False),  # SUB (IX+d)
+            lambda v: self._sub_val(v, True),   # SBC A, (IX+d)
+            self._and_val,                      # AND (IX+d)
+            self._xor_val,                      # XOR (IX+d)
+            self._or_val,                       # OR (IX+d)
+            self._cp_val,                       # CP (IX+d)
+        ]
+
+        def make_alu_idx_d(op):
+            def handler():
+                op(self.read_byte(self._get_effective_addr(idx_reg)))
+            return handler
+
+        def make_alu_idx_r(op, r):
+            def handler():
+                op(getattr(self, r))
+            return handler
+
+        for i, op in enumerate(alu_ops):
+            table[0x86 + (i << 3)] = make_alu_idx_d(op)
+            # ALU A, IXH/IXL
+            table[0x84 + (i << 3)] = make_alu_idx_r(op, idx_h)
+            table[0x85 + (i << 3)] = make_alu_idx_r(op, idx_l)
 
         # --- IXH/IXL Instructions ---
         # If opcode uses H or L, it now uses IXH or IXL (or IYH/IYL)
         # Note: These don't have a displacement byte.
-        else:
-            idx_h = idx_reg + 'h'
-            idx_l = idx_reg + 'l'
-            
-            # LD idx_h, r
-            if 0x60 <= opcode <= 0x67: # LD IXH, B,C,D,E,IXH,IXL,(IX+d),A
-                if opcode == 0x66: # LD IXH, (IX+d) - actually this opcode is LD H, (IX+d)
-                    # Wait, 0x66 with DD is LD H, (IX+d). 
-                    # Actually, the rule is: if the instruction uses (HL), 
-                    # then H and L are NOT replaced.
-                    # 0x66 is LD H, (HL). So DD 66 d is LD H, (IX+d).
-                    # My displacement logic already handles 0x66.
-                    pass
-                else:
-                    src_regs = ['b', 'c', 'd', 'e', idx_h, idx_l, None, 'a']
-                    setattr(self, idx_h, getattr(self, src_regs[opcode - 0x60]))
-            
-            # LD idx_l, r
-            elif 0x68 <= opcode <= 0x6F: # LD IXL, B,C,D,E,IXH,IXL,(IX+d),A
-                if opcode == 0x6E: # LD L, (IX+d)
-                    pass
-                else:
-                    src_regs = ['b', 'c', 'd', 'e', idx_h, idx_l, None, 'a']
-                    setattr(self, idx_l, getattr(self, src_regs[opcode - 0x68]))
-            
-            # LD r, idx_h
-            elif opcode in [0x44, 0x4C, 0x54, 0x5C, 0x64, 0x6C, 0x7C]:
-                dest_regs = {0x44: 'b', 0x4C: 'c', 0x54: 'd', 0x5C: 'e', 0x64: idx_h, 0x6C: 'l', 0x7C: 'a'}
-                setattr(self, dest_regs[opcode], getattr(self, idx_h))
-            
-            # LD r, idx_l
-            elif opcode in [0x45, 0x4D, 0x55, 0x5D, 0x65, 0x6D, 0x7D]:
-                dest_regs = {0x45: 'b', 0x4D: 'c', 0x55: 'd', 0x5D: 'e', 0x65: idx_h, 0x6D: idx_l, 0x7D: 'a'}
-                setattr(self, dest_regs[opcode], getattr(self, idx_l))
-
-            # INC/DEC IXH/L
-            elif opcode == 0x24: self._inc_r(idx_h)
-            elif opcode == 0x25: self._dec_r(idx_h)
-            elif opcode == 0x26: setattr(self, idx_h, self._read_byte_pc())
-            elif opcode == 0x2C: self._inc_r(idx_l)
-            elif opcode == 0x2D: self._dec_r(idx_l)
-            elif opcode == 0x2E: setattr(self, idx_l, self._read_byte_pc())
-            
-            # ALU A, idx_h/l
-            elif opcode == 0x84: self._add_val(getattr(self, idx_h), False)
-            elif opcode == 0x85: self._add_val(getattr(self, idx_l), False)
-            elif opcode == 0x8C: self._add_val(getattr(self, idx_h), True)
-            elif opcode == 0x8D: self._add_val(getattr(self, idx_l), True)
-            elif opcode == 0x94: self._sub_val(getattr(self, idx_h), False)
-            elif opcode == 0x95: self._sub_val(getattr(self, idx_l), False)
-            elif opcode == 0x9C: self._sub_val(getattr(self, idx_h), True)
-            elif opcode == 0x9D: self._sub_val(getattr(self, idx_l), True)
-            elif opcode == 0xA4: self._and_val(getattr(self, idx_h))
-            elif opcode == 0xA5: self._and_val(getattr(self, idx_l))
-            elif opcode == 0xAC: self._xor_val(getattr(self, idx_h))
-            elif opcode == 0xAD: self._xor_val(getattr(self, idx_l))
-            elif opcode == 0xB4: self._or_val(getattr(self, idx_h))
-            elif opcode == 0xB5: self._or_val(getattr(self, idx_l))
-            elif opcode == 0xBC: self._cp_val(getattr(self, idx_h))
-            elif opcode == 0xBD: self._cp_val(getattr(self, idx_l))
-
-            else:
-                 # Fallback to standard opcode if not specifically handled for index registers.
-                 if self.opcodes[opcode] != self._unimplemented_opcode:
-                     self.opcodes[opcode]()
-                 else:
-                     print(f"Unimplemented Index ({idx_reg}) opcode: {hex(opcode)}")
+        # Pokud opkód používá H nebo L, nyní používá IXH nebo IXL (nebo IYH/IYL)
+        def make_ld(dest, src):
+            def handler():
+                setattr(self, dest, getattr(self, src))
+            return handler
+
+        idx_regs = ['b', 'c', 'd', 'e', idx_h, idx_l, None, 'a']
+        for i, src in enumerate(idx_regs):
+            if src is None:
+                continue
+            # LD IXH, r / LD IXL, r (0x60-0x6F except the (IX+d) forms)
+            table[0x60 + i] = make_ld(idx_h, src)
+            table[0x68 + i] = make_ld(idx_l, src)
+
+        for i, dest in enumerate(['b', 'c', 'd', 'e']):
+            # LD r, IXH / LD r, IXL
+            table[0x44 + (i << 3)] = make_ld(dest, idx_h)
+            table[0x45 + (i << 3)] = make_ld(dest, idx_l)
+        table[0x7C] = make_ld('a', idx_h)
+        table[0x7D] = make_ld('a', idx_l)
+
+        # INC/DEC/LD n on IXH/IXL
+        def make_ld_n(r):
+            def handler():
+                setattr(self, r, self._read_byte_pc())
+            return handler
+
+        table[0x24] = (lambda: self._inc_r(idx_h))
+        table[0x25] = (lambda: self._dec_r(idx_h))
+        table[0x26] = make_ld_n(idx_h)
+        table[0x2C] = (lambda: self._inc_r(idx_l))
+        table[0x2D] = (lambda: self._dec_r(idx_l))
+        table[0x2E] = make_ld_n(idx_l)
+
+        return table
+
+    def _prefix_ddcb(self):
+        self._prefix_idx_cb('ix')
+
+    def _prefix_fdcb(self):
+        self._prefix_idx_cb('iy')
 
     def _prefix_idx_cb(self, idx_reg):
         """
@@ -2269,55 +2470,67 @@ class Z80:
         # Posun d přichází PŘED operačním kódem u DDCB/FDCB!
         d = self._read_byte_pc()
         if d & 0x80: d -= 256
-        
+
         sub_opcode = self._fetch_opcode()
-        
-        reg_val = getattr(self, idx_reg)
-        addr = (reg_val + d) & 0xFFFF
-        
-        self._cb_memory_op(sub_opcode, addr)
 
-    def _cb_memory_op(self, opcode, addr):
+        if idx_reg == 'ix':
+            addr = (self.ix + d) & 0xFFFF
+            self.opcodes_ddcb[sub_opcode](addr)
+        else:
+            addr = (self.iy + d) & 0xFFFF
+            self.opcodes_fdcb[sub_opcode](addr)
+        self.q = self.f if Q_CB_TABLE[sub_opcode] else 0
+
+    def _build_index_cb_table(self):
         """
-        Execute CB-style bit operation on memory address.
+        Build the dispatch table for DDCB/FDCB instructions.
+        Every handler takes the already computed effective address (IX/IY + d).
+        Sestaví tabulku obsluh pro instrukce DDCB/FDCB.
+        Každá obsluha dostane již spočítanou efektivní adresu (IX/IY + d).
         """
-        # Decoding similar to _prefix_cb
         # RLC, RRC, RL, RR, SLA, SRA, SLL, SRL (00-3F)
         # BIT b, (HL) (40-7F)
         # RES b, (HL) (80-BF)
         # SET b, (HL) (C0-FF)
-        
-        val = self.read_byte(addr)
-        
-        # Rotates and Shifts (00-3F)
-        if 0x00 <= opcode <= 0x3F:
-            if opcode & 0xF8 == 0x00: val = self._rlc_val(val) # RLC
-            elif opcode & 0xF8 == 0x08: val = self._rrc_val(val) # RRC
-            elif opcode & 0xF8 == 0x10: val = self._rl_val(val)  # RL
-            elif opcode & 0xF8 == 0x18: val = self._rr_val(val)  # RR
-            elif opcode & 0xF8 == 0x20: val = self._sla_val(val) # SLA
-            elif opcode & 0xF8 == 0x28: val = self._sra_val(val) # SRA
-            elif opcode & 0xF8 == 0x30: val = self._sll_val(val) # SLL (Undocumented)
-            elif opcode & 0xF8 == 0x38: val = self._srl_val(val) # SRL
-            
-            self.write_byte(addr, val)
-            
-        # BIT b, (HL) (40-7F)
-        elif 0x40 <= opcode <= 0x7F:
-            bit = (opcode >> 3) & 0x07
-            self._bit(bit, val, bits53_val=(addr >> 8) & 0xFF)
-            
-        # RES b, (HL) (80-BF)
-        elif 0x80 <= opcode <= 0xBF:
-            bit = (opcode >> 3) & 0x07
-            val &= ~(1 << bit)
-            self.write_byte(addr, val)
-            
-        # SET b, (HL) (C0-FF)
-        elif 0xC0 <= opcode <= 0xFF:
-            bit = (opcode >> 3) & 0x07
-            val |= (1 << bit)
-            self.write_byte(addr, val)
+        shifts = [self._rlc_val, self._rrc_val, self._rl_val, self._rr_val,
+                  self._sla_val, self._sra_val, self._sll_val, self._srl_val]
+
+        def make_shift(op):
+            def handler(addr):
+                self.write_byte(addr, op(self.read_byte(addr)))
+            return handler
+
+        def make_bit(bit):
+            def handler(addr):
+                # Bits 5 and 3 come from the high byte of the effective address
+                # Bity 5 a 3 pocházejí z horního bajtu efektivní adresy
+                self._bit(bit, self.read_byte(addr), bits53_val=(addr >> 8) & 0xFF)
+            return handler
+
+        def make_res(bit):
+            mask = ~(1 << bit)
+            def handler(addr):
+                self.write_byte(addr, self.read_byte(addr) & mask)
+            return handler
+
+        def make_set(bit):
+            mask = 1 << bit
+            def handler(addr):
+                self.write_byte(addr, self.read_byte(addr) | mask)
+            return handler
+
+        table = [None] * 256
+        for opcode in range(256):
+            y = (opcode >> 3) & 7
+            if opcode < 0x40:
+                table[opcode] = make_shift(shifts[y])
+            elif opcode < 0x80:
+                table[opcode] = make_bit(y)
+            elif opcode < 0xC0:
+                table[opcode] = make_res(y)
+            else:
+                table[opcode] = make_set(y)
+        return table
 
     # --- Reusable ALU Helpers for Values ---
     # We need to extract logic from existing _rlc_r, etc. or just implement value versions.
@@ -0,0 +1,1286 @@
+import numpy as np
+
+from src.cpu import (Z80, SZ53_TABLE, SZ53P_TABLE, INC_FLAGS_TABLE, DEC_FLAGS_TABLE,
+                     Q_MAIN_TABLE, Q_CB_TABLE, Q_ED_TABLE, Q_LATCH, Q_CLEAR)
+
+# --- Optional Numba Backend ---
+# Volitelný backend Numba
+# The compiled core mirrors the pure-Python Z80 instruction by instruction
+# (flags, WZ, Q, R and T-state accounting included). Without Numba the same
+# functions still run, only as ordinary (slow) Python.
+# Kompilované jádro kopíruje čistě pythonový Z80 instrukci po instrukci
+# (včetně příznaků, WZ, Q, R a počítání taktů). Bez Numby se stejné funkce
+# provedou jako běžný (pomalý) Python.
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# The core never allocates, so it is compiled without the Numba runtime:
+# otherwise every helper call increfs/decrefs each array argument.
+# Jádro nic nealokuje, proto se překládá bez běhového prostředí Numby:
+# jinak by každé volání pomocné funkce měnilo počty referencí polí.
+_jit = njit(cache=True, nogil=True, _nrt=False)
+
+# --- State Vector Layout ---
+# Rozložení stavového vektoru
+# 8-bit registers use the r field encoding of the opcodes (6 = F), so
+# st[z] addresses the operand register of LD/ALU/CB instructions directly.
+# 8bitové registry používají kódování pole r z opkódů (6 = F).
+B, C, D, E, H, L, F, A = range(8)
+ALT = 8 # B' ... A' are stored at ALT + r
+IX = 16
+IY = 17
+PC = 18
+SP = 19
+I = 20
+R = 21
+WZ = 22
+Q = 23
+IFF1 = 24
+IFF2 = 25
+IM = 26
+HALTED = 27
+CYCLES = 28
+# I/O instruction interrupted at its bus access (0 = none, 0x100 | op for ED)
+# V/V instrukce přerušená v okamžiku přístupu na sběrnici
+PENDING = 29
+IO_PORT = 30
+IO_VALUE = 31
+SKIP_TRAP = 32 # Trap at PC already handled by Python, execute the instruction
+# Machine configuration / Konfigurace stroje
+HAS_ULA = 33
+CONTENDED = 34 # 4 entries, one per 16K slot
+ROM_WRITABLE = 38
+STATE_SIZE = 39
+
+# Exit codes of the compiled loop
+# Návratové kódy kompilované smyčky
+EXIT_DONE = 0
+EXIT_IO_IN = 1
+EXIT_IO_OUT = 2
+EXIT_TRAP = 3
+
+_FOREVER = 1 << 62
+
+_SZ53 = np.frombuffer(SZ53_TABLE, dtype=np.uint8)
+_SZ53P = np.frombuffer(SZ53P_TABLE, dtype=np.uint8)
+_INC_FLAGS = np.frombuffer(INC_FLAGS_TABLE, dtype=np.uint8)
+_DEC_FLAGS = np.frombuffer(DEC_FLAGS_TABLE, dtype=np.uint8)
+_Q_MAIN = np.frombuffer(Q_MAIN_TABLE, dtype=np.uint8)
+_Q_CB = np.frombuffer(Q_CB_TABLE, dtype=np.uint8)
+_Q_ED = np.frombuffer(Q_ED_TABLE, dtype=np.uint8)
+# Flag tested by cc = NZ/Z, NC/C, PO/PE, P/M
+_COND_MASK = np.array([0x40, 0x01, 0x04, 0x80], dtype=np.int64)
+
+
+# --- Bus Access ---
+# Přístup na sběrnici
+# mem is a tuple of four 16K pages (zero-copy views of the Memory buffers),
+# cont holds the ULA delay per frame T-state: row 0 memory, row 1 I/O.
+# mem je čtveřice 16K stránek (pohledy bez kopírování), cont obsahuje
+# zpoždění ULA pro každý takt snímku: řádek 0 paměť, řádek 1 V/V.
+
+@_jit
+def _contend(st, cont, addr):
+    if st[CONTENDED + (addr >> 14)]:
+        st[CYCLES] += cont[0, st[CYCLES] % cont.shape[1]]
+
+@_jit
+def _io_contend(st, cont, port):
+    if st[HAS_ULA] and ((port & 0x0001) == 0 or st[CONTENDED + (port >> 14)]):
+        st[CYCLES] += cont[1, st[CYCLES] % cont.shape[1]]
+
+@_jit
+def _read(st, mem, cont, addr):
+    _contend(st, cont, addr)
+    st[CYCLES] += 3
+    return np.int64(mem[addr >> 14][addr & 0x3FFF])
+
+@_jit
+def _write(st, mem, cont, addr, val):
+    _contend(st, cont, addr)
+    st[CYCLES] += 3
+    if addr >= 0x4000 or st[ROM_WRITABLE]:
+        mem[addr >> 14][addr & 0x3FFF] = val
+
+@_jit
+def _fetch(st, mem, cont):
+    """M1 cycle: contention, opcode read, PC and R increment, 4 T-states."""
+    pc = st[PC]
+    _contend(st, cont, pc)
+    op = np.int64(mem[pc >> 14][pc & 0x3FFF])
+    st[PC] = (pc + 1) & 0xFFFF
+    r = st[R]
+    st[R] = (r & 0x80) | ((r + 1) & 0x7F)
+    st[CYCLES] += 4
+    return op
+
+@_jit
+def _read_pc(st, mem, cont):
+    pc = st[PC]
+    val = _read(st, mem, cont, pc)
+    st[PC] = (pc + 1) & 0xFFFF
+    return val
+
+@_jit
+def _read_pc_signed(st, mem, cont):
+    val = _read_pc(st, mem, cont)
+    if val & 0x80:
+        val -= 256
+    return val
+
+@_jit
+def _read_word_pc(st, mem, cont):
+    low = _read_pc(st, mem, cont)
+    high = _read_pc(st, mem, cont)
+    return (high << 8) | low
+
+@_jit
+def _push(st, mem, cont, val):
+    sp = (st[SP] - 1) & 0xFFFF
+    _write(st, mem, cont, sp, val >> 8)
+    sp = (sp - 1) & 0xFFFF
+    _write(st, mem, cont, sp, val & 0xFF)
+    st[SP] = sp
+
+@_jit
+def _pop(st, mem, cont):
+    sp = st[SP]
+    low = _read(st, mem, cont, sp)
+    sp = (sp + 1) & 0xFFFF
+    high = _read(st, mem, cont, sp)
+    st[SP] = (sp + 1) & 0xFFFF
+    return (high << 8) | low
+
+@_jit
+def _ex_sp(st, mem, cont, val):
+    """EX (SP), rr: returns the word read from the stack."""
+    sp = st[SP]
+    low = _read(st, mem, cont, sp)
+    high = _read(st, mem, cont, (sp + 1) & 0xFFFF)
+    _write(st, mem, cont, sp, val & 0xFF)
+    _write(st, mem, cont, (sp + 1) & 0xFFFF, val >> 8)
+    return (high << 8) | low
+
+
+# --- Register Helpers ---
+# Pomocné funkce registrů
+
+@_jit
+def _get_pair(st, p):
+    """BC, DE, HL, SP for p = 0..3"""
+    if p == 3:
+        return st[SP]
+    return (st[p << 1] << 8) | st[(p << 1) + 1]
+
+@_jit
+def _set_pair(st, p, val):
+    if p == 3:
+        st[SP] = val
+    else:
+        st[p << 1] = val >> 8
+        st[(p << 1) + 1] = val & 0xFF
+
+@_jit
+def _get_r(st, mem, cont, r):
+    """Register r of the opcode, 6 is (HL)."""
+    if r == 6:
+        return _read(st, mem, cont, (st[H] << 8) | st[L])
+    return st[r]
+
+@_jit
+def _set_r(st, mem, cont, r, val):
+    if r == 6:
+        _write(st, mem, cont, (st[H] << 8) | st[L], val)
+    else:
+        st[r] = val
+
+@_jit
+def _get_r_idx(st, idx, r):
+    """Register r with H/L replaced by the index register halves."""
+    if r == 4:
+        return st[idx] >> 8
+    if r == 5:
+        return st[idx] & 0xFF
+    return st[r]
+
+@_jit
+def _set_r_idx(st, idx, r, val):
+    if r == 4:
+        st[idx] = (st[idx] & 0x00FF) | (val << 8)
+    elif r == 5:
+        st[idx] = (st[idx] & 0xFF00) | val
+    else:
+        st[r] = val
+
+@_jit
+def _cond(f, y):
+    """Condition cc (NZ, Z, NC, C, PO, PE, P, M) for y = 0..7"""
+    return ((f & _COND_MASK[y >> 1]) != 0) == ((y & 1) == 1)
+
+@_jit
+def _effective_addr(st, mem, cont, idx):
+    """Read displacement d, return IX/IY + d and store it in WZ."""
+    d = _read_pc_signed(st, mem, cont)
+    addr = (st[idx] + d) & 0xFFFF
+    st[WZ] = addr
+    return addr
+
+
+# --- ALU ---
+
+@_jit
+def _alu(st, y, val):
+    """ADD, ADC, SUB, SBC, AND, XOR, OR, CP A, val (same formulas as _ALU_TEMPLATES)"""
+    a = st[A]
+    if y == 0:
+        res = a + val
+        st[A] = res & 0xFF
+        st[F] = _SZ53[res & 0xFF] | ((a ^ val ^ res) & 0x10) | (((a ^ res) & (val ^ res) & 0x80) >> 5) | (res >> 8)
+    elif y == 1:
+        res = a + val + (st[F] & 0x01)
+        st[A] = res & 0xFF
+        st[F] = _SZ53[res & 0xFF] | ((a ^ val ^ res) & 0x10) | (((a ^ res) & (val ^ res) & 0x80) >> 5) | (res >> 8)
+    elif y == 2:
+        res = a - val
+        st[A] = res & 0xFF
+        st[F] = _SZ53[res & 0xFF] | ((a ^ val ^ res) & 0x10) | (((a ^ val) & (a ^ res) & 0x80) >> 5) | 0x02 | ((res >> 8) & 0x01)
+    elif y == 3:
+        res = a - val - (st[F] & 0x01)
+        st[A] = res & 0xFF
+        st[F] = _SZ53[res & 0xFF] | ((a ^ val ^ res) & 0x10) | (((a ^ val) & (a ^ res) & 0x80) >> 5) | 0x02 | ((res >> 8) & 0x01)
+    elif y == 4:
+        res = a & val
+        st[A] = res
+        st[F] = _SZ53P[res] | 0x10
+    elif y == 5:
+        res = a ^ val
+        st[A] = res
+        st[F] = _SZ53P[res]
+    elif y == 6:
+        res = a | val
+        st[A] = res
+        st[F] = _SZ53P[res]
+    else:
+        res = a - val
+        st[F] = (_SZ53[res & 0xFF] & 0xC0) | (val & 0x28) | ((a ^ val ^ res) & 0x10) | (((a ^ val) & (a ^ res) & 0x80) >> 5) | 0x02 | ((res >> 8) & 0x01)
+
+@_jit
+def _inc8(st, val):
+    res = (val + 1) & 0xFF
+    st[F] = (st[F] & 0x01) | _INC_FLAGS[res]
+    return res
+
+@_jit
+def _dec8(st, val):
+    res = (val - 1) & 0xFF
+    st[F] = (st[F] & 0x01) | _DEC_FLAGS[res]
+    return res
+
+@_jit
+def _add16(st, target, source):
+    """ADD HL/IX/IY, ss: returns the result, WZ = target + 1"""
+    res = target + source
+    f = st[F] & 0xC4
+    if res > 0xFFFF:
+        f |= 0x01
+    if ((target & 0x0FFF) + (source & 0x0FFF)) > 0x0FFF:
+        f |= 0x10
+    res &= 0xFFFF
+    st[F] = f | ((res >> 8) & 0x28)
+    st[WZ] = (target + 1) & 0xFFFF
+    return res
+
+@_jit
+def _rotate(st, y, val):
+    """RLC, RRC, RL, RR, SLA, SRA, SLL, SRL; returns (result, carry)"""
+    if y == 0:
+        c = val >> 7
+        res = ((val << 1) | c) & 0xFF
+    elif y == 1:
+        c = val & 0x01
+        res = (val >> 1) | (c << 7)
+    elif y == 2:
+        c = val >> 7
+        res = ((val << 1) | (st[F] & 0x01)) & 0xFF
+    elif y == 3:
+        c = val & 0x01
+        res = (val >> 1) | ((st[F] & 0x01) << 7)
+    elif y == 4:
+        c = val >> 7
+        res = (val << 1) & 0xFF
+    elif y == 5:
+        c = val & 0x01
+        res = (val >> 1) | (val & 0x80)
+    elif y == 6:
+        c = val >> 7
+        res = ((val << 1) | 0x01) & 0xFF
+    else:
+        c = val & 0x01
+        res = val >> 1
+    return res, c
+
+@_jit
+def _bit(st, y, val, bits53):
+    f = (st[F] & 0x01) | 0x10 | (bits53 & 0x28)
+    if ((val >> y) & 1) == 0:
+        f |= 0x44 # Z and P/V
+    elif y == 7:
+        f |= 0x80
+    st[F] = f
+
+@_jit
+def _daa(st):
+    a = st[A]
+    f = st[F]
+    correction = 0
+    carry = f & 0x01
+    half_carry = f & 0x10
+    n = f & 0x02
+    if half_carry or (a & 0x0F) > 9:
+        correction |= 0x06
+    if carry or a > 0x99:
+        correction |= 0x60
+        carry = 1
+    else:
+        carry = 0
+    if n:
+        new_h = 0x10 if (half_carry and (a & 0x0F) < 6) else 0
+        a = (a - correction) & 0xFF
+    else:
+        new_h = 0x10 if (a & 0x0F) > 9 else 0
+        a = (a + correction) & 0xFF
+    st[A] = a
+    st[F] = _SZ53P[a] | new_h | n | carry
+
+@_jit
+def _block_io_flags(st, val, modifier, b_old):
+    """INI/IND/OUTI/OUTD flags (same as Z80._update_block_io_flags)"""
+    b = st[B]
+    f = (b & 0x80) | (b & 0x28)
+    if b == 0:
+        f |= 0x40
+    if val & 0x80:
+        f |= 0x02
+    temp = (val + modifier) & 0x1FF
+    if temp > 255:
+        f |= 0x11
+    h_int = 1 if (val & 0x0F) + (modifier & 0x0F) > 0x0F else 0
+    f |= _SZ53P[(temp & 0x07) ^ b_old ^ h_int] & 0x04
+    st[F] = f
+
+@_jit
+def _repeat(st, mask):
+    """Repeat a block instruction: PC back to its start, 21 T-states."""
+    st[PC] = (st[PC] - 2) & 0xFFFF
+    st[F] = (st[F] & mask) | ((st[PC] >> 8) & 0x28)
+    st[CYCLES] += 21
+
+@_jit
+def _set_q(st, kind):
+    if kind == Q_LATCH:
+        st[Q] = st[F]
+    elif kind == Q_CLEAR:
+        st[Q] = 0
+
+
+# --- Instruction Execution ---
+# Provádění instrukcí
+# Each executor returns EXIT_DONE, or EXIT_IO_IN / EXIT_IO_OUT when the
+# instruction stopped at its port access; _finish_io() completes it later.
+# Každá funkce vrací EXIT_DONE, nebo EXIT_IO_IN / EXIT_IO_OUT, pokud se
+# instrukce zastavila na přístupu k portu; dokončí ji _finish_io().
+
+@_jit
+def _start_io(st, cont, pending, port, value):
+    _io_contend(st, cont, port)
+    st[CYCLES] += 4
+    st[PENDING] = pending
+    st[IO_PORT] = port
+    st[IO_VALUE] = value
+
+@_jit
+def _exec_main(st, mem, cont, op):
+    """Unprefixed instruction (opcode already fetched, prefixes excluded)."""
+    x = op >> 6
+    y = (op >> 3) & 7
+    z = op & 7
+
+    if x == 1:
+        # LD r, r' / HALT
+        if op == 0x76:
+            st[HALTED] = 1
+        else:
+            _set_r(st, mem, cont, y, _get_r(st, mem, cont, z))
+        return EXIT_DONE
+
+    if x == 2:
+        # ALU A, r
+        _alu(st, y, _get_r(st, mem, cont, z))
+        return EXIT_DONE
+
+    if x == 0:
+        if z == 0:
+            if y == 1:
+                # EX AF, AF'
+                st[A], st[ALT + A] = st[ALT + A], st[A]
+                st[F], st[ALT + F] = st[ALT + F], st[F]
+            elif y == 2:
+                # DJNZ e
+                offset = _read_pc_signed(st, mem, cont)
+                st[B] = (st[B] - 1) & 0xFF
+                if st[B] != 0:
+                    target = (st[PC] + offset) & 0xFFFF
+                    st[PC] = target
+                    st[WZ] = target
+                    st[CYCLES] += 13
+                else:
+                    st[CYCLES] += 8
+            elif y >= 3:
+                # JR e / JR cc, e
+                offset = _read_pc_signed(st, mem, cont)
+                if y == 3 or _cond(st[F], y - 4):
+                    target = (st[PC] + offset) & 0xFFFF
+                    st[PC] = target
+                    st[WZ] = target
+        elif z == 1:
+            if y & 1:
+                # ADD HL, ss
+                hl = _add16(st, _get_pair(st, 2), _get_pair(st, y >> 1))
+                _set_pair(st, 2, hl)
+            else:
+                # LD dd, nn
+                _set_pair(st, y >> 1, _read_word_pc(st, mem, cont))
+        elif z == 2:
+            if y == 0 or y == 2:
+                # LD (BC), A / LD (DE), A
+                addr = _get_pair(st, y >> 1)
+                _write(st, mem, cont, addr, st[A])
+                st[WZ] = (st[A] << 8) | ((addr + 1) & 0xFF)
+            elif y == 1 or y == 3:
+                # LD A, (BC) / LD A, (DE)
+                addr = _get_pair(st, y >> 1)
+                st[A] = _read(st, mem, cont, addr)
+                st[WZ] = (addr + 1) & 0xFFFF
+            elif y == 4:
+                # LD (nn), HL
+                addr = _read_word_pc(st, mem, cont)
+                _write(st, mem, cont, addr, st[L])
+                _write(st, mem, cont, (addr + 1) & 0xFFFF, st[H])
+                st[WZ] = (addr + 1) & 0xFFFF
+            elif y == 5:
+                # LD HL, (nn)
+                addr = _read_word_pc(st, mem, cont)
+                st[L] = _read(st, mem, cont, addr)
+                st[H] = _read(st, mem, cont, (addr + 1) & 0xFFFF)
+                st[WZ] = (addr + 1) & 0xFFFF
+            elif y == 6:
+                # LD (nn), A
+                addr = _read_word_pc(st, mem, cont)
+                _write(st, mem, cont, addr, st[A])
+                st[WZ] = (st[A] << 8) | ((addr + 1) & 0xFF)
+            else:
+                # LD A, (nn)
+                addr = _read_word_pc(st, mem, cont)
+                st[A] = _read(st, mem, cont, addr)
+                st[WZ] = (addr + 1) & 0xFFFF
+        elif z == 3:
+            # INC ss / DEC ss
+            step = -1 if y & 1 else 1
+            _set_pair(st, y >> 1, (_get_pair(st, y >> 1) + step) & 0xFFFF)
+        elif z == 4:
+            # INC r
+            if y == 6:
+                hl = (st[H] << 8) | st[L]
+                _write(st, mem, cont, hl, _inc8(st, _read(st, mem, cont, hl)))
+            else:
+                st[y] = _inc8(st, st[y])
+        elif z == 5:
+            # DEC r
+            if y == 6:
+                hl = (st[H] << 8) | st[L]
+                _write(st, mem, cont, hl, _dec8(st, _read(st, mem, cont, hl)))
+            else:
+                st[y] = _dec8(st, st[y])
+        elif z == 6:
+            # LD r, n
+            _set_r(st, mem, cont, y, _read_pc(st, mem, cont))
+        else:
+            a = st[A]
+            f = st[F]
+            if y == 0:
+                # RLCA
+                c = a >> 7
+                a = ((a << 1) | c) & 0xFF
+                st[F] = (f & 0xC4) | (a & 0x28) | c
+                st[A] = a
+            elif y == 1:
+                # RRCA
+                c = a & 0x01
+                a = (a >> 1) | (c << 7)
+                st[F] = (f & 0xC4) | (a & 0x28) | c
+                st[A] = a
+            elif y == 2:
+                # RLA
+                c = a >> 7
+                a = ((a << 1) | (f & 0x01)) & 0xFF
+                st[F] = (f & 0xC4) | (a & 0x28) | c
+                st[A] = a
+            elif y == 3:
+                # RRA
+                c = a & 0x01
+                a = (a >> 1) | ((f & 0x01) << 7)
+                st[F] = (f & 0xC4) | (a & 0x28) | c
+                st[A] = a
+            elif y == 4:
+                _daa(st)
+            elif y == 5:
+                # CPL
+                a = (~a) & 0xFF
+                st[A] = a
+                st[F] = ((f | 0x12) & 0xD7) | (a & 0x28)
+            elif y == 6:
+                # SCF
+                st[F] = (f & 0xC4) | (((st[Q] ^ f) | a) & 0x28) | 0x01
+            else:
+                # CCF
+                c = f & 0x01
+                st[F] = (f & 0xC4) | (((st[Q] ^ f) | a) & 0x28) | (c << 4) | (1 - c)
+        return EXIT_DONE
+
+    # x == 3
+    if z == 0:
+        # RET cc
+        if _cond(st[F], y):
+            addr = _pop(st, mem, cont)
+            st[PC] = addr
+            st[WZ] = addr
+    elif z == 1:
+        if (y & 1) == 0:
+            # POP qq
+            val = _pop(st, mem, cont)
+            if y == 6:
+                st[A] = val >> 8
+                st[F] = val & 0xFF
+            else:
+                _set_pair(st, y >> 1, val)
+        elif y == 1:
+            # RET
+            addr = _pop(st, mem, cont)
+            st[PC] = addr
+            st[WZ] = addr
+        elif y == 3:
+            # EXX
+            for r in range(6):
+                st[r], st[ALT + r] = st[ALT + r], st[r]
+        elif y == 5:
+            # JP (HL)
+            st[PC] = _get_pair(st, 2)
+        else:
+            # LD SP, HL
+            st[SP] = _get_pair(st, 2)
+    elif z == 2:
+        # JP cc, nn (WZ is loaded either way)
+        addr = _read_word_pc(st, mem, cont)
+        if _cond(st[F], y):
+            st[PC] = addr
+        st[WZ] = addr
+    elif z == 3:
+        if y == 0:
+            # JP nn
+            addr = _read_word_pc(st, mem, cont)
+            st[PC] = addr
+            st[WZ] = addr
+        elif y == 2:
+            # OUT (n), A
+            port = (st[A] << 8) | _read_pc(st, mem, cont)
+            _start_io(st, cont, op, port, st[A])
+            return EXIT_IO_OUT
+        elif y == 3:
+            # IN A, (n)
+            port = (st[A] << 8) | _read_pc(st, mem, cont)
+            _start_io(st, cont, op, port, 0)
+            return EXIT_IO_IN
+        elif y == 4:
+            # EX (SP), HL
+            hl = _ex_sp(st, mem, cont, _get_pair(st, 2))
+            _set_pair(st, 2, hl)
+            st[WZ] = hl
+        elif y == 5:
+            # EX DE, HL
+            st[D], st[H] = st[H], st[D]
+            st[E], st[L] = st[L], st[E]
+        elif y == 6:
+            # DI
+            st[IFF1] = 0
+            st[IFF2] = 0
+        else:
+            # EI
+            st[IFF1] = 1
+            st[IFF2] = 1
+    elif z == 4:
+        # CALL cc, nn
+        addr = _read_word_pc(st, mem, cont)
+        if _cond(st[F], y):
+            _push(st, mem, cont, st[PC])
+            st[PC] = addr
+        st[WZ] = addr
+    elif z == 5:
+        if (y & 1) == 0:
+            # PUSH qq
+            if y == 6:
+                _push(st, mem, cont, (st[A] << 8) | st[F])
+            else:
+                _push(st, mem, cont, _get_pair(st, y >> 1))
+        else:
+            # CALL nn (0xDD, 0xED and 0xFD are dispatched by _execute_op)
+            addr = _read_word_pc(st, mem, cont)
+            _push(st, mem, cont, st[PC])
+            st[PC] = addr
+            st[WZ] = addr
+    elif z == 6:
+        # ALU A, n
+        _alu(st, y, _read_pc(st, mem, cont))
+    else:
+        # RST
+        _push(st, mem, cont, st[PC])
+        st[PC] = y << 3
+        st[WZ] = y << 3
+    return EXIT_DONE
+
+@_jit
+def _exec_cb(st, mem, cont):
+    """CB prefix: rotates/shifts, BIT, RES, SET."""
+    op = _fetch(st, mem, cont)
+    x = op >> 6
+    y = (op >> 3) & 7
+    z = op & 7
+    if z == 6:
+        hl = (st[H] << 8) | st[L]
+        val = _read(st, mem, cont, hl)
+        if x == 0:
+            res, c = _rotate(st, y, val)
+            st[F] = _SZ53P[res] | c
+            _write(st, mem, cont, hl, res)
+        elif x == 1:
+            # BIT b, (HL) takes bits 5 and 3 from WZ high byte
+            _bit(st, y, val, st[WZ] >> 8)
+        elif x == 2:
+            _write(st, mem, cont, hl, val & ~(1 << y))
+        else:
+            _write(st, mem, cont, hl, val | (1 << y))
+    else:
+        val = st[z]
+        if x == 0:
+            res, c = _rotate(st, y, val)
+            st[F] = _SZ53P[res] | c
+            st[z] = res
+        elif x == 1:
+            _bit(st, y, val, val)
+        elif x == 2:
+            st[z] = val & ~(1 << y)
+        else:
+            st[z] = val | (1 << y)
+    _set_q(st, _Q_CB[op])
+
+@_jit
+def _exec_index_cb(st, mem, cont, idx):
+    """DD CB d op / FD CB d op: always operate on (IX/IY + d)."""
+    d = _read_pc_signed(st, mem, cont)
+    op = _fetch(st, mem, cont)
+    addr = (st[idx] + d) & 0xFFFF
+    x = op >> 6
+    y = (op >> 3) & 7
+    val = _read(st, mem, cont, addr)
+    if x == 0:
+        # Flags without bits 5 and 3 (same as Z80._update_flags_rot)
+        res, c = _rotate(st, y, val)
+        st[F] = (_SZ53P[res] & 0xC4) | c
+        _write(st, mem, cont, addr, res)
+    elif x == 1:
+        _bit(st, y, val, addr >> 8)
+    elif x == 2:
+        _write(st, mem, cont, addr, val & ~(1 << y))
+    else:
+        _write(st, mem, cont, addr, val | (1 << y))
+    _set_q(st, _Q_CB[op])
+
+@_jit
+def _exec_index(st, mem, cont, idx):
+    """
+    DD/FD prefix. Returns (status, opcode); opcodes without an index form
+    are handed back (opcode >= 0) to run as unprefixed instructions.
+    """
+    op = _fetch(st, mem, cont)
+    while op == 0xDD or op == 0xFD:
+        idx = IX if op == 0xDD else IY
+        op = _fetch(st, mem, cont)
+    if op == 0xED:
+        return _exec_ed(st, mem, cont), -1
+    if op == 0xCB:
+        _exec_index_cb(st, mem, cont, idx)
+        return EXIT_DONE, -1
+
+    x = op >> 6
+    y = (op >> 3) & 7
+    z = op & 7
+    handled = True
+    if x == 1:
+        if op == 0x76:
+            st[HALTED] = 1
+        elif z == 6:
+            # LD r, (IX+d) - H and L keep their meaning
+            st[y] = _read(st, mem, cont, _effective_addr(st, mem, cont, idx))
+        elif y == 6:
+            # LD (IX+d), r
+            addr = _effective_addr(st, mem, cont, idx)
+            _write(st, mem, cont, addr, st[z])
+        elif y == 4 or y == 5 or z == 4 or z == 5:
+            # LD with IXH/IXL
+            _set_r_idx(st, idx, y, _get_r_idx(st, idx, z))
+        else:
+            handled = False
+    elif x == 2:
+        if z == 6:
+            _alu(st, y, _read(st, mem, cont, _effective_addr(st, mem, cont, idx)))
+        elif z == 4 or z == 5:
+            _alu(st, y, _get_r_idx(st, idx, z))
+        else:
+            handled = False
+    elif x == 0:
+        if z == 1 and (y & 1):
+            # ADD IX, ss (ss = BC, DE, IX, SP)
+            p = y >> 1
+            source = st[idx] if p == 2 else _get_pair(st, p)
+            st[idx] = _add16(st, st[idx], source)
+        elif op == 0x21:
+            st[idx] = _read_word_pc(st, mem, cont)
+        elif op == 0x22:
+            addr = _read_word_pc(st, mem, cont)
+            _write(st, mem, cont, addr, st[idx] & 0xFF)
+            _write(st, mem, cont, (addr + 1) & 0xFFFF, st[idx] >> 8)
+            st[WZ] = (addr + 1) & 0xFFFF
+        elif op == 0x2A:
+            addr = _read_word_pc(st, mem, cont)
+            low = _read(st, mem, cont, addr)
+            high = _read(st, mem, cont, (addr + 1) & 0xFFFF)
+            st[idx] = (high << 8) | low
+            st[WZ] = (addr + 1) & 0xFFFF
+        elif op == 0x23:
+            st[idx] = (st[idx] + 1) & 0xFFFF
+        elif op == 0x2B:
+            st[idx] = (st[idx] - 1) & 0xFFFF
+        elif y == 4 or y == 5:
+            if z == 4:
+                _set_r_idx(st, idx, y, _inc8(st, _get_r_idx(st, idx, y)))
+            elif z == 5:
+                _set_r_idx(st, idx, y, _dec8(st, _get_r_idx(st, idx, y)))
+            elif z == 6:
+                _set_r_idx(st, idx, y, _read_pc(st, mem, cont))
+            else:
+                handled = False
+        elif y == 6 and z >= 4 and z <= 6:
+            addr = _effective_addr(st, mem, cont, idx)
+            if z == 4:
+                _write(st, mem, cont, addr, _inc8(st, _read(st, mem, cont, addr)))
+            elif z == 5:
+                _write(st, mem, cont, addr, _dec8(st, _read(st, mem, cont, addr)))
+            else:
+                # Displacement comes before the immediate operand
+                _write(st, mem, cont, addr, _read_pc(st, mem, cont))
+        else:
+            handled = False
+    else:
+        if op == 0xE1:
+            st[idx] = _pop(st, mem, cont)
+        elif op == 0xE5:
+            _push(st, mem, cont, st[idx])
+        elif op == 0xE3:
+            val = _ex_sp(st, mem, cont, st[idx])
+            st[idx] = val
+            st[WZ] = val
+        elif op == 0xE9:
+            st[PC] = st[idx]
+        elif op == 0xF9:
+            st[SP] = st[idx]
+        else:
+            handled = False
+
+    if not handled:
+        return EXIT_DONE, op
+    # Every DD/FD form writes F exactly when its unprefixed counterpart does
+    _set_q(st, _Q_MAIN[op])
+    return EXIT_DONE, -1
+
+@_jit
+def _exec_ed(st, mem, cont):
+    """ED prefix. Unassigned opcodes act as NOP."""
+    op = _fetch(st, mem, cont)
+    y = (op >> 3) & 7
+    z = op & 7
+
+    if 0x40 <= op < 0x80:
+        if z == 0:
+            # IN r, (C)
+            _start_io(st, cont, 0x100 | op, _get_pair(st, 0), 0)
+            return EXIT_IO_IN
+        elif z == 1:
+            # OUT (C), r - 0x71 outputs 0
+            val = 0 if y == 6 else st[y]
+            _start_io(st, cont, 0x100 | op, _get_pair(st, 0), val)
+            return EXIT_IO_OUT
+        elif z == 2:
+            hl = _get_pair(st, 2)
+            val = _get_pair(st, y >> 1)
+            carry = st[F] & 0x01
+            if y & 1:
+                # ADC HL, ss
+                res_full = hl + val + carry
+                res = res_full & 0xFFFF
+                f = ((res >> 8) & 0xA8) | (0x40 if res == 0 else 0)
+                if ((hl & 0x0FFF) + (val & 0x0FFF) + carry) > 0x0FFF:
+                    f |= 0x10
+                if ((hl ^ val) & 0x8000) == 0 and ((res ^ hl) & 0x8000) != 0:
+                    f |= 0x04
+                if res_full > 0xFFFF:
+                    f |= 0x01
+            else:
+                # SBC HL, ss
+                res_full = hl - val - carry
+                res = res_full & 0xFFFF
+                f = ((res >> 8) & 0xA8) | (0x40 if res == 0 else 0) | 0x02
+                if ((hl & 0x0FFF) - (val & 0x0FFF) - carry) < 0:
+                    f |= 0x10
+                if ((hl ^ val) & 0x8000) != 0 and ((res ^ hl) & 0x8000) != 0:
+                    f |= 0x04
+                if res_full < 0:
+                    f |= 0x01
+            st[F] = f
+            _set_pair(st, 2, res)
+            st[WZ] = (hl + 1) & 0xFFFF
+        elif z == 3:
+            addr = _read_word_pc(st, mem, cont)
+            if y & 1:
+                # LD dd, (nn)
+                low = _read(st, mem, cont, addr)
+                high = _read(st, mem, cont, (addr + 1) & 0xFFFF)
+                _set_pair(st, y >> 1, (high << 8) | low)
+            else:
+                # LD (nn), dd
+                val = _get_pair(st, y >> 1)
+                _write(st, mem, cont, addr, val & 0xFF)
+                _write(st, mem, cont, (addr + 1) & 0xFFFF, val >> 8)
+            st[WZ] = (addr + 1) & 0xFFFF
+        elif z == 4:
+            # NEG
+            val = st[A]
+            res = (-val) & 0xFF
+            f = _SZ53[res] | 0x02
+            if val & 0x0F:
+                f |= 0x10
+            if val == 0x80:
+                f |= 0x04
+            if val != 0:
+                f |= 0x01
+            st[A] = res
+            st[F] = f
+        elif z == 5:
+            # RETN / RETI
+            st[IFF1] = st[IFF2]
+            addr = _pop(st, mem, cont)
+            st[PC] = addr
+            st[WZ] = addr
+        elif z == 6:
+            # IM 0 / 1 / 2
+            if y == 2 or y == 6:
+                st[IM] = 1
+            elif y == 3 or y == 7:
+                st[IM] = 2
+            else:
+                st[IM] = 0
+        else:
+            if y == 0:
+                st[I] = st[A] # LD I, A
+            elif y == 1:
+                st[R] = st[A] # LD R, A
+            elif y == 2 or y == 3:
+                # LD A, I / LD A, R
+                a = st[I] if y == 2 else st[R]
+                st[A] = a
+                st[F] = (st[F] & 0x01) | _SZ53[a] | (0x04 if st[IFF2] else 0)
+            elif y == 4 or y == 5:
+                # RRD / RLD
+                hl = _get_pair(st, 2)
+                val = _read(st, mem, cont, hl)
+                a = st[A]
+                if y == 4:
+                    _write(st, mem, cont, hl, ((a & 0x0F) << 4) | (val >> 4))
+                    a = (a & 0xF0) | (val & 0x0F)
+                else:
+                    _write(st, mem, cont, hl, ((val & 0x0F) << 4) | (a & 0x0F))
+                    a = (a & 0xF0) | (val >> 4)
+                st[A] = a
+                st[F] = (st[F] & 0x01) | _SZ53P[a]
+                st[WZ] = (hl + 1) & 0xFFFF
+    elif op >= 0xA0 and op < 0xC0 and z < 4 and y >= 4:
+        # Block instructions: y = 4 (I), 5 (D), 6 (IR), 7 (DR)
+        step = -1 if y & 1 else 1
+        repeat = y >= 6
+        if z == 0:
+            # LDI / LDD / LDIR / LDDR
+            hl = _get_pair(st, 2)
+            de = _get_pair(st, 1)
+            val = _read(st, mem, cont, hl)
+            _write(st, mem, cont, de, val)
+            n = (st[A] + val) & 0xFF
+            _set_pair(st, 2, (hl + step) & 0xFFFF)
+            _set_pair(st, 1, (de + step) & 0xFFFF)
+            bc = (_get_pair(st, 0) - 1) & 0xFFFF
+            _set_pair(st, 0, bc)
+            f = st[F] & 0xC1
+            if bc != 0:
+                f |= 0x04
+            if n & 0x02:
+                f |= 0x20
+            st[F] = f | (n & 0x08)
+            if repeat:
+                if bc != 0:
+                    st[WZ] = (st[PC] - 1) & 0xFFFF
+                    _repeat(st, 0xD7)
+                else:
+                    st[CYCLES] += 16
+        elif z == 1:
+            # CPI / CPD / CPIR / CPDR
+            hl = _get_pair(st, 2)
+            val = _read(st, mem, cont, hl)
+            a = st[A]
+            res = (a - val) & 0xFF
+            half = (a & 0x0F) < (val & 0x0F)
+            n = (res - 1) & 0xFF if half else res
+            _set_pair(st, 2, (hl + step) & 0xFFFF)
+            bc = (_get_pair(st, 0) - 1) & 0xFFFF
+            _set_pair(st, 0, bc)
+            f = (st[F] & 0x01) | (_SZ53[res] & 0xC0) | 0x02
+            if half:
+                f |= 0x10
+            if bc != 0:
+                f |= 0x04
+            if n & 0x02:
+                f |= 0x20
+            st[F] = f | (n & 0x08)
+            st[WZ] = (st[WZ] + step) & 0xFFFF
+            if repeat:
+                if bc != 0 and not (f & 0x40):
+                    st[WZ] = (st[PC] - 1) & 0xFFFF
+                    _repeat(st, 0xD7)
+                else:
+                    st[CYCLES] += 16
+        elif z == 2:
+            # INI / IND / INIR / INDR - port uses B before the decrement
+            port = _get_pair(st, 0)
+            st[B] = (st[B] - 1) & 0xFF
+            _start_io(st, cont, 0x100 | op, port, 0)
+            return EXIT_IO_IN
+        else:
+            # OUTI / OUTD / OTIR / OTDR - port uses B after the decrement
+            st[B] = (st[B] - 1) & 0xFF
+            port = _get_pair(st, 0)
+            val = _read(st, mem, cont, _get_pair(st, 2))
+            _start_io(st, cont, 0x100 | op, port, val)
+            return EXIT_IO_OUT
+
+    _set_q(st, _Q_ED[op])
+    return EXIT_DONE
+
+@_jit
+def _execute_op(st, mem, cont, op):
+    """Execute a fetched opcode including its prefix and Q update."""
+    if op == 0xCB:
+        _exec_cb(st, mem, cont)
+        return EXIT_DONE
+    if op == 0xED:
+        return _exec_ed(st, mem, cont)
+    if op == 0xDD or op == 0xFD:
+        status, op = _exec_index(st, mem, cont, IX if op == 0xDD else IY)
+        if op < 0:
+            return status
+    status = _exec_main(st, mem, cont, op)
+    if status == EXIT_DONE:
+        _set_q(st, _Q_MAIN[op])
+    return status
+
+@_jit
+def _finish_io(st, mem, cont):
+    """Complete the instruction that stopped at its port access."""
+    pending = st[PENDING]
+    st[PENDING] = 0
+    op = pending & 0xFF
+    port = st[IO_PORT]
+    val = st[IO_VALUE]
+
+    if pending < 0x100:
+        if op == 0xDB:
+            # IN A, (n)
+            st[A] = val
+            st[WZ] = (port + 1) & 0xFFFF
+        else:
+            # OUT (n), A - 8-bit increment of n
+            st[WZ] = (port & 0xFF00) | ((port + 1) & 0xFF)
+        _set_q(st, _Q_MAIN[op])
+        return
+
+    y = (op >> 3) & 7
+    z = op & 7
+    if op < 0x80:
+        st[WZ] = (port + 1) & 0xFFFF
+        if z == 0:
+            # IN r, (C) - 0x70 only updates flags
+            if y != 6:
+                st[y] = val
+            st[F] = (st[F] & 0x01) | _SZ53P[val]
+    else:
+        step = -1 if y & 1 else 1
+        hl = _get_pair(st, 2)
+        if z == 2:
+            # INI / IND
+            _write(st, mem, cont, hl, val)
+            st[WZ] = (port + step) & 0xFFFF
+            _block_io_flags(st, val, (st[C] + step) & 0xFF, port >> 8)
+        else:
+            # OUTI / OUTD - modifier is L before the increment
+            st[WZ] = (port + step) & 0xFFFF
+            _block_io_flags(st, val, st[L], (st[B] + 1) & 0xFF)
+        _set_pair(st, 2, (hl + step) & 0xFFFF)
+        if y >= 6:
+            if st[B] != 0:
+                _repeat(st, 0xC7)
+                st[WZ] = (st[PC] + 1) & 0xFFFF
+            else:
+                st[CYCLES] += 16
+    _set_q(st, _Q_ED[op])
+
+@_jit
+def _run(st, mem, cont, traps, target_cycles, max_instructions):
+    """
+    Execute until target_cycles, max_instructions, a trap address or an
+    I/O access. Returns one of the EXIT_* codes.
+    Provádí instrukce do target_cycles, max_instructions, adresy pasti
+    nebo přístupu k V/V. Vrací jeden z kódů EXIT_*.
+    """
+    count = 0
+    if st[PENDING] != 0:
+        _finish_io(st, mem, cont)
+        count += 1
+
+    while count < max_instructions and st[CYCLES] < target_cycles:
+        if st[HALTED]:
+            # Same 4 T-state HALT fast-forward as Z80.run_until
+            st[CYCLES] += ((target_cycles - st[CYCLES] + 3) >> 2) << 2
+            return EXIT_DONE
+
+        if traps[st[PC]] and not st[SKIP_TRAP]:
+            return EXIT_TRAP
+        st[SKIP_TRAP] = 0
+
+        status = _execute_op(st, mem, cont, _fetch(st, mem, cont))
+        if status != EXIT_DONE:
+            return status
+        count += 1
+    return EXIT_DONE
+
+
+def _register_property(index, doc):
+    def getter(self):
+        return int(self.st[index])
+
+    def setter(self, value):
+        self.st[index] = value
+    return property(getter, setter, doc=doc)
+
+
+class JitZ80(Z80):
+    """
+    Z80 with a Numba-compiled execution loop.
+    Registers live in a NumPy state vector and memory is accessed through
+    zero-copy views of the Memory buffers; the compiled loop returns to
+    Python only for port accesses and ROM traps. Everything else (interrupts,
+    traps, debugger access) uses the inherited pure-Python code.
+    Z80 s kompilovanou smyčkou Numba. Registry jsou v poli NumPy a paměť se
+    čte přes pohledy na buffery Memory bez kopírování; do Pythonu se smyčka
+    vrací jen kvůli portům a ROM pastem.
+    """
+    __slots__ = ('st', '_memory', '_ula', '_contention', '_pages', '_page_key',
+                 '_views', '_trap_map', '_trap_key')
+
+    def __init__(self, memory, io_bus=None):
+        self.st = np.zeros(STATE_SIZE, dtype=np.int64)
+        self._page_key = None
+        self._trap_key = None
+        self._trap_map = np.zeros(0x10000, dtype=np.uint8)
+        super().__init__(memory, io_bus)
+
+    a = _register_property(A, 'Accumulator')
+    f = _register_property(F, 'Flags')
+    b = _register_property(B, 'B')
+    c = _register_property(C, 'C')
+    d = _register_property(D, 'D')
+    e = _register_property(E, 'E')
+    h = _register_property(H, 'H')
+    l = _register_property(L, 'L')
+    a_alt = _register_property(ALT + A, "A'")
+    f_alt = _register_property(ALT + F, "F'")
+    b_alt = _register_property(ALT + B, "B'")
+    c_alt = _register_property(ALT + C, "C'")
+    d_alt = _register_property(ALT + D, "D'")
+    e_alt = _register_property(ALT + E, "E'")
+    h_alt = _register_property(ALT + H, "H'")
+    l_alt = _register_property(ALT + L, "L'")
+    ix = _register_property(IX, 'IX')
+    iy = _register_property(IY, 'IY')
+    pc = _register_property(PC, 'Program counter')
+    sp = _register_property(SP, 'Stack pointer')
+    i = _register_property(I, 'Interrupt vector')
+    r = _register_property(R, 'Refresh register')
+    wz = _register_property(WZ, 'MEMPTR')
+    q = _register_property(Q, 'Q (last flag write)')
+    iff1 = _register_property(IFF1, 'IFF1')
+    iff2 = _register_property(IFF2, 'IFF2')
+    im = _register_property(IM, 'Interrupt mode')
+    cycles = _register_property(CYCLES, 'T-state counter')
+
+    @property
+    def halted(self):
+        return bool(self.st[HALTED])
+
+    @halted.setter
+    def halted(self, value):
+        self.st[HALTED] = 1 if value else 0
+
+    @property
+    def rom_writable(self):
+        """Let the compiled core write to 0x0000-0x3FFF (test harnesses with flat RAM)."""
+        return bool(self.st[ROM_WRITABLE])
+
+    @rom_writable.setter
+    def rom_writable(self, value):
+        self.st[ROM_WRITABLE] = 1 if value else 0
+
+    @property
+    def memory(self):
+        return self._memory
+
+    @memory.setter
+    def memory(self, memory):
+        self._memory = memory
+        # NumPy views of the page buffers, keyed by id (each view keeps its buffer alive)
+        # Pohledy NumPy na buffery stránek podle id (pohled drží buffer naživu)
+        self._views = {}
+        self._page_key = None
+
+    @property
+    def ula(self):
+        return self._ula
+
+    @ula.setter
+    def ula(self, ula):
+        """
+        Attach the ULA and copy its per-frame contention tables.
+        Připojí ULA a převezme její tabulky kolizí pro celý snímek.
+        """
+        self._ula = ula
+        self._page_key = None
+        if ula is None:
+            self.st[HAS_ULA] = 0
+            self._contention = np.zeros((2, 1), dtype=np.int64)
+            return
+
+        table = np.frombuffer(ula.contention_table, dtype=np.uint8)
+        io_table = np.frombuffer(ula.io_contention_table, dtype=np.uint8)
+        self._contention = np.vstack((table, io_table)).astype(np.int64)
+        self.st[HAS_ULA] = 1
+
+    def _map_pages(self):
+        """
+        Bind the Memory page table as zero-copy NumPy views.
+        Naváže tabulku stránek Memory jako pohledy NumPy bez kopírování.
+        """
+        memory = self._memory
+        pages = memory.pages
+        # Memory builds a new page table whenever paging changes
+        # Memory při změně stránkování sestaví novou tabulku
+        if pages is self._page_key:
+            return
+        views = self._views
+        mapped = []
+        for page in pages:
+            view = views.get(id(page))
+            if view is None:
+                view = views[id(page)] = np.frombuffer(page, dtype=np.uint8)
+            mapped.append(view)
+        self._pages = tuple(mapped)
+        self._page_key = pages
+
+        if self._ula is not None:
+            self.st[CONTENDED:CONTENDED + 4] = memory.contended_pages
+        else:
+            self.st[CONTENDED:CONTENDED + 4] = 0
+
+    def _map_traps(self):
+        traps = self.trap_addresses
+        if traps != self._trap_key:
+            self._trap_map[:] = 0
+            for addr in traps:
+                self._trap_map[addr & 0xFFFF] = 1
+            self._trap_key = frozenset(traps)
+
+    def _execute(self, target_cycles, max_instructions):
+        """
+        Run the compiled loop and service its exits.
+        Spustí kompilovanou smyčku a obslouží její výstupy.
+        """
+        st = self.st
+        self._map_traps()
+        self._map_pages()
+        while True:
+            status = _run(st, self._pages, self._contention, self._trap_map,
+                          target_cycles, max_instructions)
+            if status == EXIT_DONE:
+                return
+            if status == EXIT_TRAP:
+                if self.check_traps():
+                    if max_instructions == 1:
+                        return
+                else:
+                    st[SKIP_TRAP] = 1
+                # The trap may have paged memory or changed the trap set
+                self._map_pages()
+                self._map_traps()
+            elif status == EXIT_IO_IN:
+                port = int(st[IO_PORT])
+                st[IO_VALUE] = self.io_bus.read_byte(port, int(st[CYCLES])) if self.io_bus else 0xFF
+            else:
+                if self.io_bus:
+                    self.io_bus.write_byte(int(st[IO_PORT]), int(st[IO_VALUE]))
+                # Port 0x7FFD may have switched banks
+                # Port 0x7FFD mohl přepnout banky
+                self._map_pages()
+
+    def step(self):
+        if self.halted:
+            self.cycles += 4
+            return
+        self._execute(_FOREVER, 1)
+
+    def run_until(self, target_cycles):
+        """
+        Execute instructions until the cycle counter reaches target_cycles.
+        Provádí instrukce, dokud čítač taktů nedosáhne target_cycles.
+        """
+        self._execute(target_cycles, _FOREVER)
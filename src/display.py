@@ -0,0 +1,30 @@
+import numpy as np
+
+def scale_indexed(dest, indices, palette, rect, scale):
+    """
+    Copy one rectangle of the indexed frame into a window pixel array.
+    Each palette index is mapped to a surface colour and replicated
+    scale x scale times through strided views (no scaled surface is allocated).
+    Zkopíruje obdélník indexovaného snímku do pole pixelů okna. Každý index
+    palety se převede na barvu plochy a zopakuje scale x scale krát přes
+    krokované pohledy (bez alokace zvětšené plochy).
+
+    :param dest: Window pixels as returned by pygame.surfarray.pixels2d (indexed [x, y]).
+    :param indices: ULA indexed screen buffer (indexed [y, x]).
+    :param palette: Surface colour for each palette index (Surface.map_rgb).
+    :param rect: (x, y, w, h) in frame pixels.
+    :param scale: Integer scale factor.
+    """
+    x, y, w, h = rect
+    colors = palette[indices[y:y + h, x:x + w]].T
+    target = dest[x * scale:(x + w) * scale, y * scale:(y + h) * scale]
+    for dx in range(scale):
+        for dy in range(scale):
+            target[dx::scale, dy::scale] = colors
+
+def map_palette(surface, palette):
+    """
+    Convert the RGB palette to pixel values of the given surface.
+    Převede paletu RGB na hodnoty pixelů dané plochy.
+    """
+    return np.array([surface.map_rgb(color) for color in palette], dtype=np.uint32)
@@ -10,6 +10,14 @@ class Hardware128K:
         """
         self.memory = memory
         self.ay = AY38910(mixing_mode=mixing_mode)
+        self.cpu = None
+
+    def set_cpu(self, cpu):
+        """
+        Link CPU for timestamping AY writes.
+        Propojení CPU pro časové značky zápisů do AY.
+        """
+        self.cpu = cpu
 
     @property
     def ay_register(self):
@@ -51,4 +59,4 @@ class Hardware128K:
         # Port 0xBFFD (AY Data Write)
         # A15=1, A14=0, A1=0
         elif (port & 0xC002) == 0x8000:
-            self.ay.write_data(value)
+            self.ay.write_data(value, self.cpu.cycles if self.cpu else None)
@@ -0,0 +1,241 @@
+import os
+import sys
+import time
+import numpy as np
+from src.cpu import Z80
+from src.cpu_jit import JitZ80, NUMBA_AVAILABLE
+from src.memory import Memory
+from src.io import IOBus
+from src.ula import ULA
+from src.tape import Tape
+from src.hardware_128k import Hardware128K
+from src.profiler import OpcodeProfiler
+from src.snapshot import (Snapshot, capture_snapshot, restore_snapshot, load_snapshot,
+                          save_snapshot)
+
+# Default ROM images (48.rom, 128.rom)
+# Výchozí obrazy ROM
+ROM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'roms')
+
+class Machine:
+    def __init__(self, is_128k=False, rom=None, tape=None, jit=False, mixing_mode='mono',
+                 sample_rate=44100, audio_quality='fast', beam_accurate=False, snapshot=None):
+        """
+        Headless ZX Spectrum: CPU, memory, ULA, 128K hardware and tape wired
+        together without any display or audio device, e.g. Machine(**config).
+        Spectrum bez výstupu: CPU, paměť, ULA, hardware 128K a páska propojené
+        bez displeje a zvukového zařízení.
+
+        :param is_128k: Emulate the 128K model.
+        :param rom: ROM image as bytes or a file path; None loads roms/48.rom or roms/128.rom.
+        :param tape: Optional .tap/.tzx path to attach.
+        :param jit: Use the Numba core when numba is installed.
+        :param mixing_mode: AY stereo mode ('mono', 'abc', 'acb').
+        :param sample_rate: Rate of captured audio (Hz).
+        :param audio_quality: 'fast' or 'accurate' (see src.audio_filter).
+        :param beam_accurate: Replay mid-frame screen writes in captured video.
+        :param snapshot: Optional .sna/.z80 path (or Snapshot) to start from.
+        """
+        self.is_128k = is_128k
+        self.sample_rate = sample_rate
+        self.memory = Memory(is_128k=is_128k)
+        self.load_rom(rom)
+
+        self.io_bus = IOBus()
+        # Indexed output: one palette index per pixel
+        # Indexovaný výstup: jeden index palety na pixel
+        self.ula = ULA(self.memory, is_128k=is_128k, indexed=True)
+        self.ula.set_audio_quality(audio_quality)
+        self.io_bus.add_device(self.ula)
+        self.hw128 = None
+        if is_128k:
+            self.hw128 = Hardware128K(self.memory, mixing_mode=mixing_mode)
+            self.io_bus.add_device(self.hw128)
+
+        self.jit = jit and NUMBA_AVAILABLE
+        cpu_class = JitZ80 if self.jit else Z80
+        self.cpu = cpu_class(self.memory, self.io_bus)
+        self.cpu.ula = self.ula
+        self.ula.set_cpu(self.cpu)
+        if self.hw128:
+            self.hw128.set_cpu(self.cpu)
+        if beam_accurate:
+            self.ula.set_beam_accurate(True)
+
+        # Frame timing (3.5 MHz / 69888 or 3.5469 MHz / 70908)
+        # Časování snímku
+        self.frame_cycles = self.ula.CYCLES_PER_FRAME
+        self.fps = (3546900 if is_128k else 3500000) / self.frame_cycles
+        self.frame_count = 0
+        self.samples_rendered = 0
+
+        if tape:
+            self.load_tape(tape)
+        if snapshot is not None:
+            self.load_snapshot(snapshot)
+
+    def load_rom(self, rom):
+        """
+        Load the ROM from bytes or a file (None: default image for the model).
+        Nahraje ROM z bajtů nebo souboru (None: výchozí obraz pro model).
+        """
+        if rom is None:
+            rom = os.path.join(ROM_DIR, '128.rom' if self.is_128k else '48.rom')
+        if isinstance(rom, (str, os.PathLike)):
+            with open(rom, 'rb') as f:
+                rom = f.read()
+        if self.is_128k:
+            self.memory.load_rom(rom[0:16384], bank=0)
+            self.memory.load_rom(rom[16384:32768], bank=1)
+        else:
+            self.memory.load_rom(rom)
+
+    def load_tape(self, path):
+        """
+        Attach a tape image; LD-BYTES traps load its blocks.
+        Připojí obraz pásky; past LD-BYTES načítá jeho bloky.
+
+        :return: True if the tape was parsed.
+        """
+        tape = Tape()
+        if not tape.load_file(path):
+            return False
+        self.cpu.tape = tape
+        return True
+
+    def load_snapshot(self, snapshot):
+        """
+        Restore a .sna/.z80 snapshot (path or Snapshot) instead of booting.
+        Obnoví snímek .sna/.z80 (cesta nebo Snapshot) místo startu z ROM.
+        """
+        if not isinstance(snapshot, Snapshot):
+            snapshot = load_snapshot(snapshot)
+        restore_snapshot(snapshot, self.cpu, self.memory, self.ula, self.hw128)
+
+    def save_snapshot(self, path=None):
+        """
+        Capture the machine state, and write it as .sna/.z80 if path is given.
+        Zachytí stav stroje a pokud je zadána cesta, zapíše ho jako .sna/.z80.
+
+        :return: The Snapshot.
+        """
+        snapshot = capture_snapshot(self.cpu, self.memory, self.ula, self.hw128)
+        if path is not None:
+            save_snapshot(path, snapshot)
+        return snapshot
+
+    def run_frame(self, video=False, audio=False):
+        """
+        Emulate one frame and optionally produce its output.
+        Emuluje jeden snímek a volitelně vytvoří jeho výstup.
+
+        :param video: Render the screen (ula.screen_buffer, palette indices).
+        :param audio: Generate the frame's samples.
+        :return: float32 array (samples, 2) if audio, else None.
+        """
+        cycles_before = self.cpu.cycles
+        self.cpu.run_frame(self.frame_cycles)
+        cycles = self.cpu.cycles - cycles_before
+        self.frame_count += 1
+
+        # Same long-term sample count as the interactive emulator
+        # Stejný dlouhodobý počet vzorků jako interaktivní emulátor
+        total = int(self.frame_count * self.sample_rate / self.fps)
+        samples = total - self.samples_rendered
+        self.samples_rendered = total
+        ay = self.hw128.ay if self.hw128 else None
+        if audio:
+            buffer = self.ula.render_audio(samples, cycles, ay=ay, sample_rate=self.sample_rate)
+        else:
+            buffer = None
+            self.ula.skip_audio(cycles)
+            if ay:
+                ay.render_audio(0, self.sample_rate) # Applies the logged writes
+
+        if video:
+            self.ula.render_screen()
+        else:
+            self.ula.skip_frame()
+        return buffer
+
+    def type_keys(self, keys, hold_frames=5, release_frames=5):
+        """
+        Type a key sequence through the keyboard matrix, running frames
+        while each combination is held and after it is released (the ROM
+        scans the keyboard in its frame interrupt).
+        Napíše posloupnost kláves přes matici klávesnice; během držení
+        a po uvolnění každé kombinace běží snímky.
+
+        :param keys: List of combinations, each a list of (row, bit) pairs.
+        """
+        for combo in keys:
+            for row, bit in combo:
+                self.ula.set_key(row, bit, True)
+            for _ in range(hold_frames):
+                self.run_frame()
+            for row, bit in combo:
+                self.ula.set_key(row, bit, False)
+            for _ in range(release_frames):
+                self.run_frame()
+
+    def run(self, frames, capture_video=False, capture_audio=False):
+        """
+        Emulate frames as fast as possible.
+        Emuluje snímky tak rychle, jak to jde.
+
+        :param frames: Number of frames.
+        :param capture_video: Collect every frame as palette indices.
+        :param capture_audio: Collect the generated audio.
+        :return: (video, audio): uint8 array (frames, 256, 320) or None,
+                 float32 array (samples, 2) or None.
+        """
+        video = None
+        if capture_video:
+            video = np.empty((frames,) + self.ula.screen_buffer.shape, dtype=np.uint8)
+        chunks = []
+        for frame in range(frames):
+            buffer = self.run_frame(video=capture_video, audio=capture_audio)
+            if capture_video:
+                video[frame] = self.ula.screen_buffer
+            if capture_audio:
+                chunks.append(buffer)
+        audio = None
+        if capture_audio:
+            audio = np.concatenate(chunks) if chunks else np.zeros((0, 2), dtype=np.float32)
+        return video, audio
+
+def main():
+    """
+    Measure raw emulation speed:
+    python -m src.machine [frames] [--128] [--jit] [--profile[=out.json|out.csv]] [tape]
+    Měření rychlosti emulace.
+    """
+    frames = 500
+    tape = None
+    profile_arg = None
+    for arg in sys.argv[1:]:
+        if arg.isdigit():
+            frames = int(arg)
+        elif arg.startswith("--profile"):
+            profile_arg = arg
+        elif not arg.startswith("--"):
+            tape = arg
+    machine = Machine(is_128k="--128" in sys.argv, tape=tape, jit="--jit" in sys.argv)
+    profiler = None
+    if profile_arg and not machine.jit:
+        profiler = OpcodeProfiler(machine.cpu)
+        profiler.enable()
+    start = time.perf_counter()
+    machine.run(frames)
+    elapsed = time.perf_counter() - start
+    print(f"{frames} frames in {elapsed:.2f}s: {frames / elapsed:.1f} fps, "
+          f"{frames / machine.fps / elapsed:.2f}x real time, "
+          f"{machine.cpu.cycles / elapsed / 1e6:.2f} MHz")
+    if profiler:
+        profiler.disable()
+        print(profiler.report(20))
+        if "=" in profile_arg:
+            profiler.dump(profile_arg.split("=", 1)[1])
+
+if __name__ == '__main__':
+    main()
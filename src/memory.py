@@ -28,60 +28,110 @@ class Memory:
             # 0x4000 - 0xFFFF: 48K RAM
             self.memory = bytearray(65536)
 
+        # Persistent views of the 16K banks (bank number as used by 128K paging);
+        # the ULA reads VRAM through them without copying
+        # Trvalé pohledy na 16K banky; ULA přes ně čte VRAM bez kopírování
+        if is_128k:
+            self.bank_views = [memoryview(bank) for bank in self.ram_banks]
+        else:
+            view = memoryview(self.memory)
+            rom, screen, middle, top = (view[0x0000:0x4000], view[0x4000:0x8000],
+                                        view[0x8000:0xC000], view[0xC000:0x10000])
+            self.bank_views = [rom, top, middle, top, top, screen, top, top]
+
+        # Contended flag of each 16K slot (0x4000-0x7FFF always holds contended RAM)
+        # Příznak kolizí pro každý 16K slot (0x4000-0x7FFF je vždy kolizní RAM)
+        self.contended_pages = [0, 1, 0, 0]
+        # Screen writes logged with their T-state (beam-accurate video), or None
+        # Zápisy do obrazovky s taktem (video přesné na paprsek), nebo None
+        self.vram_log = None
+        self.vram_clock = None
+        self._map_pages()
+
+    def _map_pages(self):
+        """
+        Rebuild the 4-slot page table seen by the CPU.
+        Called only when the paging state changes, so every access is a
+        plain pages[addr >> 14][addr & 0x3FFF] lookup.
+        Přestaví tabulku 4 stránek viditelných pro CPU. Volá se jen při změně
+        stránkování, takže každý přístup je prostý pages[addr >> 14][addr & 0x3FFF].
+        """
+        if self.is_128k:
+            self.pages = [self.rom_banks[self.current_rom_bank], self.ram_banks[5],
+                          self.ram_banks[2], self.ram_banks[self.current_ram_bank]]
+            # Banks 1, 3, 5, 7 are contended
+            # Banky 1, 3, 5, 7 jsou kolizní
+            self.contended_pages[3] = self.current_ram_bank & 1
+            # Slots currently showing the displayed bank
+            # Sloty, ve kterých je právě zobrazovaná banka
+            self.screen_slots = [False, self.screen_bank == 5, False,
+                                 self.current_ram_bank == self.screen_bank]
+        else:
+            views = self.bank_views
+            self.pages = [views[0], views[5], views[2], views[3]]
+            self.screen_slots = [False, True, False, False]
+        # ROM is read-only
+        # ROM je pouze pro čtení
+        self.writable = [False, True, True, True]
+
     def read_byte(self, address):
         """
         Read a byte from memory.
         Přečte bajt z paměti.
         """
-        address &= 0xFFFF
-        
-        if not self.is_128k:
-            return self.memory[address]
-            
-        # 128K Paging Logic
-        # Logika stránkování 128K
-        if address < 0x4000:
-            # ROM (Bank 0 or 1)
-            return self.rom_banks[self.current_rom_bank][address]
-        elif address < 0x8000:
-            # RAM Bank 5
-            return self.ram_banks[5][address - 0x4000]
-        elif address < 0xC000:
-            # RAM Bank 2
-            return self.ram_banks[2][address - 0x8000]
-        else:
-            # Bankable RAM (0-7)
-            return self.ram_banks[self.current_ram_bank][address - 0xC000]
+        return self.pages[(address >> 14) & 0x03][address & 0x3FFF]
 
     def write_byte(self, address, value):
         """
         Write a byte to memory (RAM only).
         Zapíše bajt do paměti (pouze RAM).
         """
-        address &= 0xFFFF
-        value &= 0xFF
-        
-        if not self.is_128k:
-            # ROM is read-only
-            if address < 0x4000:
-                return
-            self.memory[address] = value
-            return
-            
-        # 128K Paging Logic
-        # Logika stránkování 128K
-        if address < 0x4000:
-            # ROM is read-only
-            return
-        elif address < 0x8000:
-            # RAM Bank 5
-            self.ram_banks[5][address - 0x4000] = value
-        elif address < 0xC000:
-            # RAM Bank 2
-            self.ram_banks[2][address - 0x8000] = value
-        else:
-            # Bankable RAM (0-7)
-            self.ram_banks[self.current_ram_bank][address - 0xC000] = value
+        slot = (address >> 14) & 0x03
+        if self.writable[slot]:
+            self.pages[slot][address & 0x3FFF] = value & 0xFF
+
+    def _write_byte_logged(self, address, value):
+        """
+        write_byte variant that logs changes of the displayed screen
+        (cycle, offset in bank, previous value) for beam-accurate rendering.
+        Varianta write_byte, která zaznamenává změny zobrazené obrazovky.
+        """
+        slot = (address >> 14) & 0x03
+        if self.writable[slot]:
+            page = self.pages[slot]
+            offset = address & 0x3FFF
+            value &= 0xFF
+            if self.screen_slots[slot] and offset < 0x1B00 and page[offset] != value:
+                self.vram_log.append((self.vram_clock.cycles, offset, page[offset]))
+            page[offset] = value
+
+    def start_vram_log(self, clock):
+        """
+        Start logging screen writes, timestamped with clock.cycles.
+        The plain write_byte stays untouched (and free) while logging is off.
+        Zahájí záznam zápisů do obrazovky s časem clock.cycles.
+        """
+        self.vram_clock = clock
+        self.vram_log = []
+        self.write_byte = self._write_byte_logged
+
+    def stop_vram_log(self):
+        """
+        Stop logging screen writes.
+        Ukončí záznam zápisů do obrazovky.
+        """
+        self.__dict__.pop('write_byte', None)
+        self.vram_log = None
+        self.vram_clock = None
+
+    def take_vram_log(self):
+        """
+        Return the logged screen writes and start a new log.
+        Vrátí zaznamenané zápisy do obrazovky a začne nový záznam.
+        """
+        log = self.vram_log
+        self.vram_log = []
+        return log
 
     def load_rom(self, data, bank=0):
         """
@@ -135,15 +185,20 @@ class Memory:
         if value & 0x20:
             self.paging_locked = True
 
+        self._map_pages()
+
     def get_bank_data(self, bank):
         """
-        Get reference to a RAM bank data.
-        Získat odkaz na data RAM banky.
+        Get reference to a RAM bank data (a view, never a copy).
+        Získat odkaz na data RAM banky (pohled, nikdy kopie).
         """
-        if not self.is_128k:
-            if bank == 0: return self.memory[0x0000:0x4000] # ROM
-            if bank == 5: return self.memory[0x4000:0x8000]
-            if bank == 2: return self.memory[0x8000:0xC000]
-            return self.memory[0xC000:0x10000] # Current high bank
-            
-        return self.ram_banks[bank]
\ No newline at end of file
+        return self.bank_views[bank]
+
+    def get_screen_data(self):
+        """
+        Get the bank the ULA currently displays.
+        Získat banku, kterou ULA právě zobrazuje.
+        """
+        if self.is_128k:
+            return self.bank_views[self.screen_bank]
+        return self.bank_views[5]
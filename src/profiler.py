@@ -0,0 +1,187 @@
+import csv
+import json
+import time
+from src.cpu import Z80
+from src.disassembler import Disassembler
+
+# Dispatch tables of the Python core with the bytes that select them
+# (DDCB/FDCB carry the displacement byte before the opcode)
+# Tabulky obsluh jádra v Pythonu s bajty, které je vybírají
+TABLES = (
+    ('opcodes', ()),
+    ('opcodes_cb', (0xCB,)),
+    ('opcodes_ed', (0xED,)),
+    ('opcodes_dd', (0xDD,)),
+    ('opcodes_fd', (0xFD,)),
+    ('opcodes_ddcb', (0xDD, 0xCB)),
+    ('opcodes_fdcb', (0xFD, 0xCB)),
+)
+
+class _Bytes:
+    """Instruction bytes at address 0 for the disassembler."""
+    def __init__(self, data):
+        self.data = data
+
+    def read_byte(self, address):
+        return self.data[address] if address < len(self.data) else 0
+
+class OpcodeProfiler:
+    def __init__(self, cpu):
+        """
+        Opt-in per-instruction profiler for the Python Z80 core.
+        enable() swaps every dispatch table (main, CB, ED, DD, FD, DDCB, FDCB)
+        for wrappers that count executions, wall-clock nanoseconds and
+        T-states; disable() puts the original tables back, so step() and
+        run_until() carry no extra code while profiling is off.
+        Prefixed instructions are accounted to their innermost opcode
+        (e.g. DD CB d 46), including the prefix fetches.
+        Volitelný profiler instrukcí pro jádro v Pythonu. enable() vymění
+        tabulky obsluh za obaly, které počítají provedení, nanosekundy a takty;
+        disable() vrátí původní tabulky, takže vypnutý profiler nic nestojí.
+
+        :param cpu: Z80 instance (the compiled core does not use the tables).
+        """
+        if type(cpu).step is not Z80.step:
+            raise ValueError("OpcodeProfiler needs the Python Z80 core")
+        self.cpu = cpu
+        self.original = None
+        size = len(TABLES) * 256
+        self.counts = [0] * size
+        self.times = [0] * size
+        self.t_states = [0] * size
+        # Index of the instruction being executed; the innermost table wins
+        # Index prováděné instrukce; vyhrává nejvnitřnější tabulka
+        self.current = [0]
+
+    @property
+    def enabled(self):
+        return self.original is not None
+
+    def enable(self):
+        """
+        Install the counting tables. A run_until() already in progress keeps
+        its cached table until it returns (i.e. until the end of the frame).
+        Nainstaluje počítací tabulky; běžící run_until() si do konce snímku
+        ponechá původní tabulku.
+        """
+        if self.enabled:
+            return
+        cpu = self.cpu
+        self.original = {name: getattr(cpu, name) for name, _ in TABLES}
+        for table_index, (name, _) in enumerate(TABLES):
+            wrap = self._wrap_main if table_index == 0 else self._wrap_prefixed
+            table = [wrap(handler, table_index * 256 + opcode)
+                     for opcode, handler in enumerate(self.original[name])]
+            setattr(cpu, name, table)
+
+    def disable(self):
+        """
+        Restore the original dispatch tables (statistics are kept).
+        Obnoví původní tabulky obsluh (statistiky zůstávají).
+        """
+        if not self.enabled:
+            return
+        for name, table in self.original.items():
+            setattr(self.cpu, name, table)
+        self.original = None
+
+    def reset(self):
+        """Clear the statistics. / Vymaže statistiky."""
+        size = len(self.counts)
+        self.counts[:] = [0] * size
+        self.times[:] = [0] * size
+        self.t_states[:] = [0] * size
+
+    def _wrap_main(self, handler, index):
+        """
+        Unprefixed entry: measures the whole instruction. The opcode fetch
+        (4 T-states) happens before dispatch and is added here; its contention
+        is not included.
+        Položka bez předpony: měří celou instrukci včetně načtení opkódu.
+        """
+        cpu = self.cpu
+        counts, times, t_states, current = self.counts, self.times, self.t_states, self.current
+        clock = time.perf_counter_ns
+
+        def profiled():
+            current[0] = index
+            cycles = cpu.cycles
+            start = clock()
+            handler()
+            elapsed = clock() - start
+            key = current[0]
+            counts[key] += 1
+            times[key] += elapsed
+            t_states[key] += cpu.cycles - cycles + 4
+        return profiled
+
+    def _wrap_prefixed(self, handler, index):
+        """Prefixed entry: only marks which instruction the measurement belongs to."""
+        current = self.current
+
+        def profiled(*args):
+            current[0] = index
+            handler(*args)
+        return profiled
+
+    def stats(self):
+        """
+        Executed instructions, most wall time first.
+        Provedené instrukce seřazené podle strávěného času.
+
+        :return: list of dicts: opcode ('DD CB 46'), mnemonic, count, time_ns,
+                 t_states, time_share and t_state_share (fractions of the total).
+        """
+        total_time = sum(self.times) or 1
+        total_t_states = sum(self.t_states) or 1
+        disassembler = Disassembler()
+        rows = []
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            prefix = TABLES[index >> 8][1]
+            opcode = index & 0xFF
+            # DDCB/FDCB: the displacement precedes the opcode
+            # DDCB/FDCB: posun je před opkódem
+            data = prefix + ((0x00,) if len(prefix) == 2 else ()) + (opcode,)
+            mnemonic = disassembler.disassemble(_Bytes(data), 0)[0]
+            rows.append({
+                'opcode': ' '.join(f"{byte:02X}" for byte in prefix + (opcode,)),
+                'mnemonic': mnemonic,
+                'count': count,
+                'time_ns': self.times[index],
+                't_states': self.t_states[index],
+                'time_share': self.times[index] / total_time,
+                't_state_share': self.t_states[index] / total_t_states,
+            })
+        rows.sort(key=lambda row: row['time_ns'], reverse=True)
+        return rows
+
+    def report(self, top=20):
+        """
+        Text table of the top handlers by wall time.
+        Textová tabulka obsluh s největším časem.
+        """
+        rows = self.stats()
+        total = sum(row['count'] for row in rows)
+        lines = [f"{total} instructions, {len(rows)} distinct opcodes",
+                 f"{'opcode':10s} {'mnemonic':18s} {'count':>10s} {'ns/op':>7s} {'time':>6s} {'T-st':>6s}"]
+        for row in rows[:top]:
+            lines.append(f"{row['opcode']:10s} {row['mnemonic']:18s} {row['count']:10d} "
+                         f"{row['time_ns'] / row['count']:7.0f} {row['time_share']:6.1%} "
+                         f"{row['t_state_share']:6.1%}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """
+        Write the full histogram as JSON, or CSV if path ends with .csv.
+        Zapíše celý histogram jako JSON, nebo CSV pro příponu .csv.
+        """
+        rows = self.stats()
+        with open(path, 'w', newline='') as f:
+            if path.lower().endswith('.csv'):
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['opcode'])
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump(rows, f, indent=1)
@@ -0,0 +1,396 @@
+import struct
+import numpy as np
+
+# CPU attributes stored in a snapshot
+# Atributy CPU uložené ve snímku
+REGISTERS = ('a', 'f', 'b', 'c', 'd', 'e', 'h', 'l',
+             'a_alt', 'f_alt', 'b_alt', 'c_alt', 'd_alt', 'e_alt', 'h_alt', 'l_alt',
+             'ix', 'iy', 'sp', 'pc', 'i', 'r', 'im', 'iff1', 'iff2')
+
+# 48K RAM as banks: 0x4000 -> 5, 0x8000 -> 2, 0xC000 -> 0 (the 128K power-on mapping)
+# 48K RAM jako banky: 0x4000 -> 5, 0x8000 -> 2, 0xC000 -> 0 (mapování 128K po zapnutí)
+BANKS_48K = (5, 2, 0)
+
+# .Z80 page numbers of the 48K RAM slots
+# Čísla stránek .Z80 pro sloty 48K RAM
+Z80_PAGES_48K = {8: 5, 4: 2, 5: 0}
+
+# .Z80 hardware modes with 128K paging (v2: 3, 4; v3: 4-6, +3, Pentagon, +2, +2A)
+# Hardwarové režimy .Z80 se stránkováním 128K
+Z80_128K_MODES_V2 = (3, 4)
+Z80_128K_MODES_V3 = (4, 5, 6, 7, 9, 12, 13)
+
+SNA_HEADER = 27
+BANK_SIZE = 0x4000
+
+class Snapshot:
+    def __init__(self, is_128k=False):
+        """
+        Machine state independent of the file format.
+        Stav stroje nezávislý na formátu souboru.
+
+        :param is_128k: 128K snapshot (paging and AY state are meaningful).
+        """
+        self.is_128k = is_128k
+        self.registers = dict.fromkeys(REGISTERS, 0)
+        self.border = 0
+        self.port_7ffd = 0
+        self.ay_register = 0
+        self.ay_registers = [0] * 16
+        # RAM bank number -> 16K bytes (48K: banks 5, 2, 0)
+        # Číslo banky RAM -> 16K bajtů (48K: banky 5, 2, 0)
+        self.banks = {}
+
+    def word(self, high, low):
+        return (self.registers[high] << 8) | self.registers[low]
+
+    def set_word(self, high, low, value):
+        self.registers[high] = (value >> 8) & 0xFF
+        self.registers[low] = value & 0xFF
+
+# --- Capture / restore ---
+# Zachycení / obnovení
+
+def capture_snapshot(cpu, memory, ula, hw128=None):
+    """
+    Take a snapshot of a running machine.
+    Vytvoří snímek běžícího stroje.
+    """
+    snapshot = Snapshot(is_128k=memory.is_128k)
+    snapshot.registers = {name: int(getattr(cpu, name)) for name in REGISTERS}
+    snapshot.border = ula.border_color
+    if memory.is_128k:
+        snapshot.port_7ffd = (memory.current_ram_bank | (0x08 if memory.screen_bank == 7 else 0) |
+                              (memory.current_rom_bank << 4) | (0x20 if memory.paging_locked else 0))
+        snapshot.banks = {bank: bytes(data) for bank, data in enumerate(memory.ram_banks)}
+    else:
+        snapshot.banks = {bank: bytes(memory.memory[0x4000 * (slot + 1):0x4000 * (slot + 2)])
+                          for slot, bank in enumerate(BANKS_48K)}
+    if hw128:
+        snapshot.ay_register = hw128.ay.current_register
+        snapshot.ay_registers = list(hw128.ay.registers)
+    return snapshot
+
+def restore_snapshot(snapshot, cpu, memory, ula, hw128=None):
+    """
+    Put a snapshot into a machine: registers, RAM (one slice copy per bank,
+    into the existing buffers, so the JIT core's views stay valid), paging,
+    border and AY registers. A 48K snapshot on a 128K machine runs with the
+    48K BASIC ROM and paging locked.
+    Vloží snímek do stroje: registry, RAM (jedna kopie řezu na banku do
+    stávajících bufferů, pohledy JIT jádra zůstanou platné), stránkování,
+    okraj a registry AY.
+    """
+    if snapshot.is_128k and not memory.is_128k:
+        raise ValueError("128K snapshot needs a 128K machine")
+
+    if memory.is_128k:
+        for bank, data in snapshot.banks.items():
+            memory.ram_banks[bank][:] = data
+        port = snapshot.port_7ffd if snapshot.is_128k else 0x30
+        memory.current_ram_bank = port & 0x07
+        memory.screen_bank = 7 if port & 0x08 else 5
+        memory.current_rom_bank = (port >> 4) & 0x01
+        memory.paging_locked = bool(port & 0x20)
+        memory._map_pages()
+    else:
+        for slot, bank in enumerate(BANKS_48K):
+            memory.memory[0x4000 * (slot + 1):0x4000 * (slot + 2)] = snapshot.banks[bank]
+
+    for name, value in snapshot.registers.items():
+        setattr(cpu, name, value)
+    cpu.halted = False
+    cpu.q = 0
+
+    ula.border_color = snapshot.border
+    ula.last_frame_border_color = snapshot.border
+    ula.border_event_count = 0
+    ula.full_redraw = True
+
+    if hw128:
+        ay = hw128.ay
+        ay.write_log.clear()
+        for register, value in enumerate(snapshot.ay_registers):
+            ay.write_address(register)
+            ay.write_data(value)
+        ay.write_address(snapshot.ay_register)
+
+# --- .SNA ---
+
+def parse_sna(data):
+    """
+    Parse a .SNA file (48K: 49179 bytes, 128K: 131103 or 147487 bytes).
+    Načte soubor .SNA.
+    """
+    if len(data) < SNA_HEADER + 3 * BANK_SIZE:
+        raise ValueError("Not a valid SNA file")
+    is_128k = len(data) > SNA_HEADER + 3 * BANK_SIZE
+    snapshot = Snapshot(is_128k=is_128k)
+    regs = snapshot.registers
+    (regs['i'], hl_alt, de_alt, bc_alt, af_alt, hl, de, bc, regs['iy'], regs['ix'], iff,
+     regs['r'], af, regs['sp'], regs['im'], border) = struct.unpack('<B9HBBHHBB', data[:SNA_HEADER])
+    for (high, low), value in ((('h_alt', 'l_alt'), hl_alt), (('d_alt', 'e_alt'), de_alt),
+                               (('b_alt', 'c_alt'), bc_alt), (('a_alt', 'f_alt'), af_alt),
+                               (('h', 'l'), hl), (('d', 'e'), de), (('b', 'c'), bc), (('a', 'f'), af)):
+        snapshot.set_word(high, low, value)
+    regs['iff1'] = regs['iff2'] = (iff >> 2) & 1
+    regs['im'] &= 0x03
+    snapshot.border = border & 0x07
+
+    ram = data[SNA_HEADER:SNA_HEADER + 3 * BANK_SIZE]
+    if not is_128k:
+        snapshot.banks = {bank: ram[slot * BANK_SIZE:(slot + 1) * BANK_SIZE]
+                          for slot, bank in enumerate(BANKS_48K)}
+        # 48K: PC was pushed on the stack (RETN continues the program)
+        # 48K: PC je uložen na zásobníku
+        sp = regs['sp']
+        regs['pc'] = _read_word_48k(snapshot, sp)
+        regs['sp'] = (sp + 2) & 0xFFFF
+        return snapshot
+
+    pos = SNA_HEADER + 3 * BANK_SIZE
+    regs['pc'], snapshot.port_7ffd = struct.unpack('<HB', data[pos:pos + 3])
+    pos += 4 # PC, 0x7FFD, TR-DOS flag
+    paged = snapshot.port_7ffd & 0x07
+    snapshot.banks = {5: ram[:BANK_SIZE], 2: ram[BANK_SIZE:2 * BANK_SIZE],
+                      paged: ram[2 * BANK_SIZE:]}
+    # Remaining banks in ascending order (the paged bank is not repeated)
+    # Zbývající banky vzestupně (stránkovaná banka se neopakuje)
+    for bank in range(8):
+        if bank in (5, 2, paged):
+            continue
+        if pos + BANK_SIZE > len(data):
+            raise ValueError("Truncated 128K SNA file")
+        snapshot.banks[bank] = data[pos:pos + BANK_SIZE]
+        pos += BANK_SIZE
+    return snapshot
+
+def _read_word_48k(snapshot, address):
+    def byte(addr):
+        addr &= 0xFFFF
+        if addr < 0x4000:
+            return 0 # ROM is not part of the snapshot / ROM není součástí snímku
+        bank = BANKS_48K[(addr >> 14) - 1]
+        return snapshot.banks[bank][addr & 0x3FFF]
+    return byte(address) | (byte(address + 1) << 8)
+
+def build_sna(snapshot):
+    """
+    Encode a snapshot as .SNA (48K: PC is pushed on the stack in the file).
+    Zakóduje snímek jako .SNA (48K: PC se v souboru uloží na zásobník).
+    """
+    regs = snapshot.registers
+    sp = regs['sp']
+    banks = dict(snapshot.banks)
+    if not snapshot.is_128k:
+        sp = (sp - 2) & 0xFFFF
+        for offset, value in ((0, regs['pc'] & 0xFF), (1, regs['pc'] >> 8)):
+            addr = (sp + offset) & 0xFFFF
+            if addr >= 0x4000:
+                bank = BANKS_48K[(addr >> 14) - 1]
+                data = bytearray(banks[bank])
+                data[addr & 0x3FFF] = value
+                banks[bank] = bytes(data)
+
+    header = struct.pack('<B9HBBHHBB', regs['i'],
+                         snapshot.word('h_alt', 'l_alt'), snapshot.word('d_alt', 'e_alt'),
+                         snapshot.word('b_alt', 'c_alt'), snapshot.word('a_alt', 'f_alt'),
+                         snapshot.word('h', 'l'), snapshot.word('d', 'e'), snapshot.word('b', 'c'),
+                         regs['iy'], regs['ix'], 0x04 if regs['iff2'] else 0, regs['r'],
+                         snapshot.word('a', 'f'), sp, regs['im'], snapshot.border)
+    if not snapshot.is_128k:
+        return header + b''.join(banks[bank] for bank in BANKS_48K)
+
+    paged = snapshot.port_7ffd & 0x07
+    parts = [header, banks[5], banks[2], banks[paged],
+             struct.pack('<HBB', regs['pc'], snapshot.port_7ffd, 0)]
+    parts.extend(banks[bank] for bank in range(8) if bank not in (5, 2, paged))
+    return b''.join(parts)
+
+# --- .Z80 ---
+
+def _decompress(data, size):
+    """
+    Expand .Z80 RLE (ED ED count value) up to size bytes.
+    Rozbalí RLE formátu .Z80 (ED ED počet hodnota) na size bajtů.
+    """
+    out = bytearray()
+    pos = 0
+    while len(out) < size:
+        marker = data.find(b'\xED\xED', pos)
+        if marker < 0 or marker + 3 >= len(data):
+            out += data[pos:]
+            break
+        out += data[pos:marker]
+        out += bytes((data[marker + 3],)) * data[marker + 2]
+        pos = marker + 4
+    if len(out) < size:
+        raise ValueError("Truncated Z80 memory block")
+    return bytes(out[:size])
+
+def _compress(data):
+    """
+    .Z80 RLE: runs of 5+ equal bytes and of 2+ EDs become ED ED count value;
+    the byte after a single ED is never part of a run.
+    RLE formátu .Z80: běhy 5+ stejných bajtů a 2+ bajtů ED se kódují jako
+    ED ED počet hodnota; bajt po samostatném ED nikdy nezačíná běh.
+    """
+    values = np.frombuffer(data, dtype=np.uint8)
+    starts = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+    lengths = np.diff(np.concatenate((starts, [len(values)])))
+    out = bytearray()
+    after_ed = False
+    for start, length in zip(starts.tolist(), lengths.tolist()):
+        value = data[start]
+        if after_ed:
+            out.append(value)
+            length -= 1
+            after_ed = False
+        while length:
+            chunk = min(length, 255)
+            if chunk >= 5 or (value == 0xED and chunk >= 2):
+                out += bytes((0xED, 0xED, chunk, value))
+            else:
+                out += bytes((value,)) * chunk
+                after_ed = value == 0xED
+            length -= chunk
+    return bytes(out)
+
+def parse_z80(data):
+    """
+    Parse a .Z80 file (versions 1-3, compressed or not).
+    Načte soubor .Z80 (verze 1-3, komprimovaný i nekomprimovaný).
+    """
+    if len(data) < 30:
+        raise ValueError("Not a valid Z80 file")
+    (a, f, bc, hl, pc, sp, i, r, flags, de, bc_alt, de_alt, hl_alt, a_alt, f_alt,
+     iy, ix, iff1, iff2, mode) = struct.unpack('<BBHHHHBBBHHHHBBHHBBB', data[:30])
+    if flags == 0xFF:
+        flags = 1
+
+    header_end = 30
+    is_128k = False
+    port_7ffd = 0
+    ay_register = 0
+    ay_registers = [0] * 16
+    if pc == 0:
+        # Version 2/3: extra header with PC, hardware mode and AY state
+        # Verze 2/3: rozšířená hlavička s PC, typem hardwaru a stavem AY
+        extra_length, pc, hardware, port_7ffd = struct.unpack('<HHBB', data[30:36])
+        header_end = 32 + extra_length
+        modes = Z80_128K_MODES_V2 if extra_length == 23 else Z80_128K_MODES_V3
+        is_128k = hardware in modes
+        ay_register = data[38]
+        ay_registers = list(data[39:55])
+
+    snapshot = Snapshot(is_128k=is_128k)
+    regs = snapshot.registers
+    regs.update(a=a, f=f, a_alt=a_alt, f_alt=f_alt, pc=pc, sp=sp, i=i, ix=ix, iy=iy,
+                r=(r & 0x7F) | ((flags & 0x01) << 7), iff1=1 if iff1 else 0,
+                iff2=1 if iff2 else 0, im=mode & 0x03)
+    for (high, low), value in ((('b', 'c'), bc), (('h', 'l'), hl), (('d', 'e'), de),
+                               (('b_alt', 'c_alt'), bc_alt), (('d_alt', 'e_alt'), de_alt),
+                               (('h_alt', 'l_alt'), hl_alt)):
+        # BC, DE, HL are little-endian words: C/E/L first
+        # BC, DE, HL jsou slova little-endian: nejdřív C/E/L
+        snapshot.set_word(high, low, value)
+    snapshot.border = (flags >> 1) & 0x07
+    snapshot.port_7ffd = port_7ffd
+    snapshot.ay_register = ay_register
+    snapshot.ay_registers = ay_registers
+
+    if header_end == 30:
+        # Version 1: the 48K RAM, compressed if flag bit 5 is set
+        # Verze 1: 48K RAM, komprimovaná při nastaveném bitu 5
+        body = data[30:]
+        ram = _decompress(body, 3 * BANK_SIZE) if flags & 0x20 else body[:3 * BANK_SIZE]
+        if len(ram) < 3 * BANK_SIZE:
+            raise ValueError("Truncated Z80 file")
+        snapshot.banks = {bank: ram[slot * BANK_SIZE:(slot + 1) * BANK_SIZE]
+                          for slot, bank in enumerate(BANKS_48K)}
+        return snapshot
+
+    pos = header_end
+    while pos + 3 <= len(data):
+        length, page = struct.unpack('<HB', data[pos:pos + 3])
+        pos += 3
+        if length == 0xFFFF:
+            block = data[pos:pos + BANK_SIZE]
+            pos += BANK_SIZE
+        else:
+            block = _decompress(data[pos:pos + length], BANK_SIZE)
+            pos += length
+        bank = page - 3 if is_128k else Z80_PAGES_48K.get(page)
+        if bank is not None and 0 <= bank < 8:
+            snapshot.banks[bank] = block
+    expected = range(8) if is_128k else BANKS_48K
+    if any(bank not in snapshot.banks for bank in expected):
+        raise ValueError("Z80 file is missing memory pages")
+    return snapshot
+
+def build_z80(snapshot):
+    """
+    Encode a snapshot as a version 3 .Z80 file with compressed pages.
+    Zakóduje snímek jako soubor .Z80 verze 3 s komprimovanými stránkami.
+    """
+    regs = snapshot.registers
+    flags = ((regs['r'] >> 7) & 0x01) | ((snapshot.border & 0x07) << 1)
+    header = struct.pack('<BBHHHHBBBHHHHBBHHBBB', regs['a'], regs['f'],
+                         snapshot.word('b', 'c'), snapshot.word('h', 'l'), 0, regs['sp'],
+                         regs['i'], regs['r'] & 0x7F, flags, snapshot.word('d', 'e'),
+                         snapshot.word('b_alt', 'c_alt'), snapshot.word('d_alt', 'e_alt'),
+                         snapshot.word('h_alt', 'l_alt'), regs['a_alt'], regs['f_alt'],
+                         regs['iy'], regs['ix'], regs['iff1'], regs['iff2'], regs['im'] & 0x03)
+    # v3 extra header (54 bytes); T-state counter and peripherals left at 0
+    # Rozšířená hlavička v3 (54 bajtů); čítač taktů a periferie zůstávají 0
+    extra = bytearray(54)
+    struct.pack_into('<HBBBBB', extra, 0, regs['pc'], 4 if snapshot.is_128k else 0,
+                     snapshot.port_7ffd if snapshot.is_128k else 0, 0, 0x04 if snapshot.is_128k else 0,
+                     snapshot.ay_register)
+    extra[7:23] = bytes(snapshot.ay_registers)
+    parts = [header, struct.pack('<H', len(extra)), bytes(extra)]
+
+    if snapshot.is_128k:
+        pages = [(bank + 3, bank) for bank in range(8)]
+    else:
+        pages = [(page, bank) for page, bank in Z80_PAGES_48K.items()]
+    for page, bank in pages:
+        block = _compress(snapshot.banks[bank])
+        if len(block) >= BANK_SIZE:
+            parts.append(struct.pack('<HB', 0xFFFF, page) + snapshot.banks[bank])
+        else:
+            parts.append(struct.pack('<HB', len(block), page) + block)
+    return b''.join(parts)
+
+# --- Files ---
+# Soubory
+
+SNAPSHOT_FORMATS = {'.sna': (parse_sna, build_sna), '.z80': (parse_z80, build_z80)}
+
+def is_snapshot_file(path):
+    """True for .sna/.z80 file names. / Pravda pro názvy souborů .sna/.z80."""
+    return str(path).lower().endswith(tuple(SNAPSHOT_FORMATS))
+
+def _format(path):
+    for extension, codecs in SNAPSHOT_FORMATS.items():
+        if str(path).lower().endswith(extension):
+            return codecs
+    raise ValueError(f"Unknown snapshot format: {path}")
+
+def load_snapshot(path):
+    """
+    Read a .SNA or .Z80 file.
+    Načte soubor .SNA nebo .Z80.
+    """
+    parse, _ = _format(path)
+    with open(path, 'rb') as f:
+        return parse(f.read())
+
+def save_snapshot(path, snapshot):
+    """
+    Write a snapshot as .SNA or .Z80 (chosen by the extension).
+    Zapíše snímek jako .SNA nebo .Z80 (podle přípony).
+    """
+    _, build = _format(path)
+    with open(path, 'wb') as f:
+        f.write(build(snapshot))
@@ -1,11 +1,15 @@
+from itertools import chain
 import numpy as np
+from src.audio_filter import QUALITY_LEVELS, Decimator
 
 class ULA:
-    def __init__(self, memory, is_128k=False):
+    def __init__(self, memory, is_128k=False, indexed=False):
         """
         ULA (Uncommitted Logic Array) Chip.
         Handle I/O port 0xFE (Border, Beeper, Keyboard) and Video Rendering.
         Obsluha V/V portu 0xFE (Okraj, Pípák, Klávesnice) a vykreslování videa.
+
+        :param indexed: Render palette indices (1 byte per pixel) instead of RGB.
         """
         self.memory = memory
         self.is_128k = is_128k
@@ -36,10 +40,8 @@ class ULA:
         ]
         self.np_palette = np.array(self.palette, dtype=np.uint8)
         
-        # Pre-allocate screen buffer
         self.screen_width = 256 + 64
         self.screen_height = 192 + 64
-        self.screen_buffer = np.zeros((self.screen_height, self.screen_width, 3), dtype=np.uint8)
 
         # Pre-calculate VRAM scanline addresses
         # Předvýpočet adres skenovacích řádků VRAM
@@ -54,6 +56,50 @@ class ULA:
             hi = (section << 3) | pixel_row
             self.line_addresses[y] = (hi << 8) | (char_row << 5)
 
+        # Interleaved-to-linear maps: entry y * 32 + x holds the VRAM offset of
+        # the bitmap byte and of its attribute
+        # Mapy prokládané -> lineární: položka y * 32 + x obsahuje offset
+        # bajtu bitmapy a jeho atributu ve VRAM
+        columns = np.arange(32, dtype=np.intp)
+        self.bitmap_index = (self.line_addresses.astype(np.intp)[:, None] + columns).ravel()
+        self.attr_index = (0x1800 + (np.arange(192, dtype=np.intp)[:, None] >> 3) * 32 + columns).ravel()
+        # Inverse map: bitmap offset -> linear index
+        # Inverzní mapa: offset bitmapy -> lineární index
+        self.bitmap_linear = np.empty(6144, dtype=np.intp)
+        self.bitmap_linear[self.bitmap_index] = np.arange(6144)
+
+        # (attribute << 8 | bitmap byte) -> 8 palette indices, one table per
+        # flash phase (phase 1 swaps ink and paper of flashing cells)
+        # (atribut << 8 | bajt bitmapy) -> 8 indexů palety, pro každou fázi blikání
+        attr = np.arange(256, dtype=np.uint8)[:, None, None]
+        bits = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1)[None, :, :]
+        bright = (attr >> 6) & 0x01
+        ink = (attr & 0x07) | (bright << 3)
+        paper = ((attr >> 3) & 0x07) | (bright << 3)
+        flash = (attr >> 7).astype(bool)
+        normal = np.where(bits, ink, paper)
+        swapped = np.where(flash, np.where(bits, paper, ink), normal)
+        self.pixel_lut = np.stack((normal, swapped)).reshape(2, 65536, 8)
+
+        # Pre-allocate screen buffer
+        # Indexed output keeps palette indices (320x256), RGB output 320x256x3
+        # Indexovaný výstup drží indexy palety (320x256), RGB výstup 320x256x3
+        self.indexed = indexed
+        if indexed:
+            self.screen_buffer = np.zeros((self.screen_height, self.screen_width), dtype=np.uint8)
+            self.pixel_table = self.pixel_lut
+            colors = np.arange(16, dtype=np.uint8)[:, None]
+        else:
+            self.screen_buffer = np.zeros((self.screen_height, self.screen_width, 3), dtype=np.uint8)
+            # Same table already converted to 8 RGB pixels (24 bytes per entry)
+            # Stejná tabulka převedená na 8 pixelů RGB (24 bajtů na položku)
+            self.pixel_table = self.np_palette[self.pixel_lut].reshape(2, 65536, 24)
+            colors = self.np_palette
+        self.pixel_size = colors.shape[1]
+        # One 8-pixel group per border colour
+        # Jedna skupina 8 pixelů pro každou barvu okraje
+        self.border_groups = np.tile(colors, (1, 8))
+
         # Keyboard matrix state
         self.keyboard_rows = {
             0xFE: 0x1F, # SHIFT, Z, X, C, V
@@ -68,13 +114,31 @@ class ULA:
         
         # Audio state
         self.cpu = None
-        self.audio_events = [] # List of (cycle, speaker_val) tuples
-        self.border_events = [] # List of (cycle, color) tuples
+        # Speaker level changes not rendered yet: (CPU cycle, level 0-255)
+        # Dosud nevykreslené změny úrovně reproduktoru: (takt CPU, úroveň)
+        self.audio_event_cycles = np.zeros(4096, dtype=np.int64)
+        self.audio_event_levels = np.zeros(4096, dtype=np.uint8)
+        self.audio_event_count = 0
+        # Border changes of the current frame: (frame-relative cycle, colour)
+        # Změny okraje v aktuálním snímku: (takt v rámci snímku, barva)
+        self.border_event_cycles = np.zeros(4096, dtype=np.int64)
+        self.border_event_colors = np.zeros(4096, dtype=np.uint8)
+        self.border_event_count = 0
         self.last_audio_cycle = 0
         self.render_beeper_state = 0 # Track state for rendering continuity
+        self.audio_quality = 'fast'
+        self.decimator = None # Oversampling filter ('accurate' quality)
         
         # Video state
         self.flash_counter = 0
+        # Dirty-region tracking: what the screen buffer currently shows
+        # Sledování změn: co právě obsahuje buffer obrazovky
+        self.rendered_vram = np.zeros(6912, dtype=np.uint8)
+        self.rendered_border = np.zeros((self.screen_height, self.screen_width // 8), dtype=np.uint8)
+        self.rendered_border_color = None # Set while the whole border is one colour
+        self.rendered_flash = 0
+        self.full_redraw = True # Next render redraws (and reports) everything
+        self.dirty_rects = [] # (x, y, w, h) areas changed by the last render
 
         # Timing constants
         if is_128k:
@@ -90,6 +154,25 @@ class ULA:
             
         self.SCREEN_START_CYCLE = self.LINES_BEFORE_SCREEN * self.CYCLES_PER_LINE
         self.CONTENTION_PATTERN = [6, 5, 4, 3, 2, 1, 0, 0]
+        self._build_contention_tables()
+
+        # T-state at which each 8-pixel group of the buffer is displayed.
+        # The ULA draws 2 pixels per T-state, the paper's top-left pixel at
+        # SCREEN_START_CYCLE; the buffer shows 32 lines/pixels of border
+        # around the paper.
+        # Takt, ve kterém se zobrazí každá skupina 8 pixelů bufferu (ULA kreslí
+        # 2 pixely za takt, levý horní pixel papíru v SCREEN_START_CYCLE).
+        lines = np.arange(self.screen_height, dtype=np.int64) - 32
+        groups = np.arange(self.screen_width // 8, dtype=np.int64) * 4 - 16
+        self.border_cycle_grid = self.SCREEN_START_CYCLE + lines[:, None] * self.CYCLES_PER_LINE + groups
+        # T-state of the ULA fetch of each paper byte (linear order)
+        # Takt, ve kterém ULA čte každý bajt papíru (lineární pořadí)
+        self.fetch_cycles = self.border_cycle_grid[32:224, 4:36].ravel()
+
+        # Beam-accurate mode: replay logged VRAM writes per fetch window
+        # Režim přesný na paprsek: přehrání zaznamenaných zápisů do VRAM
+        self.beam_accurate = False
+        self.beam_replayed = False # Last frame differed from the final VRAM
 
     def set_cpu(self, cpu):
         """
@@ -97,6 +180,23 @@ class ULA:
         Propojení CPU s ULA pro časování.
         """
         self.cpu = cpu
+        if self.beam_accurate:
+            self.memory.vram_clock = cpu
+
+    def set_beam_accurate(self, enabled):
+        """
+        Enable rendering of mid-frame screen changes (multicolour, rainbow
+        effects): Memory logs every screen write with its T-state and the
+        ULA replays the log per 8-pixel fetch. Writes that bypass
+        Memory.write_byte (the JIT core) are not logged.
+        Zapne vykreslování změn obrazovky během snímku: Memory zaznamenává
+        zápisy do obrazovky s taktem a ULA je přehraje po 8pixelových čteních.
+        """
+        self.beam_accurate = enabled
+        if enabled:
+            self.memory.start_vram_log(self.cpu)
+        else:
+            self.memory.stop_vram_log()
 
     def get_contention(self, cycle, address, is_io=False):
         """
@@ -105,60 +205,45 @@ class ULA:
         128K: Banks 1, 3, 5, 7 are contended.
         I/O: Ports with bit 0 = 0, or ports in contended range.
         """
-        if not is_io:
-            is_contended = False
-            if not self.is_128k:
-                if 0x4000 <= (address & 0xFFFF) <= 0x7FFF:
-                    is_contended = True
-            else:
-                addr = address & 0xFFFF
-                if 0x4000 <= addr < 0x8000:
-                    # Bank 5 is always here and it is contended
-                    is_contended = True
-                elif addr >= 0xC000:
-                    # Bankable RAM
-                    bank = self.memory.current_ram_bank
-                    if bank in [1, 3, 5, 7]:
-                        is_contended = True
-                        
-            if not is_contended:
-                return 0
-                
-            return self._calculate_contention(cycle)
-        else:
-            # I/O Contention
-            port = address & 0xFFFF
-            is_contended = False
-            
-            if (port & 0x0001) == 0:
-                # ULA port is always contended
-                is_contended = True
-            else:
-                # Non-ULA port might be contended if in contended RAM range
-                if not self.is_128k:
-                    if 0x4000 <= port <= 0x7FFF: # Wait, high byte 0x40-0x7F
-                        is_contended = True
-                else:
-                    # 128K I/O contention is more complex, but usually same range check
-                    if 0x4000 <= port < 0x8000:
-                        is_contended = True
-                    elif port >= 0xC000:
-                        bank = self.memory.current_ram_bank
-                        if bank in [1, 3, 5, 7]:
-                            is_contended = True
-            
-            if not is_contended:
+        if is_io:
+            # The ULA port is always contended
+            # Port ULA je vždy kolizní
+            if (address & 0x0001) and not self.memory.contended_pages[(address >> 14) & 0x03]:
                 return 0
-                
-            # I/O contention adds 4 cycles of potential delay
-            # T1, T2, T3, T4
-            delay = 0
-            curr_cycle = cycle
-            for _ in range(4):
-                d = self._calculate_contention(curr_cycle)
-                delay += d
-                curr_cycle += d + 1
-            return delay
+            return self.io_contention_table[cycle % self.CYCLES_PER_FRAME]
+
+        if not self.memory.contended_pages[(address >> 14) & 0x03]:
+            return 0
+        return self.contention_table[cycle % self.CYCLES_PER_FRAME]
+
+    def _build_contention_tables(self):
+        """
+        Precompute the delay for every T-state of the frame.
+        Předvypočítá zpoždění pro každý takt snímku.
+        """
+        frame = self.CYCLES_PER_FRAME
+        rel_cycle = np.arange(frame)
+        screen_cycle = rel_cycle - self.SCREEN_START_CYCLE
+        line = screen_cycle // self.CYCLES_PER_LINE
+        line_cycle = screen_cycle % self.CYCLES_PER_LINE
+        # First 128 cycles of each screen line are contended
+        # Prvních 128 taktů každého řádku obrazu je kolizních
+        active = (screen_cycle >= 0) & (line < 192) & (line_cycle < 128)
+        pattern = np.array(self.CONTENTION_PATTERN, dtype=np.int64)
+        table = np.where(active, pattern[line_cycle % 8], 0)
+
+        # I/O contention adds 4 cycles of potential delay (T1..T4),
+        # each one shifted by the delays before it
+        # Kolize V/V: čtyři takty, každý posunutý o předchozí zpoždění
+        io_table = np.zeros(frame, dtype=np.int64)
+        curr_cycle = rel_cycle.copy()
+        for _ in range(4):
+            delay = table[curr_cycle % frame]
+            io_table += delay
+            curr_cycle += delay + 1
+
+        self.contention_table = bytes(table.astype(np.uint8))
+        self.io_contention_table = bytes(io_table.astype(np.uint8))
 
     def _calculate_contention(self, cycle):
         """Internal helper to calculate contention for a single cycle."""
@@ -234,11 +319,9 @@ class ULA:
             
         phase = line_cycle % 8
         
-        # Determine which bank ULA is reading from
-        if self.is_128k:
-            vram_bank = self.memory.get_bank_data(self.memory.screen_bank)
-        else:
-            vram_bank = self.memory.memory[0x4000:0x8000]
+        # Determine which bank ULA is reading from (a view, no copy)
+        # Banka, ze které ULA čte (pohled, bez kopie)
+        vram_bank = self.memory.get_screen_data()
 
         if phase == 0 or phase == 4:
             # Fetch bitmap
@@ -307,19 +390,68 @@ class ULA:
                 elif new_beeper: level = 160
                 elif new_mic: level = 80
                 
-                self.audio_events.append((current_cycle, level))
+                self.add_audio_event(current_cycle, level)
             
             current_cycle = self.cpu.cycles if self.cpu else 0
             new_border = value & 0x07
             if new_border != self.border_color:
-                # Record relative cycle in frame
-                rel_cycle = current_cycle % self.CYCLES_PER_FRAME
-                self.border_events.append((rel_cycle, new_border))
+                self.add_border_event(current_cycle, new_border)
             
             self.border_color = new_border
             self.mic = new_mic
             self.beeper = new_beeper
 
+    def add_border_event(self, cycle, color):
+        """
+        Record a border colour change at the given CPU cycle.
+        Zaznamená změnu barvy okraje v daném taktu CPU.
+        """
+        count = self.border_event_count
+        if count == len(self.border_event_cycles):
+            # Grow for extreme multicolour border effects
+            # Zvětšit pro extrémní vícebarevné efekty okraje
+            self.border_event_cycles = np.resize(self.border_event_cycles, count * 2)
+            self.border_event_colors = np.resize(self.border_event_colors, count * 2)
+        # Record relative cycle in frame
+        self.border_event_cycles[count] = cycle % self.CYCLES_PER_FRAME
+        self.border_event_colors[count] = color
+        self.border_event_count = count + 1
+
+    def set_audio_quality(self, quality):
+        """
+        Select the audio pipeline: 'fast' renders at the output rate,
+        'accurate' oversamples and decimates through a FIR low-pass.
+        Volba zvukového řetězce: 'fast' syntéza na výstupní frekvenci,
+        'accurate' převzorkování a decimace FIR dolní propustí.
+        """
+        factor, taps = QUALITY_LEVELS[quality]
+        self.audio_quality = quality
+        self.decimator = Decimator(factor, taps) if factor > 1 else None
+
+    def add_audio_event(self, cycle, level):
+        """
+        Record a speaker level change at the given CPU cycle.
+        Zaznamená změnu úrovně reproduktoru v daném taktu CPU.
+        """
+        count = self.audio_event_count
+        if count == len(self.audio_event_cycles):
+            # Grow for beeper engines toggling thousands of times per frame
+            # Zvětšit pro beeper hudbu s tisíci přepnutími za snímek
+            self.audio_event_cycles = np.resize(self.audio_event_cycles, count * 2)
+            self.audio_event_levels = np.resize(self.audio_event_levels, count * 2)
+        self.audio_event_cycles[count] = cycle
+        self.audio_event_levels[count] = level
+        self.audio_event_count = count + 1
+
+    @property
+    def audio_events(self):
+        """
+        Pending speaker events as a list of (cycle, level) tuples (debugging, tests).
+        Čekající události reproduktoru jako seznam dvojic (takt, úroveň).
+        """
+        count = self.audio_event_count
+        return list(zip(self.audio_event_cycles[:count].tolist(), self.audio_event_levels[:count].tolist()))
+
     def set_key(self, row_addr, key_bit, pressed):
         """
         Simulate key press/release.
@@ -331,7 +463,7 @@ class ULA:
             else:
                 self.keyboard_rows[row_addr] |= mask
 
-    def render_audio(self, samples_per_frame, cycles_per_frame, ay=None):
+    def render_audio(self, samples_per_frame, cycles_per_frame, ay=None, sample_rate=44100):
         """
         Generate audio samples for the current frame.
         Generovat audio vzorky pro aktuální snímek.
@@ -339,157 +471,300 @@ class ULA:
         :param samples_per_frame: Number of samples to generate.
         :param cycles_per_frame: Total CPU cycles in this frame.
         :param ay: Optional AY38910 instance for 128K sound.
-        :return: bytes object with unsigned 8-bit PCM data.
+        :param sample_rate: Output sample rate (Hz).
+        :return: float32 array (samples_per_frame, 2) in the 0.0 - 1.0 range.
         """
         start_cycle = self.last_audio_cycle
         end_cycle = start_cycle + cycles_per_frame
         
         # Avoid division by zero if no cycles executed
-        if cycles_per_frame <= 0:
-            return b'\x00' * samples_per_frame        
-        # Avoid division by zero if no cycles executed
-        if cycles_per_frame <= 0:
-            return b'\x00' * samples_per_frame
-        
-        # We use floats for mixing
-        beeper_samples = np.zeros(samples_per_frame, dtype=np.float32)
-        
-        # State at start of frame is the last rendered state
-        state = self.render_beeper_state
-        
-        # Collect relevant events
-        relevant_events = []
-        for e in self.audio_events:
-            if e[0] < end_cycle:
-                relevant_events.append(e)
-        
-        # Sort events by cycle
-        relevant_events.sort(key=lambda x: x[0])
-        
-        # Add a sentinel event at the end cycle to fill the last span
-        relevant_events.append((end_cycle, state))
-        
-        sample_idx = 0
-        for cycle, next_state in relevant_events:
-            event_cycle = max(cycle, start_cycle)
-            next_sample_idx = int((event_cycle - start_cycle) * samples_per_frame / cycles_per_frame)
-            next_sample_idx = max(sample_idx, min(next_sample_idx, samples_per_frame))
-                
-            # Fill buffer with current state until this event
-            # Normalize beeper to 0.0 - 1.0 range
-            beeper_samples[sample_idx:next_sample_idx] = (state / 255.0)
-                
-            sample_idx = next_sample_idx
-            state = next_state
-            
-        # Update state for next frame
-        self.render_beeper_state = state
+        if cycles_per_frame <= 0 or samples_per_frame <= 0:
+            return np.zeros((max(samples_per_frame, 0), 2), dtype=np.float32)
+
+        # Synthesize at the oversampled rate, decimate at the end
+        # Syntéza na převzorkované frekvenci, decimace na konci
+        factor = self.decimator.factor if self.decimator else 1
+        samples = samples_per_frame * factor
+
+        # Events of this frame (write_port appends them in cycle order)
+        # Události tohoto snímku (write_port je přidává v pořadí taktů)
+        count = self.audio_event_count
+        cycles = self.audio_event_cycles[:count]
+        used = int(np.searchsorted(cycles, end_cycle, side='left'))
+
+        # The speaker level is piecewise constant: segment k starts at
+        # starts[k] with levels[k]. Integrate it and average over each
+        # output sample (box filter) instead of point-sampling, so fast
+        # toggles alias far less.
+        # Úroveň je po částech konstantní; integrál se průměruje přes každý
+        # výstupní vzorek (obdélníkový filtr) místo bodového vzorkování.
+        starts = np.empty(used + 1, dtype=np.float64)
+        starts[0] = start_cycle
+        np.maximum(cycles[:used], start_cycle, out=starts[1:])
+        levels = np.empty(used + 1, dtype=np.float64)
+        levels[0] = self.render_beeper_state
+        levels[1:] = self.audio_event_levels[:used]
+        area = np.zeros(used + 1, dtype=np.float64)
+        np.cumsum(levels[:-1] * np.diff(starts), out=area[1:])
+
+        step = cycles_per_frame / samples
+        edges = start_cycle + np.arange(samples + 1) * step
+        segment = np.searchsorted(starts, edges, side='right') - 1
+        integral = area[segment] + levels[segment] * (edges - starts[segment])
+        # Normalize beeper to 0.0 - 1.0 range
+        beeper_samples = (np.diff(integral) / (step * 255.0)).astype(np.float32)
+
+        # Update state for next frame and drop processed events
+        # Stav pro další snímek a odstranění zpracovaných událostí
+        self.render_beeper_state = int(levels[-1])
         self.last_audio_cycle = end_cycle
-        
-        # Remove processed events
-        self.audio_events = [e for e in self.audio_events if e[0] >= end_cycle]
+        self._drop_audio_events(used)
         
         if ay:
-            ay_samples = ay.render_audio(samples_per_frame, 22050)
+            ay_samples = ay.render_audio(samples, sample_rate * factor, start_cycle, cycles_per_frame)
             
             if ay_samples.ndim == 2:
                 # Stereo mixing
-                mixed = np.zeros((samples_per_frame, 2), dtype=np.float32)
+                mixed = np.zeros((samples, 2), dtype=np.float32)
                 # Beeper is mono, so copy it to both channels
                 mixed[:, 0] = (beeper_samples * 0.5) + (ay_samples[:, 0] * 0.5)
                 mixed[:, 1] = (beeper_samples * 0.5) + (ay_samples[:, 1] * 0.5)
             else:
                 # Mono mixing expanded to Stereo
-                mixed = np.zeros((samples_per_frame, 2), dtype=np.float32)
+                mixed = np.zeros((samples, 2), dtype=np.float32)
                 combined = (beeper_samples * 0.5) + (ay_samples * 0.5)
                 mixed[:, 0] = combined
                 mixed[:, 1] = combined
         else:
             # Beeper Only - Expand to Stereo
-            mixed = np.zeros((samples_per_frame, 2), dtype=np.float32)
+            mixed = np.zeros((samples, 2), dtype=np.float32)
             mixed[:, 0] = beeper_samples
             mixed[:, 1] = beeper_samples
             
+        if self.decimator:
+            mixed = self.decimator.process(mixed)
+            
         # Return float32 array (0.0 - 1.0)
         return mixed
 
+    def _drop_audio_events(self, used):
+        """
+        Remove the first used speaker events, keeping the rest in order.
+        Odstraní prvních used událostí reproduktoru, zbytek zachová.
+        """
+        if used:
+            count = self.audio_event_count
+            rest = count - used
+            self.audio_event_cycles[:rest] = self.audio_event_cycles[used:count]
+            self.audio_event_levels[:rest] = self.audio_event_levels[used:count]
+            self.audio_event_count = rest
+
+    def skip_audio(self, cycles_per_frame):
+        """
+        Advance the audio state by one frame without generating samples
+        (headless runs): consume the frame's speaker events and keep the level.
+        Posune stav zvuku o snímek bez generování vzorků (běh bez výstupu).
+        """
+        end_cycle = self.last_audio_cycle + cycles_per_frame
+        count = self.audio_event_count
+        used = int(np.searchsorted(self.audio_event_cycles[:count], end_cycle, side='left'))
+        if used:
+            self.render_beeper_state = int(self.audio_event_levels[used - 1])
+        self.last_audio_cycle = end_cycle
+        self._drop_audio_events(used)
+
+    def skip_frame(self):
+        """
+        Advance the video state by one frame without rendering (headless runs).
+        The screen buffer keeps its content and dirty tracking stays valid.
+        Posune stav videa o snímek bez vykreslení (běh bez výstupu).
+        """
+        count = self.border_event_count
+        if count:
+            self.last_frame_border_color = int(self.border_event_colors[count - 1])
+            self.border_event_count = 0
+        self.flash_counter = (self.flash_counter + 1) % 32
+        if self.beam_accurate:
+            self.memory.take_vram_log()
+
     def render_screen(self):
         """
         Render the Spectrum screen to a buffer.
-        Uses border_events for cycle-accurate border rendering.
+        Uses the border event array for T-state accurate border rendering.
         Returns raw RGB data 320x256 (including 32px border).
         """
         # Reuse pre-allocated buffer
         buffer = self.screen_buffer
         
-        # Sort border events just in case
-        self.border_events.sort(key=lambda x: x[0])
-        
-        # Pre-calculate border color for each scanline
-        line_border_colors = np.zeros(self.screen_height, dtype=np.uint8)
-        current_event_idx = 0
-        current_color = self.last_frame_border_color
-        
-        for y in range(self.screen_height):
-            # Approximate cycle for this scanline
-            line_cycle = y * self.CYCLES_PER_LINE
-            
-            while current_event_idx < len(self.border_events) and self.border_events[current_event_idx][0] <= line_cycle:
-                current_color = self.border_events[current_event_idx][1]
-                current_event_idx += 1
-            line_border_colors[y] = current_color
-
-        # Fill buffer with line colors (Border)
-        for y in range(self.screen_height):
-            buffer[y, :] = self.np_palette[line_border_colors[y]]
-        
-        # Update for next frame
-        self.last_frame_border_color = current_color
-        self.border_events = []
+        # Border colour of every 8-pixel group (4 T-states): the colour set
+        # by the last event at or before the group's display cycle
+        # Barva okraje každé skupiny 8 pixelů podle poslední změny před ní
+        count = self.border_event_count
+        start_color = self.last_frame_border_color
+        if count:
+            cycles = self.border_event_cycles[:count]
+            colors = self.border_event_colors[:count]
+            # Sort border events just in case (e.g. past the frame end)
+            if count > 1 and (np.diff(cycles) < 0).any():
+                order = np.argsort(cycles, kind='stable')
+                cycles = cycles[order]
+                colors = colors[order]
+            event = np.searchsorted(cycles, self.border_cycle_grid, side='right') - 1
+            group_colors = np.where(event >= 0, colors[event], start_color).astype(np.uint8)
+            # Update for next frame
+            self.last_frame_border_color = int(colors[-1])
+            self.border_event_count = 0
+        else:
+            # Without OUTs to the border this frame every group keeps the colour
+            # Bez zápisu okraje v tomto snímku mají všechny skupiny stejnou barvu
+            group_colors = None
         
         # Handle flash timing
         flash_active = (self.flash_counter >> 4) & 1
         self.flash_counter = (self.flash_counter + 1) % 32
         
-        # Get correct VRAM data
-        if self.is_128k:
-            vram_bank = self.memory.get_bank_data(self.memory.screen_bank)
-        else:
-            # For 48K, video is at 0x4000 offset in memory.memory
-            vram_bank = self.memory.memory[0x4000:0x8000]
-            
-        vram = np.frombuffer(vram_bank, dtype=np.uint8)
+        # Get correct VRAM data (zero-copy view of the screen bank)
+        # Data VRAM (pohled na banku obrazovky bez kopírování)
+        vram = np.frombuffer(self.memory.get_screen_data(), dtype=np.uint8)
         
-        # Attributes are 32x24 (768 bytes starting at 0x1800 relative to bank start)
-        attr_data = vram[0x1800:0x1800+768].reshape((24, 32))
+        full = self.full_redraw
+        self.full_redraw = False
+        dirty_rects = []
         
-        ink = attr_data & 0x07
-        paper = (attr_data >> 3) & 0x07
-        bright = (attr_data >> 6) & 0x01
-        flash = (attr_data >> 7) & 0x01
-        
-        if flash_active:
-            flash_mask = (flash != 0)
-            tmp_ink = ink.copy()
-            ink[flash_mask] = paper[flash_mask]
-            paper[flash_mask] = tmp_ink[flash_mask]
+        # Border: redraw only when a pixel group changed colour
+        # Okraj: překreslit jen při změně barvy některé skupiny pixelů
+        if group_colors is None and not full and self.rendered_border_color == start_color:
+            pass # Still the same single colour / Stále stejná jediná barva
+        else:
+            if group_colors is None:
+                group_colors = np.full(self.rendered_border.shape, start_color, dtype=np.uint8)
+            border_changed = (group_colors != self.rendered_border).any(axis=1)
+            if full or border_changed.any():
+                self._render_border(group_colors, full)
+                if not full:
+                    changed_lines = np.flatnonzero(border_changed)
+                    top = int(changed_lines[0])
+                    dirty_rects.append((0, top, self.screen_width, int(changed_lines[-1]) - top + 1))
+                self.rendered_border[:] = group_colors
+        self.rendered_border_color = start_color if count == 0 else None
+        
+        # Paper: compare VRAM with what was rendered last time. This also
+        # catches writes that bypass Memory.write_byte (JIT core, bank views).
+        # Papír: porovnání VRAM s posledním vykresleným stavem; zachytí i
+        # zápisy mimo Memory.write_byte (JIT jádro, pohledy na banky).
+        screen = vram[:6912]
+        log = self.memory.take_vram_log() if self.beam_accurate else None
+        if full or log or self.beam_replayed:
+            # Mid-frame writes make the picture differ from the final VRAM
+            # Zápisy během snímku: obraz se liší od konečného stavu VRAM
+            self._render_paper(vram, flash_active, log)
+            if full:
+                dirty_rects.append((0, 0, self.screen_width, self.screen_height))
+            else:
+                dirty_rects.append((32, 32, 256, 192))
+            self.beam_replayed = bool(log)
+        elif flash_active != self.rendered_flash or not np.array_equal(screen, self.rendered_vram):
+            changed = screen != self.rendered_vram
+            dirty = changed[self.bitmap_index].reshape(24, 8, 32).any(axis=1)
+            dirty |= changed[6144:].reshape(24, 32)
+            if flash_active != self.rendered_flash:
+                dirty |= (screen[6144:].reshape(24, 32) & 0x80) != 0
             
-        ink = ink + (bright << 3)
-        paper = paper + (bright << 3)
+            if dirty.all():
+                self._render_paper(vram, flash_active)
+            elif dirty.any():
+                self._render_cells(vram, flash_active, dirty)
+            
+            for cy in np.flatnonzero(dirty.any(axis=1)):
+                columns = np.flatnonzero(dirty[cy])
+                left = int(columns[0])
+                dirty_rects.append((32 + left * 8, 32 + int(cy) * 8, (int(columns[-1]) - left + 1) * 8, 8))
         
-        border_size = 32
-        screen_view = buffer[border_size:border_size+192, border_size:border_size+256]
+        self.rendered_vram[:] = screen
+        self.rendered_flash = flash_active
+        self.dirty_rects = dirty_rects
         
-        for y in range(192):
-            char_y = y >> 3
-            line_addr = self.line_addresses[y]
-            line_data = vram[line_addr:line_addr+32]
-            
-            bits = np.unpackbits(line_data)
-            line_ink = ink[char_y].repeat(8)
-            line_paper = paper[char_y].repeat(8)
-            
-            color_indices = np.where(bits, line_ink, line_paper)
-            screen_view[y] = self.np_palette[color_indices]
-            
         return buffer
+
+    def _render_border(self, group_colors, full):
+        """
+        Draw the border around the paper area from per-group colours.
+        Vykreslí okraj kolem papíru podle barev skupin pixelů.
+        """
+        rows = np.take(self.border_groups, group_colors, axis=0).reshape(self.screen_height, -1)
+        lines = self.screen_buffer.reshape(self.screen_height, -1)
+        if full:
+            lines[:] = rows
+            return
+        # Leave the paper area alone
+        # Plochu papíru nechat být
+        left = 32 * self.pixel_size
+        right = 288 * self.pixel_size
+        lines[:32] = rows[:32]
+        lines[224:] = rows[224:]
+        lines[32:224, :left] = rows[32:224, :left]
+        lines[32:224, right:] = rows[32:224, right:]
+
+    def _render_paper(self, vram, flash_active, log=None):
+        """
+        Whole paper area at once: gather bitmap and attribute bytes in linear
+        order and look up 8 output pixels per byte.
+        Celá plocha najednou: bajty bitmapy a atributů v lineárním pořadí
+        a vyhledání 8 výstupních pixelů pro každý bajt.
+        """
+        bitmap = vram[self.bitmap_index]
+        attrs = vram[self.attr_index]
+        if log:
+            self._replay_vram_log(log, bitmap, attrs)
+        keys = (attrs.astype(np.uint16) << 8) | bitmap
+        pixels = np.take(self.pixel_table[flash_active], keys, axis=0)
+        paper = self.screen_buffer[32:224, 32:288]
+        paper[...] = pixels.reshape(paper.shape)
+
+    def _replay_vram_log(self, log, bitmap, attrs):
+        """
+        Replace the final VRAM bytes with the values the ULA actually fetched.
+        A fetch at T-state t sees the value from before the first write to
+        that byte after t (its logged previous value), or the final value
+        if nothing wrote to it later in the frame.
+        Nahradí konečné bajty VRAM hodnotami, které ULA skutečně přečetla.
+        """
+        frame = self.CYCLES_PER_FRAME
+        entries = np.fromiter(chain.from_iterable(log), dtype=np.int64, count=3 * len(log)).reshape(-1, 3)
+        offsets = entries[:, 1]
+        # Sort by (offset, cycle) so each byte's writes are contiguous
+        # Řazení podle (offset, takt), zápisy každého bajtu jsou za sebou
+        keys = offsets * frame + entries[:, 0] % frame
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        offsets = offsets[order]
+        previous = entries[order, 2].astype(np.uint8)
+
+        touched = np.unique(offsets)
+        touched_bitmap = touched[touched < 0x1800]
+        cells = touched[touched >= 0x1800] - 0x1800
+        # Every attribute byte is fetched on the 8 lines of its cell
+        # Každý atribut se čte na 8 řádcích své buňky
+        attr_linear = ((cells >> 5) * 8)[:, None] + np.arange(8)
+        attr_linear = (attr_linear * 32 + (cells & 0x1F)[:, None]).ravel()
+        for target, linear, offset in ((bitmap, self.bitmap_linear[touched_bitmap], touched_bitmap),
+                                       (attrs, attr_linear, np.repeat(cells + 0x1800, 8))):
+            position = np.searchsorted(keys, offset * frame + self.fetch_cycles[linear], side='right')
+            later = position < len(keys)
+            later[later] = offsets[position[later]] == offset[later]
+            target[linear[later]] = previous[position[later]]
+
+    def _render_cells(self, vram, flash_active, dirty):
+        """
+        Redraw only the dirty 8x8 character cells.
+        Překreslí jen změněné znakové buňky 8x8.
+        """
+        cell_y, cell_x = np.nonzero(dirty)
+        # Linear byte index of the 8 lines of each cell
+        # Lineární index bajtu pro 8 řádků každé buňky
+        index = ((cell_y * 8)[:, None] + np.arange(8)) * 32 + cell_x[:, None]
+        keys = (vram[self.attr_index[index]].astype(np.uint16) << 8) | vram[self.bitmap_index[index]]
+        pixels = np.take(self.pixel_table[flash_active], keys, axis=0)
+        channels = self.screen_buffer.shape[2:]
+        paper = self.screen_buffer[32:224, 32:288].reshape((24, 8, 32, 8) + channels)
+        paper[cell_y, :, cell_x] = pixels.reshape((-1, 8, 8) + channels)
@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from src.audio_filter import Decimator, design_lowpass
+from src.memory import Memory
+from src.ula import ULA
+
+class TestAudioFilter(unittest.TestCase):
+    def test_lowpass_unit_gain(self):
+        kernel = design_lowpass(64, 4)
+        self.assertAlmostEqual(float(kernel.sum()), 1.0, places=5)
+
+    def test_dc_passes(self):
+        decimator = Decimator(4, 64)
+        out = decimator.process(np.full((800, 2), 0.5, dtype=np.float32))
+        self.assertEqual(out.shape, (200, 2))
+        # Primed history: no fade-in from zero at the start
+        # Naplněná historie: žádný náběh od nuly na začátku
+        self.assertTrue(np.allclose(out, 0.5, atol=1e-5))
+
+    def test_rejects_tones_above_output_nyquist(self):
+        # 30 kHz at 176.4 kHz would alias to 14.1 kHz at 44.1 kHz
+        # 30 kHz by se při 44,1 kHz zrcadlilo na 14,1 kHz
+        rate = 44100 * 4
+        t = np.arange(rate // 10) / rate
+        tone = np.sin(2 * np.pi * 30000 * t).astype(np.float32)
+        out = Decimator(4, 64).process(np.column_stack((tone, tone)))
+        self.assertLess(np.abs(out[50:]).max(), 0.01)
+
+    def test_blocks_join_seamlessly(self):
+        # Frame-by-frame decimation equals decimating the whole stream
+        # Decimace po snímcích se rovná decimaci celého proudu
+        data = np.random.default_rng(1).random((4000, 2), dtype=np.float32)
+        whole = Decimator(4, 64).process(data)
+        decimator = Decimator(4, 64)
+        parts = [decimator.process(data[i:i + 1000]) for i in range(0, 4000, 1000)]
+        self.assertTrue(np.allclose(np.concatenate(parts), whole, atol=1e-6))
+
+    def test_ula_accurate_quality(self):
+        class MockCPU:
+            cycles = 0
+        ula = ULA(Memory())
+        ula.set_cpu(MockCPU())
+        ula.set_audio_quality('accurate')
+        ula.render_beeper_state = 160
+        for _ in range(3):
+            buffer = ula.render_audio(882, 69888)
+        self.assertEqual(buffer.shape, (882, 2))
+        self.assertTrue(np.allclose(buffer, 160 / 255.0, atol=1e-5))
+        ula.set_audio_quality('fast')
+        self.assertIsNone(ula.decimator)
+
+if __name__ == '__main__':
+    unittest.main()
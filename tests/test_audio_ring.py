@@ -0,0 +1,65 @@
+import threading
+import unittest
+import numpy as np
+from src.audio_ring import AudioRing
+
+class TestAudioRing(unittest.TestCase):
+    def test_write_read_wraps(self):
+        ring = AudioRing(8)
+        out = np.full((8, 2), 9.0, dtype=np.float32)
+        data = np.arange(12, dtype=np.float32).reshape(6, 2)
+        self.assertEqual(ring.write(data), 6)
+        self.assertEqual(ring.read_into(out, 4), 4)
+        self.assertTrue((out[:4] == data[:4]).all())
+        # Wraps around the end of the ring
+        # Přetečení přes konec bufferu
+        self.assertEqual(ring.write(data), 6)
+        self.assertEqual(ring.buffered, 8)
+        self.assertEqual(ring.fill_level, 1.0)
+        self.assertEqual(ring.read_into(out, 8), 8)
+        self.assertTrue((out[:2] == data[4:]).all())
+        self.assertTrue((out[2:] == data).all())
+
+    def test_overrun_and_underrun(self):
+        ring = AudioRing(4)
+        self.assertEqual(ring.write(np.ones((6, 2), dtype=np.float32)), 4)
+        self.assertEqual(ring.overruns, 1)
+        out = np.full((6, 2), 9.0, dtype=np.float32)
+        self.assertEqual(ring.read_into(out, 6), 4)
+        self.assertEqual(ring.underruns, 1)
+        # Missing frames are silence
+        # Chybějící snímky jsou ticho
+        self.assertTrue((out[4:] == 0).all())
+
+    def test_mono_broadcast(self):
+        ring = AudioRing(4)
+        ring.write(np.array([0.25, 0.5], dtype=np.float32))
+        out = np.zeros((2, 2), dtype=np.float32)
+        ring.read_into(out, 2)
+        self.assertTrue((out == [[0.25, 0.25], [0.5, 0.5]]).all())
+
+    def test_threads_keep_order(self):
+        # One producer and one consumer thread see every frame once, in order
+        # Zapisovatel a čtenář ve vláknech vidí každý snímek jednou a v pořadí
+        ring = AudioRing(64)
+        total = 5000
+        received = []
+
+        def consume():
+            out = np.zeros((16, 2), dtype=np.float32)
+            while len(received) < total:
+                count = ring.read_into(out, 16)
+                received.extend(out[:count, 0].tolist())
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        sent = 0
+        while sent < total:
+            block = np.arange(sent, min(sent + 10, total), dtype=np.float32)
+            written = ring.write(np.column_stack((block, block)))
+            sent += written
+        consumer.join(timeout=10)
+        self.assertEqual(received, list(range(total)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from src.audio_sync import AudioClockSync
+
+class TestAudioClockSync(unittest.TestCase):
+    def test_nominal_rate_at_target(self):
+        sync = AudioClockSync(44100, 50.0, 2048)
+        total = sum(sync.samples_for_frame(2048) for _ in range(50))
+        self.assertEqual(total, 44100)
+
+    def test_rate_adjust_is_bounded(self):
+        sync = AudioClockSync(44100, 50.0, 2048, smoothing=1.0)
+        sync.samples_for_frame(0)
+        self.assertAlmostEqual(sync.ratio, 1.005)
+        sync.samples_for_frame(100000)
+        self.assertAlmostEqual(sync.ratio, 0.995)
+
+    def test_wait_time(self):
+        sync = AudioClockSync(44100, 50.0, 2048)
+        self.assertEqual(sync.wait_time(1000), 0)
+        self.assertAlmostEqual(sync.wait_time(2048 + 441), 0.01)
+
+    def test_queue_settles_with_slow_device(self):
+        # A device clock 0.3 % slower than nominal, draining 512-frame blocks:
+        # the queue stays between underrun and overrun
+        # Zařízení o 0,3 % pomalejší, čerpá bloky po 512 snímcích:
+        # fronta se drží mezi podtečením a přetečením
+        sync = AudioClockSync(44100, 50.0, 2048)
+        device_rate = 44100 * 0.997
+        queued = 2048.0
+        played = 0.0
+        low = high = queued
+        for frame in range(3000):
+            queued += sync.samples_for_frame(int(queued))
+            # Emulate until the queue drains to the target (wait_time)
+            # Emulace čeká, než se fronta přehraje na cíl (wait_time)
+            elapsed = max(sync.wait_time(int(queued)), 1 / 50.0 * 0.5)
+            played += elapsed * device_rate
+            blocks = int(played // 512)
+            played -= blocks * 512
+            queued -= blocks * 512
+            if frame > 500:
+                low, high = min(low, queued), max(high, queued)
+        self.assertGreater(low, 0)
+        self.assertLess(high, 4096)
+
+if __name__ == '__main__':
+    unittest.main()
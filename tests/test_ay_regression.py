@@ -0,0 +1,66 @@
+import hashlib
+import unittest
+from src.ay38910 import AY38910, NOISE_BITS, NOISE_PERIOD, NOISE_STATES
+
+# Register writes of the regression set: name -> (mixing mode, [(register, value)])
+# Zápisy registrů regresní sady: název -> (režim mixu, [(registr, hodnota)])
+CASES = {
+    'tones': ('mono', [(0, 0x1C), (1, 0x01), (2, 0x50), (4, 3), (7, 0x38), (8, 15), (9, 10), (10, 5)]),
+    'noise': ('mono', [(6, 7), (7, 0x07), (8, 12), (9, 15), (10, 9)]),
+    'tone_noise_abc': ('abc', [(0, 40), (2, 41), (4, 0), (6, 1), (7, 0x30), (8, 15), (9, 15), (10, 15)]),
+    'acb': ('acb', [(0, 200), (3, 2), (4, 7), (7, 0x3A), (8, 8), (9, 14), (10, 15)]),
+}
+for shape in range(16):
+    CASES['envelope_%d' % shape] = ('mono', [(0, 30), (7, 0x3E), (8, 0x10), (11, 3), (12, 0), (13, shape)])
+
+# SHA-256 prefixes of the output of the original per-tick model
+# Otisky výstupu původního modelu počítaného po ticích
+GOLDEN = {
+        'tones': 'a43042d94888ab08',
+        'noise': '6024f794eed037a0',
+        'tone_noise_abc': 'ba0c3b1950b1bcac',
+        'acb': '94df74d59811fa21',
+        'envelope_0': '0c141f740bc758b9',
+        'envelope_1': '0c141f740bc758b9',
+        'envelope_2': '0c141f740bc758b9',
+        'envelope_3': '0c141f740bc758b9',
+        'envelope_4': '69755db6225af449',
+        'envelope_5': '69755db6225af449',
+        'envelope_6': '69755db6225af449',
+        'envelope_7': '69755db6225af449',
+        'envelope_8': '9cf879c52a61d0fc',
+        'envelope_9': '0c141f740bc758b9',
+        'envelope_10': '2eb5978511d965ab',
+        'envelope_11': '5a617333417d3f42',
+        'envelope_12': '3afcae4674927748',
+        'envelope_13': '6c67b47327292265',
+        'envelope_14': 'bca808b8bb4dc3bb',
+        'envelope_15': '69755db6225af449',
+}
+
+class TestAYRegression(unittest.TestCase):
+    def test_matches_per_tick_model(self):
+        """The block generator reproduces the per-tick model bit for bit"""
+        for name, (mode, writes) in CASES.items():
+            ay = AY38910(mixing_mode=mode)
+            for register, value in writes:
+                ay.write_address(register)
+                ay.write_data(value)
+            digest = hashlib.sha256()
+            # Uneven block sizes exercise the state carried between calls
+            # Nestejné bloky ověří stav přenášený mezi voláními
+            for count in (441, 882, 100, 882):
+                digest.update(ay.render_audio(count, 22050).tobytes())
+            self.assertEqual(digest.hexdigest()[:16], GOLDEN[name], name)
+
+    def test_noise_table(self):
+        """The precomputed LFSR sequence matches stepping the register"""
+        rng = 1
+        for k in range(1000):
+            self.assertEqual(NOISE_STATES[k], rng)
+            self.assertEqual(NOISE_BITS[k], rng & 1)
+            rng = (rng >> 1) | (((rng ^ (rng >> 3)) & 1) << 16)
+        self.assertEqual(len(set(NOISE_STATES.tolist())), NOISE_PERIOD)
+
+if __name__ == '__main__':
+    unittest.main()
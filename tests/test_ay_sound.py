@@ -120,5 +120,33 @@ class TestAYSound(unittest.TestCase):
         self.assertTrue(np.any(samples[:, 0] > 0))
         self.assertTrue(np.all(samples[:, 1] == 0))
 
+    def test_timestamped_writes(self):
+        """A register write logged mid-frame is heard from its cycle on."""
+        class MockCPU:
+            cycles = 0
+        cpu = MockCPU()
+        hw128 = Hardware128K(Memory(is_128k=True))
+        hw128.set_cpu(cpu)
+        ay = hw128.ay
+        # All tone and noise outputs disabled: the channel plays its volume
+        hw128.write_port(0xFFFD, 7)
+        hw128.write_port(0xBFFD, 0x3F)
+        cpu.cycles = 35000
+        hw128.write_port(0xFFFD, 8)
+        hw128.write_port(0xBFFD, 15)
+        # The CPU reads the new value at once
+        self.assertEqual(hw128.read_port(0xFFFD), 15)
+        cpu.cycles = 80000 # Next frame
+        hw128.write_port(0xBFFD, 0)
+
+        samples = ay.render_audio(882, 44100, 0, 70000)
+        self.assertTrue(np.all(samples[:441] == 0))
+        self.assertTrue(np.all(samples[441:] == np.float32(1.0) / 3.0))
+        self.assertEqual(ay.write_log, [(80000, 8, 0)])
+        samples = ay.render_audio(882, 44100, 70000, 70000)
+        self.assertTrue(np.all(samples[:126] > 0))
+        self.assertTrue(np.all(samples[126:] == 0))
+        self.assertEqual(ay.write_log, [])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import batch_runner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def loader_rom():
+    """
+    16K ROM that loads the header and data block of test.tap through the
+    LD-BYTES trap and halts.
+    """
+    rom = bytearray(0x4000)
+    code = [0xF3,                     # DI
+            0xDD, 0x21, 0x00, 0x80,   # LD IX,0x8000
+            0x11, 0x11, 0x00,         # LD DE,17
+            0xAF, 0x37,               # XOR A / SCF
+            0xCD, 0x56, 0x05,         # CALL LD-BYTES
+            0xDD, 0x21, 0x00, 0x90,   # LD IX,0x9000
+            0x11, 0x0A, 0x00,         # LD DE,10
+            0x3E, 0xFF, 0x37,         # LD A,0xFF / SCF
+            0xCD, 0x56, 0x05,         # CALL LD-BYTES
+            0x76]                     # HALT
+    rom[0:len(code)] = bytes(code)
+    rom[0x0556] = 0xC9 # RET (the trap runs first)
+    return bytes(rom)
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ('a.tap', 'b.tap'):
+            shutil.copy(os.path.join(ROOT, 'test.tap'), os.path.join(self.directory, name))
+        self.rom = os.path.join(self.directory, 'loader.rom')
+        with open(self.rom, 'wb') as f:
+            f.write(loader_rom())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_run_title(self):
+        job = {'path': os.path.join(self.directory, 'a.tap'), 'frames': 80, 'is_128k': False,
+               'jit': False, 'rom': self.rom, 'boot_frames': 2, 'shot_every': 20}
+        result = batch_runner.run_title(job)
+        self.assertNotIn('error', result)
+        self.assertEqual(result['blocks_loaded'], 2)
+        self.assertEqual(result['frames'], 80)
+        self.assertEqual(result['registers']['pc'], 27) # After HALT
+        self.assertEqual([shot[0] for shot in result['screenshots']], [60, 80])
+        self.assertEqual(len(result['screen_hash']), 40)
+
+    def test_shots_do_not_change_the_hash(self):
+        # Sampling screenshots must not move the FLASH phase or the border
+        # Snímky obrazovky nesmí posunout fázi FLASH ani okraj
+        # LD A,0xB8 / LD (0x5800),A / LD A,0xF0 / LD (0x4000),A / DI / HALT: a flashing cell
+        rom = os.path.join(self.directory, 'flash.rom')
+        with open(rom, 'wb') as f:
+            f.write(bytes([0x3E, 0xB8, 0x32, 0x00, 0x58, 0x3E, 0xF0, 0x32, 0x00, 0x40,
+                           0xF3, 0x76]).ljust(0x4000, b'\x00'))
+        hashes = []
+        for shot_every in (0, 1):
+            job = {'path': os.path.join(self.directory, 'a.tap'), 'frames': 60, 'is_128k': False,
+                   'jit': False, 'rom': rom, 'boot_frames': 2, 'shot_every': shot_every}
+            result = batch_runner.run_title(job)
+            self.assertNotIn('error', result)
+            hashes.append(result['screen_hash'])
+        self.assertEqual(hashes[0], hashes[1])
+        self.assertEqual(result['screenshots'][-1][1], result['screen_hash'])
+
+    def test_report(self):
+        """The CLI runs every tape in worker processes and writes the report"""
+        report = os.path.join(self.directory, 'report.json')
+        argv = ['batch_runner.py', self.directory, '--frames', '50', '--rom', self.rom,
+                '--boot-frames', '1', '--workers', '2', '--report', report]
+        with mock.patch.object(sys, 'argv', argv):
+            batch_runner.main()
+        with open(report) as f:
+            data = json.load(f)
+        self.assertEqual([t['title'] for t in data['titles']], ['a.tap', 'b.tap'])
+        self.assertEqual(data['total']['errors'], 0)
+        # Identical tapes give identical results
+        # Stejné pásky dávají stejné výsledky
+        self.assertEqual(data['titles'][0]['screen_hash'], data['titles'][1]['screen_hash'])
+        self.assertEqual(data['titles'][0]['registers'], data['titles'][1]['registers'])
+
+    def test_too_few_frames(self):
+        # Boot (2) and LOAD "" (4 combinations x 10 frames) leave nothing to run
+        # Start a LOAD "" nenechají nic k běhu
+        self.assertEqual(batch_runner.setup_frames(False, 2), 42)
+        with self.assertRaises(ValueError):
+            batch_runner.run_batch([os.path.join(self.directory, 'a.tap')], 42, rom=self.rom,
+                                   boot_frames=2)
+        argv = ['batch_runner.py', self.directory, '--frames', '42', '--rom', self.rom,
+                '--boot-frames', '2']
+        with mock.patch.object(sys, 'argv', argv), mock.patch('sys.stderr'):
+            with self.assertRaises(SystemExit):
+                batch_runner.main()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+import bench_suite
+
+class TestBenchSuite(unittest.TestCase):
+    def test_workloads_report_metrics(self):
+        names = [name for name in bench_suite.WORKLOADS if name != 'boot48']
+        suite = bench_suite.run_suite(names, frames=2)
+        self.assertEqual(list(suite['results']), names)
+        for name, result in suite['results'].items():
+            self.assertEqual(result['frames'], 2)
+            self.assertGreater(result['fps'], 0)
+            self.assertGreaterEqual(result['alloc_kib_per_frame'], 0)
+            if name in ('render', 'audio_events'):
+                self.assertIsNone(result['mhz'])
+            else:
+                self.assertGreater(result['mhz'], 0)
+        self.assertIn('ldir', bench_suite.format_results(suite))
+
+    def test_missing_rom_is_reported(self):
+        with mock.patch.object(bench_suite, 'ROM_DIR', os.path.join(os.sep, 'nonexistent')):
+            suite = bench_suite.run_suite(['boot48'], frames=1)
+        self.assertIn('error', suite['results']['boot48'])
+        self.assertIn('skipped', bench_suite.format_results(suite))
+
+    def test_compare_flags_regressions(self):
+        def suite(fps, alloc):
+            return {'results': {'ldir': {'fps': fps, 'alloc_kib_per_frame': alloc},
+                                'boot48': {'error': 'no ROM'}}}
+        baseline = suite(100.0, 10.0)
+        self.assertEqual(bench_suite.compare(suite(95.0, 10.5), baseline), [])
+        regressions = bench_suite.compare(suite(80.0, 10.0), baseline)
+        self.assertEqual([name for name, _ in regressions], ['ldir'])
+        self.assertIn('-20.0%', regressions[0][1])
+        regressions = bench_suite.compare(suite(100.0, 20.0), baseline)
+        self.assertIn('KiB/frame', regressions[0][1])
+        self.assertEqual(bench_suite.compare(suite(80.0, 10.0), baseline, threshold=0.25), [])
+
+if __name__ == '__main__':
+    unittest.main()
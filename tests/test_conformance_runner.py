@@ -0,0 +1,178 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import conformance_runner
+from src.cpu import Z80
+from src.memory import Memory
+
+class FlatMemory(Memory):
+    def write_byte(self, address, value):
+        self.memory[address & 0xFFFF] = value & 0xFF
+
+class PortStub:
+    def __init__(self, value):
+        self.value = value
+        self.writes = []
+
+    def read_byte(self, port, cycles=0):
+        return self.value
+
+    def write_byte(self, port, value):
+        self.writes.append([port, value, 'w'])
+
+def make_case(name, code, rng, hl=None, **registers):
+    """
+    SingleStepTests-style case; the expected state comes from a fresh CPU
+    (what tests/test_standard_z80.py does for every case).
+    """
+    initial = {reg: rng.randrange(256) for reg in ('a', 'f', 'b', 'c', 'd', 'e', 'h', 'l', 'i', 'r')}
+    initial.update(pc=rng.randrange(0x8000, 0xF000), sp=rng.randrange(0x10000),
+                   ix=rng.randrange(0x10000), iy=rng.randrange(0x10000), wz=0, q=0,
+                   im=1, iff1=0, iff2=0, af_=0x1234, bc_=0x5678, de_=0x9ABC, hl_=0xDEF0)
+    if hl is not None:
+        initial['h'], initial['l'] = hl >> 8, hl & 0xFF
+    initial.update(registers)
+    initial['ram'] = [[initial['pc'] + i, byte] for i, byte in enumerate(code)]
+    port_value = rng.randrange(256)
+
+    memory = FlatMemory()
+    io = PortStub(port_value)
+    cpu = Z80(memory, io_bus=io)
+    for reg in ('a', 'f', 'b', 'c', 'd', 'e', 'h', 'l', 'i', 'r', 'pc', 'sp', 'ix', 'iy',
+                'wz', 'q', 'im', 'iff1', 'iff2'):
+        setattr(cpu, reg, initial[reg])
+    for pair in ('af_', 'bc_', 'de_', 'hl_'):
+        setattr(cpu, pair[0] + '_alt', initial[pair] >> 8)
+        setattr(cpu, pair[1] + '_alt', initial[pair] & 0xFF)
+    for address, value in initial['ram']:
+        memory.write_byte(address, value)
+    cpu.step()
+
+    final = {reg: getattr(cpu, reg) for reg in ('a', 'f', 'b', 'c', 'd', 'e', 'h', 'l', 'i', 'r',
+                                                'pc', 'sp', 'ix', 'iy', 'wz', 'im', 'iff1', 'iff2')}
+    for pair in ('af_', 'bc_', 'de_', 'hl_'):
+        final[pair] = (getattr(cpu, pair[0] + '_alt') << 8) | getattr(cpu, pair[1] + '_alt')
+    final['ram'] = [[address, memory.read_byte(address)] for address, _ in initial['ram']]
+    if hl is not None:
+        final['ram'].append([hl, memory.read_byte(hl)])
+    ports = [[0x10FE, port_value, 'r']] + io.writes
+    return {'name': name, 'initial': initial, 'final': final, 'cycles': [], 'ports': ports}
+
+class TestConformanceRunner(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = os.path.join(self.directory, '.cache')
+        rng = random.Random(7)
+        opcodes = {'00': [0x00], '3c': [0x3C], '77': [0x77], 'cb46': [0xCB, 0x46],
+                   'd3': [0xD3, 0x55], 'db': [0xDB, 0x55]}
+        for name, code in opcodes.items():
+            cases = [make_case(f"{name} {k:04d}", code, rng, hl=0x9000 + k) for k in range(20)]
+            self.write(name, cases)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, cases):
+        with open(os.path.join(self.directory, name + '.json'), 'w') as f:
+            json.dump(cases, f)
+
+    def run_suite(self, **kwargs):
+        paths = conformance_runner.find_test_files(self.directory)
+        kwargs.setdefault('workers', 0)
+        return {r['file']: r for r in conformance_runner.run_suite(paths, **kwargs)}
+
+    def test_all_cases_pass(self):
+        results = self.run_suite()
+        self.assertEqual(len(results), 6)
+        for result in results.values():
+            self.assertEqual((result['cases'], result['failed']), (20, 0), result['failures'])
+
+    def test_reports_mismatches(self):
+        with open(os.path.join(self.directory, '3c.json')) as f:
+            cases = json.load(f)
+        cases[3]['final']['a'] ^= 0xFF
+        cases[5]['final']['ram'][0][1] ^= 0x01
+        self.write('3c', cases)
+
+        result = self.run_suite()['3c.json']
+        self.assertEqual(result['failed'], 2)
+        self.assertIn("3c 0003", result['failures'][0])
+        self.assertIn("a: expected", result['failures'][0])
+        self.assertIn("RAM[", result['failures'][1])
+
+    def test_ram_is_reset_between_cases(self):
+        # The first case stores A at 0x9000, the second reads 0x9000 without
+        # setting it and must see 0 as on a fresh CPU
+        rng = random.Random(1)
+        cases = [make_case("77 0000", [0x77], rng, hl=0x9000, a=0x55),
+                 make_case("7e 0000", [0x7E], rng, hl=0x9000)]
+        self.assertEqual(cases[0]['final']['ram'][-1], [0x9000, 0x55])
+        self.assertEqual(cases[1]['final']['a'], 0)
+        self.write('7e', cases)
+
+        result = self.run_suite()['7e.json']
+        self.assertEqual(result['failed'], 0, result['failures'])
+
+    def test_parallel_matches_serial(self):
+        serial = self.run_suite()
+        parallel = self.run_suite(workers=2)
+        for name, result in serial.items():
+            self.assertEqual(parallel[name]['cases'], result['cases'])
+            self.assertEqual(parallel[name]['failed'], result['failed'])
+
+    def test_incremental_skips_unchanged_files(self):
+        first = self.run_suite(cache_dir=self.cache)
+        self.assertFalse(any(r.get('skipped') for r in first.values()))
+        self.assertTrue(os.path.exists(os.path.join(self.cache, '00.json.npz')))
+
+        second = self.run_suite(cache_dir=self.cache)
+        self.assertTrue(all(r.get('skipped') for r in second.values()))
+        self.assertEqual(second['00.json']['cases'], 20)
+
+        # A changed JSON file and a changed handler fingerprint are run again
+        with open(os.path.join(self.directory, 'db.json')) as f:
+            cases = json.load(f)
+        self.write('db', cases[:10])
+        state_path = os.path.join(self.cache, 'state-python.json')
+        with open(state_path) as f:
+            state = json.load(f)
+        self.assertIn('src/cpu.py:Z80._bit', state['cb46.json']['dependencies'])
+        self.assertNotIn('src/cpu.py:Z80._bit', state['00.json']['dependencies'])
+        state['cb46.json']['dependencies']['src/cpu.py:Z80._bit'] = 'changed'
+        with open(state_path, 'w') as f:
+            json.dump(state, f)
+
+        third = self.run_suite(cache_dir=self.cache)
+        rerun = sorted(name for name, r in third.items() if not r.get('skipped'))
+        self.assertEqual(rerun, ['cb46.json', 'db.json'])
+        self.assertEqual(third['db.json']['cases'], 10)
+
+        forced = self.run_suite(cache_dir=self.cache, force=True)
+        self.assertFalse(any(r.get('skipped') for r in forced.values()))
+
+    def test_failed_files_are_run_again(self):
+        with open(os.path.join(self.directory, '00.json')) as f:
+            cases = json.load(f)
+        cases[0]['final']['pc'] ^= 1
+        self.write('00', cases)
+        self.run_suite(cache_dir=self.cache)
+        again = self.run_suite(cache_dir=self.cache)
+        self.assertFalse(again['00.json'].get('skipped'))
+        self.assertEqual(again['00.json']['failed'], 1)
+
+    def test_binary_cache_round_trip(self):
+        path = os.path.join(self.directory, 'd3.json')
+        parsed = list(conformance_runner.iter_cases(conformance_runner.parse_test_file(path)))
+        conformance_runner.load_test_file(path, self.cache)
+        cached = list(conformance_runner.iter_cases(conformance_runner.load_test_file(path, self.cache)))
+        self.assertEqual(parsed, cached)
+        name, _, _, _, _, reads, writes = cached[0]
+        self.assertEqual(name, "d3 0000")
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(len(writes), 1)
+
+if __name__ == '__main__':
+    unittest.main()
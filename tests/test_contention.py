@@ -120,5 +120,27 @@ class TestContention(unittest.TestCase):
         delay = self.ula.get_contention(14336, 0x4001, is_io=True)
         self.assertEqual(delay, 12)
 
+    def test_contention_table_matches_calculation(self):
+        # The precomputed tables must match the per-cycle calculation
+        # Předvypočtené tabulky musí odpovídat výpočtu po taktech
+        for cycle in range(0, self.ula.CYCLES_PER_FRAME, 7):
+            self.assertEqual(self.ula.contention_table[cycle], self.ula._calculate_contention(cycle))
+        # Cycles beyond the frame wrap around
+        self.assertEqual(self.ula.get_contention(14336 + 69888, 0x4000), 6)
+
+    def test_128k_contended_pages(self):
+        # Paging in an odd bank makes 0xC000-0xFFFF contended
+        # Stránkování liché banky zapne kolize na 0xC000-0xFFFF
+        memory = Memory(is_128k=True)
+        ula = ULA(memory, is_128k=True)
+        cycle = ula.SCREEN_START_CYCLE
+        self.assertEqual(ula.get_contention(cycle, 0xC000), 0)
+        memory.write_port_7ffd(0x03)
+        self.assertEqual(memory.contended_pages, [0, 1, 0, 1])
+        self.assertEqual(ula.get_contention(cycle, 0xC000), 6)
+        self.assertEqual(ula.get_contention(cycle, 0xC001, is_io=True), 12)
+        memory.write_port_7ffd(0x04)
+        self.assertEqual(ula.get_contention(cycle, 0xC000), 0)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from src.cpu import Z80
+from src.memory import Memory
+
+class TestCPUDispatch(unittest.TestCase):
+    def setUp(self):
+        self.memory = Memory()
+        self.cpu = Z80(self.memory)
+        self.cpu.pc = 0x8000
+
+    def load(self, code):
+        for i, b in enumerate(code):
+            self.memory.write_byte(0x8000 + i, b)
+
+    def test_prefix_tables_are_complete(self):
+        """Every prefix has a full 256-entry table of callables"""
+        for name in ['opcodes_cb', 'opcodes_ed', 'opcodes_dd', 'opcodes_fd', 'opcodes_ddcb', 'opcodes_fdcb']:
+            table = getattr(self.cpu, name)
+            self.assertEqual(len(table), 256, name)
+            self.assertTrue(all(callable(h) for h in table), name)
+
+    def test_index_table_falls_back_to_unprefixed(self):
+        """DD/FD opcodes without an index form reuse the unprefixed handler"""
+        # DD 3C is plain INC A
+        self.cpu.a = 0x41
+        self.load([0xDD, 0x3C])
+        self.cpu.step()
+        self.assertEqual(self.cpu.a, 0x42)
+        self.assertEqual(self.cpu.pc, 0x8002)
+
+    def test_fd_uses_iy_halves(self):
+        """FD 7C is LD A, IYH"""
+        self.cpu.iy = 0xBEEF
+        self.load([0xFD, 0x7C])
+        self.cpu.step()
+        self.assertEqual(self.cpu.a, 0xBE)
+
+    def test_ddcb_set_on_memory(self):
+        """DD CB d C6 is SET 0, (IX+d)"""
+        self.cpu.ix = 0x9000
+        self.memory.write_byte(0x8FFE, 0x80)
+        self.load([0xDD, 0xCB, 0xFE, 0xC6])
+        self.cpu.step()
+        self.assertEqual(self.memory.read_byte(0x8FFE), 0x81)
+        self.assertEqual(self.cpu.pc, 0x8004)
+
+    def test_fdcb_bit_uses_effective_address_for_bits_5_3(self):
+        """FD CB d 46 is BIT 0, (IY+d); undocumented bits 5/3 come from address high byte"""
+        self.cpu.iy = 0xA800
+        self.memory.write_byte(0xA801, 0x00)
+        self.load([0xFD, 0xCB, 0x01, 0x46])
+        self.cpu.step()
+        self.assertTrue(self.cpu.f & 0x40) # Z set (bit clear)
+        self.assertEqual(self.cpu.f & 0x28, 0xA8 & 0x28)
+
+    def test_cb_hl_indirect(self):
+        """CB 3E is SRL (HL)"""
+        self.cpu.hl = 0x9000
+        self.memory.write_byte(0x9000, 0x03)
+        self.load([0xCB, 0x3E])
+        self.cpu.step()
+        self.assertEqual(self.memory.read_byte(0x9000), 0x01)
+        self.assertTrue(self.cpu.f & 0x01)
+
+    def test_ed_in_flags_only_and_out_zero(self):
+        """ED 70 reads into flags only, ED 71 outputs zero"""
+        class IO:
+            def __init__(self):
+                self.writes = []
+            def read_byte(self, port, cycles=0):
+                return 0x00
+            def write_byte(self, port, value):
+                self.writes.append((port, value))
+        io = IO()
+        self.cpu.io_bus = io
+        self.cpu.bc = 0x12FE
+        self.cpu.a = 0x55
+        self.load([0xED, 0x70, 0xED, 0x71])
+        self.cpu.step()
+        self.assertEqual(self.cpu.a, 0x55)
+        self.assertTrue(self.cpu.f & 0x40) # Z from input value
+        self.cpu.step()
+        self.assertEqual(io.writes, [(0x12FE, 0)])
+
+if __name__ == '__main__':
+    unittest.main()
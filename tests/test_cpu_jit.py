@@ -0,0 +1,111 @@
+import unittest
+from src.cpu import Z80
+from src.cpu_jit import JitZ80, NUMBA_AVAILABLE
+from src.memory import Memory
+from src.io import IOBus
+from src.ula import ULA
+from src.hardware_128k import Hardware128K
+
+@unittest.skipUnless(NUMBA_AVAILABLE, "numba not installed")
+class TestJitZ80(unittest.TestCase):
+    """
+    The compiled core must end in exactly the same state as the Python Z80.
+    """
+    # LD HL,0x4000 / LD B,0x10 / LD (HL),B / INC HL / ADD A,(HL) / DJNZ -4 /
+    # IN A,(0xFE) / OUT (0xFE),A / LD IX,0x9000 / RLC (IX+2) / LDIR / JR -23
+    PROGRAM = [0x21, 0x00, 0x40, 0x06, 0x10, 0x70, 0x23, 0x86, 0x10, 0xFB,
+               0xDB, 0xFE, 0xD3, 0xFE, 0xDD, 0x21, 0x00, 0x90, 0xDD, 0xCB,
+               0x02, 0x06, 0xED, 0xB0, 0x18, 0xE9]
+
+    def make_machine(self, cls, is_128k=False, code=None):
+        memory = Memory(is_128k=is_128k)
+        io_bus = IOBus()
+        ula = ULA(memory, is_128k=is_128k)
+        io_bus.add_device(ula)
+        if is_128k:
+            io_bus.add_device(Hardware128K(memory))
+        cpu = cls(memory, io_bus)
+        cpu.ula = ula
+        ula.set_cpu(cpu)
+        for i, b in enumerate(code or self.PROGRAM):
+            memory.write_byte(0x8000 + i, b)
+        cpu.pc = 0x8000
+        cpu.sp = 0xFF00
+        cpu.de = 0xA000
+        cpu.bc = 0x0040
+        return cpu, memory
+
+    def state(self, cpu):
+        return (cpu.a, cpu.f, cpu.bc, cpu.de, cpu.hl, cpu.ix, cpu.iy, cpu.pc,
+                cpu.sp, cpu.r, cpu.q, cpu.wz, cpu.cycles, cpu.halted)
+
+    def test_step_matches_python_core(self):
+        """Each step() leaves the same registers and T-states (contention included)"""
+        ref, ref_mem = self.make_machine(Z80)
+        cpu, memory = self.make_machine(JitZ80)
+        for i in range(2000):
+            ref.step()
+            cpu.step()
+            self.assertEqual(self.state(cpu), self.state(ref), f"step {i}")
+        for addr in range(0x4000, 0x4020):
+            self.assertEqual(memory.read_byte(addr), ref_mem.read_byte(addr))
+
+    def test_run_until_matches_python_core(self):
+        """run_until/run_frame reach the same state as the Python loop"""
+        for is_128k in (False, True):
+            ref, _ = self.make_machine(Z80, is_128k)
+            cpu, _ = self.make_machine(JitZ80, is_128k)
+            for target in (5, 1000, 69888):
+                ref.run_until(target)
+                cpu.run_until(target)
+                self.assertEqual(self.state(cpu), self.state(ref), f"128K={is_128k} target {target}")
+            ref.run_frame()
+            cpu.run_frame()
+            self.assertEqual(self.state(cpu), self.state(ref))
+
+    def test_128k_paging(self):
+        """OUT to 0x7FFD is serviced by Python and remaps the compiled view"""
+        # LD BC,0x7FFD / LD A,3 / OUT (C),A / LD A,(0xC000) / HALT
+        code = [0x01, 0xFD, 0x7F, 0x3E, 0x03, 0xED, 0x79, 0x3A, 0x00, 0xC0, 0x76]
+        cpu, memory = self.make_machine(JitZ80, True, code)
+        memory.ram_banks[3][0] = 0x5A
+        cpu.run_until(100)
+        self.assertEqual(memory.current_ram_bank, 3)
+        self.assertEqual(cpu.a, 0x5A)
+
+    def test_port_read(self):
+        """IN A,(n) goes through the IOBus (keyboard half-row)"""
+        cpu, _ = self.make_machine(JitZ80, code=[0x3E, 0xFE, 0xDB, 0xFE]) # LD A,0xFE / IN A,(0xFE)
+        cpu.ula.set_key(0xFE, 1, True) # Z
+        cpu.step()
+        cpu.step()
+        self.assertEqual(cpu.a & 0x1F, 0x1D)
+
+    def test_rom_writable(self):
+        """ROM is read-only unless rom_writable is set"""
+        cpu, memory = self.make_machine(JitZ80, code=[0x32, 0x00, 0x00]) # LD (0),A
+        cpu.a = 0x77
+        cpu.step()
+        self.assertEqual(memory.read_byte(0x0000), 0x00)
+        cpu.pc = 0x8000
+        cpu.rom_writable = True
+        cpu.step()
+        self.assertEqual(memory.memory[0x0000], 0x77)
+
+    def test_trap_addresses(self):
+        """Traps leave the compiled loop and call check_traps"""
+        hits = []
+        class TrapJitZ80(JitZ80):
+            def check_traps(self):
+                hits.append(self.pc)
+                self.pc = 0x8003 # skip to the last NOP
+                return True
+        cpu = TrapJitZ80(Memory())
+        cpu.pc = 0x8000
+        cpu.trap_addresses = {0x8001}
+        cpu.run_until(8)
+        self.assertEqual(hits, [0x8001])
+        self.assertEqual(cpu.pc, 0x8004)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from src.cpu import Z80
+from src.memory import Memory
+
+class TestQRegister(unittest.TestCase):
+    def setUp(self):
+        self.memory = Memory()
+        self.cpu = Z80(self.memory)
+        self.cpu.pc = 0x8000
+
+    def run_code(self, code, steps=1):
+        for i, b in enumerate(code):
+            self.memory.write_byte(self.cpu.pc + i, b)
+        for _ in range(steps):
+            self.cpu.step()
+
+    def test_register_file_uses_slots(self):
+        """Z80 has a fixed slot layout without a per-instance __dict__"""
+        self.assertFalse(hasattr(self.cpu, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.cpu.not_a_register = 1
+
+    def test_flag_writer_latches_f(self):
+        """XOR A writes F, so Q = F"""
+        self.run_code([0xAF]) # XOR A
+        self.assertEqual(self.cpu.q, self.cpu.f)
+        self.assertNotEqual(self.cpu.q, 0)
+
+    def test_non_flag_instruction_clears_q(self):
+        """LD B, C leaves F alone, so Q = 0"""
+        self.cpu.q = 0x55
+        self.run_code([0x41]) # LD B, C
+        self.assertEqual(self.cpu.q, 0)
+
+    def test_prefixed_instructions(self):
+        """CB/ED/DD/DDCB dispatchers update Q from their own tables"""
+        self.cpu.b = 0x80
+        self.run_code([0xCB, 0x00]) # RLC B writes F
+        self.assertEqual(self.cpu.q, self.cpu.f)
+
+        self.run_code([0xCB, 0xC0]) # SET 0, B leaves F
+        self.assertEqual(self.cpu.q, 0)
+
+        self.run_code([0xED, 0x44]) # NEG writes F
+        self.assertEqual(self.cpu.q, self.cpu.f)
+
+        self.run_code([0xDD, 0x21, 0x00, 0x90]) # LD IX, nn leaves F
+        self.assertEqual(self.cpu.q, 0)
+
+        self.run_code([0xDD, 0x09]) # ADD IX, BC writes F
+        self.assertEqual(self.cpu.q, self.cpu.f)
+
+        self.run_code([0xDD, 0xCB, 0x00, 0xC6]) # SET 0, (IX+0) leaves F
+        self.assertEqual(self.cpu.q, 0)
+
+    def test_ex_af_latches_f(self):
+        """EX AF, AF' loads F directly and therefore counts as a flag write"""
+        self.cpu.f_alt = 0x28
+        self.run_code([0x08])
+        self.assertEqual(self.cpu.f, 0x28)
+        self.assertEqual(self.cpu.q, 0x28)
+
+    def test_scf_uses_q(self):
+        """SCF takes bits 5/3 from (Q ^ F) | A"""
+        # After a flag write Q == F, so only A contributes bits 5 and 3
+        self.cpu.a = 0x00
+        self.cpu.f = 0x28
+        self.cpu.q = 0x28
+        self.run_code([0x37]) # SCF
+        self.assertEqual(self.cpu.f & 0x28, 0x00)
+
+        # After a non-flag instruction Q == 0, so F contributes too
+        self.cpu.f = 0x28
+        self.cpu.a = 0x00
+        self.run_code([0x00, 0x37], steps=2) # NOP, SCF
+        self.assertEqual(self.cpu.f & 0x28, 0x28)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from src.cpu import Z80, REGISTER_HANDLERS
+from src.memory import Memory
+
+def reference_alu_op(cpu, op_index, value):
+    """
+    Reference for the generated ALU handlers: the generic dispatch they replaced.
+    op_index: 0=ADD, 1=ADC, 2=SUB, 3=SBC, 4=AND, 5=XOR, 6=OR, 7=CP
+    """
+    ops = [lambda v: cpu._add_val(v, False), lambda v: cpu._add_val(v, True),
+           lambda v: cpu._sub_val(v, False), lambda v: cpu._sub_val(v, True),
+           cpu._and_val, cpu._xor_val, cpu._or_val, cpu._cp_val]
+    ops[op_index](value)
+
+class TestRegisterHandlers(unittest.TestCase):
+    """
+    The generated register handlers must behave exactly like the generic
+    helpers (the ALU dispatch below, _inc_r, _dec_r) they replace.
+    """
+    def setUp(self):
+        self.memory = Memory()
+        self.cpu = Z80(self.memory)
+        self.ref = Z80(Memory())
+
+    def test_handlers_are_bound(self):
+        """Every generated handler is installed in the unprefixed table"""
+        for opcode, func in REGISTER_HANDLERS.items():
+            self.assertIs(self.cpu.opcodes[opcode].__func__, func)
+        # HALT sits in the middle of the LD block and must not be replaced
+        self.assertEqual(self.cpu.opcodes[0x76], self.cpu._halt)
+
+    def test_alu_matches_generic_helper(self):
+        """ADD/ADC/SUB/SBC/AND/XOR/OR/CP A, B against the generic ALU dispatch"""
+        values = list(range(0, 256, 15)) + [0x7F, 0x80, 0xFF]
+        for op_index in range(8):
+            handler = self.cpu.opcodes[0x80 + (op_index << 3)] # A, B form
+            for a in values:
+                for b in values:
+                    for f in (0x00, 0x01):
+                        self.cpu.a, self.cpu.b, self.cpu.f = a, b, f
+                        self.ref.a, self.ref.b, self.ref.f = a, b, f
+                        handler()
+                        reference_alu_op(self.ref, op_index, self.ref.b)
+                        self.assertEqual((self.cpu.a, self.cpu.f), (self.ref.a, self.ref.f),
+                                         f"op {op_index} a={a:02X} b={b:02X} f={f:02X}")
+
+    def test_inc_dec_match_generic_helper(self):
+        """INC C / DEC C against _inc_r / _dec_r for every value"""
+        for val in range(256):
+            for f in (0x00, 0x01):
+                self.cpu.c, self.cpu.f = val, f
+                self.ref.c, self.ref.f = val, f
+                self.cpu.opcodes[0x0C]()
+                self.ref._inc_r('c')
+                self.assertEqual((self.cpu.c, self.cpu.f), (self.ref.c, self.ref.f))
+
+                self.cpu.c, self.cpu.f = val, f
+                self.ref.c, self.ref.f = val, f
+                self.cpu.opcodes[0x0D]()
+                self.ref._dec_r('c')
+                self.assertEqual((self.cpu.c, self.cpu.f), (self.ref.c, self.ref.f))
+
+    def test_inc_hl_indirect(self):
+        """INC (HL) (0x34) updates memory and keeps carry"""
+        self.cpu.hl = 0x9000
+        self.cpu.f = 0x01
+        self.memory.write_byte(0x9000, 0x7F)
+        self.cpu.opcodes[0x34]()
+        self.assertEqual(self.memory.read_byte(0x9000), 0x80)
+        self.assertEqual(self.cpu.f & 0x01, 0x01) # C preserved
+        self.assertTrue(self.cpu.f & 0x04) # Overflow
+        self.assertTrue(self.cpu.f & 0x10) # Half carry
+
+    def test_ld_r_hl_indirect(self):
+        """LD E, (HL) (0x5E) and LD (HL), D (0x72)"""
+        self.cpu.hl = 0x9000
+        self.memory.write_byte(0x9000, 0x5A)
+        self.cpu.opcodes[0x5E]()
+        self.assertEqual(self.cpu.e, 0x5A)
+        self.cpu.d = 0xA5
+        self.cpu.opcodes[0x72]()
+        self.assertEqual(self.memory.read_byte(0x9000), 0xA5)
+
+if __name__ == '__main__':
+    unittest.main()
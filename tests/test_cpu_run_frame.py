@@ -0,0 +1,74 @@
+import unittest
+from src.cpu import Z80
+from src.memory import Memory
+
+class TestRunFrame(unittest.TestCase):
+    """
+    run_until/run_frame must produce the same machine state as a step() loop.
+    """
+    # Small loop: LD B,0x20 / INC A / ADD HL,BC / LDI / DJNZ -5 / JR -9
+    PROGRAM = [0x06, 0x20, 0x3C, 0x09, 0xED, 0xA0, 0x10, 0xFA, 0x18, 0xF6]
+
+    def make_cpu(self, code):
+        memory = Memory()
+        cpu = Z80(memory)
+        for i, b in enumerate(code):
+            memory.write_byte(0x8000 + i, b)
+        cpu.pc = 0x8000
+        cpu.sp = 0xFF00
+        cpu.hl = 0x9000
+        cpu.de = 0xA000
+        return cpu, memory
+
+    def state(self, cpu):
+        return (cpu.a, cpu.f, cpu.bc, cpu.de, cpu.hl, cpu.pc, cpu.sp,
+                cpu.r, cpu.q, cpu.wz, cpu.cycles, cpu.halted)
+
+    def test_matches_step_loop(self):
+        """run_until ends in the same state as step() in a loop"""
+        for target in (1, 7, 100, 5000):
+            ref, _ = self.make_cpu(self.PROGRAM)
+            cpu, _ = self.make_cpu(self.PROGRAM)
+            while ref.cycles < target:
+                ref.step()
+            cpu.run_until(target)
+            self.assertEqual(self.state(cpu), self.state(ref), f"target {target}")
+
+    def test_halt_fast_forward(self):
+        """A halted CPU advances in 4 T-state steps, like the step() loop"""
+        for target in (10, 11, 12, 13, 69888):
+            ref, _ = self.make_cpu([0x76]) # HALT
+            cpu, _ = self.make_cpu([0x76])
+            while ref.cycles < target:
+                ref.step()
+            cpu.run_until(target)
+            self.assertTrue(cpu.halted)
+            self.assertEqual(self.state(cpu), self.state(ref), f"target {target}")
+
+    def test_trap_addresses(self):
+        """run_until honours the trap address set"""
+        hits = []
+        class TrapZ80(Z80):
+            def check_traps(self):
+                hits.append(self.pc)
+                self.pc = 0x8003 # skip to the last NOP
+                return True
+        memory = Memory()
+        cpu = TrapZ80(memory)
+        cpu.pc = 0x8000
+        cpu.trap_addresses = {0x8001}
+        cpu.run_until(8)
+        self.assertEqual(hits, [0x8001])
+        self.assertEqual(cpu.pc, 0x8004)
+
+    def test_run_frame_raises_interrupt(self):
+        """run_frame executes a frame and then accepts the interrupt"""
+        cpu, memory = self.make_cpu([0xFB, 0x76]) # EI, HALT
+        cpu.im = 1
+        cpu.run_frame(1000)
+        self.assertGreaterEqual(cpu.cycles, 1000)
+        self.assertFalse(cpu.halted)
+        self.assertEqual(cpu.pc, 0x0038)
+
+if __name__ == '__main__':
+    unittest.main()
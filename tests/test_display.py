@@ -0,0 +1,39 @@
+import unittest
+import numpy as np
+from src.memory import Memory
+from src.ula import ULA
+from src.display import scale_indexed
+
+class TestDisplay(unittest.TestCase):
+    def setUp(self):
+        self.memory = Memory()
+        self.ula = ULA(self.memory, indexed=True)
+        # Fake surface colours: index i -> 0x100 + i
+        self.palette = np.arange(16, dtype=np.uint32) + 0x100
+
+    def test_scale_indexed_full_frame(self):
+        """Each frame pixel becomes a scale x scale block in the window"""
+        self.memory.write_byte(0x4000, 0xF0)
+        self.memory.write_byte(0x5800, 0x0A) # Ink 2, paper 1
+        self.ula.add_border_event(0, 3)
+        self.ula.render_screen()
+        # pixels2d arrays are indexed [x, y] and not C-contiguous
+        window = np.zeros((256 * 3, 320 * 3), dtype=np.uint32).T
+        for rect in self.ula.dirty_rects:
+            scale_indexed(window, self.ula.screen_buffer, self.palette, rect, 3)
+        expected = self.palette[self.ula.screen_buffer].repeat(3, axis=0).repeat(3, axis=1).T
+        self.assertTrue((window == expected).all())
+        self.assertEqual(window[0, 0], 0x103) # Border
+        self.assertEqual(window[32 * 3, 32 * 3], 0x102) # Ink
+        self.assertEqual(window[36 * 3 + 2, 32 * 3 + 2], 0x101) # Paper
+
+    def test_scale_indexed_rect_only(self):
+        """Only the given rectangle is written"""
+        self.ula.render_screen()
+        window = np.zeros((320 * 2, 256 * 2), dtype=np.uint32)
+        scale_indexed(window, self.ula.screen_buffer, self.palette, (40, 48, 8, 8), 2)
+        self.assertEqual(np.count_nonzero(window), 16 * 16)
+        self.assertTrue((window[80:96, 96:112] != 0).all())
+
+if __name__ == '__main__':
+    unittest.main()
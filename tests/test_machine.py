@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+from src.machine import Machine
+
+# DI / LD A,1 / OUT (0xFE),A / LD HL,0x4000 / LD (HL),0xFF / HALT
+PROGRAM = bytes([0xF3, 0x3E, 0x01, 0xD3, 0xFE, 0x21, 0x00, 0x40, 0x36, 0xFF, 0x76])
+
+class TestMachine(unittest.TestCase):
+    def test_run_captures_video(self):
+        machine = Machine(rom=PROGRAM)
+        video, audio = machine.run(2, capture_video=True)
+        self.assertIsNone(audio)
+        self.assertEqual(video.shape, (2, 256, 320))
+        self.assertEqual(machine.frame_count, 2)
+        # Blue border, first 8 pixels of the screen set (ink 0 on paper 0)
+        # Modrý okraj, prvních 8 pixelů obrazovky nastaveno
+        self.assertTrue((video[1, 0] == 1).all())
+        self.assertEqual(machine.memory.read_byte(0x4000), 0xFF)
+        self.assertGreaterEqual(machine.cpu.cycles, 2 * machine.frame_cycles)
+
+    def test_run_captures_audio(self):
+        machine = Machine(rom=PROGRAM)
+        _, audio = machine.run(50, capture_audio=True)
+        # One emulated second of samples
+        # Vzorky jedné emulované sekundy
+        self.assertEqual(audio.shape, (int(50 * 44100 / machine.fps), 2))
+
+    def test_headless_skips_output(self):
+        # Without capture the event queues are consumed, not accumulated
+        # Bez záznamu se fronty událostí spotřebují, nehromadí
+        machine = Machine(is_128k=True, rom=PROGRAM)
+        video, audio = machine.run(3)
+        self.assertIsNone(video)
+        self.assertIsNone(audio)
+        self.assertEqual(machine.ula.border_event_count, 0)
+        self.assertEqual(machine.ula.audio_event_count, 0)
+        self.assertEqual(machine.ula.last_frame_border_color, 1)
+        self.assertEqual(machine.hw128.ay.write_log, [])
+
+if __name__ == '__main__':
+    unittest.main()
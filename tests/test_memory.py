@@ -42,5 +42,21 @@ class TestMemory(unittest.TestCase):
         self.memory.write_byte(ram_addr, 0x55)
         self.assertEqual(self.memory.read_byte(ram_addr), 0x55)
 
+    def test_page_table_shares_buffer(self):
+        """48K pages are views of the flat 64K buffer."""
+        self.memory.write_byte(0xC001, 0x42)
+        self.assertEqual(self.memory.memory[0xC001], 0x42)
+        self.assertEqual(self.memory.pages[3][0x0001], 0x42)
+        self.memory.memory[0x4000] = 0x24
+        self.assertEqual(self.memory.read_byte(0x4000), 0x24)
+
+    def test_screen_data_is_view(self):
+        """Screen bank access returns the same persistent view, not a copy."""
+        screen = self.memory.get_screen_data()
+        self.assertIs(screen, self.memory.get_screen_data())
+        self.assertIs(screen, self.memory.get_bank_data(5))
+        self.memory.write_byte(0x5800, 0x38)
+        self.assertEqual(screen[0x1800], 0x38)
+
 if __name__ == '__main__':
     unittest.main()
@@ -42,5 +42,24 @@ class TestMemory128KFix(unittest.TestCase):
         self.assertEqual(self.memory.screen_bank, 7)
         self.assertEqual(self.memory.current_rom_bank, 1)
 
+    def test_page_table(self):
+        # The page table holds the banks mapped into the four 16K slots
+        # Tabulka stránek obsahuje banky namapované do čtyř 16K slotů
+        pages = self.memory.pages
+        self.assertIs(pages[0], self.memory.rom_banks[0])
+        self.assertIs(pages[1], self.memory.ram_banks[5])
+        self.assertIs(pages[2], self.memory.ram_banks[2])
+        self.assertIs(pages[3], self.memory.ram_banks[0])
+        self.assertEqual(self.memory.writable, [False, True, True, True])
+
+        # 0x13 -> RAM 3 at 0xC000, ROM 1 at 0x0000
+        self.memory.write_port_7ffd(0x13)
+        self.assertIs(self.memory.pages[0], self.memory.rom_banks[1])
+        self.assertIs(self.memory.pages[3], self.memory.ram_banks[3])
+        self.memory.write_byte(0xFFFF, 0x99)
+        self.assertEqual(self.memory.ram_banks[3][0x3FFF], 0x99)
+        self.memory.write_byte(0x0000, 0x99)
+        self.assertEqual(self.memory.rom_banks[1][0], 0x00)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,100 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from src.cpu import Z80
+from src.cpu_jit import JitZ80, NUMBA_AVAILABLE
+from src.memory import Memory
+from src.profiler import OpcodeProfiler
+
+# LD B,4 / loop: INC A / CB: BIT 0,(HL) / DD CB 02 46: BIT 0,(IX+2) / ED 44: NEG / DJNZ loop / HALT
+PROGRAM = [0x06, 0x04, 0x3C, 0xCB, 0x46, 0xDD, 0xCB, 0x02, 0x46, 0xED, 0x44, 0x10, 0xF5, 0x76]
+
+def make_cpu():
+    memory = Memory()
+    memory.memory[0x8000:0x8000 + len(PROGRAM)] = bytes(PROGRAM)
+    cpu = Z80(memory)
+    cpu.pc = 0x8000
+    cpu.ix = 0x9000
+    cpu.h, cpu.l = 0x90, 0x00
+    return cpu
+
+def run(cpu):
+    while not cpu.halted:
+        cpu.step()
+
+class TestOpcodeProfiler(unittest.TestCase):
+    def profiled_run(self):
+        cpu = make_cpu()
+        profiler = OpcodeProfiler(cpu)
+        profiler.enable()
+        run(cpu)
+        profiler.disable()
+        return cpu, profiler
+
+    def test_counts_and_t_states(self):
+        reference = make_cpu()
+        run(reference)
+        cpu, profiler = self.profiled_run()
+        self.assertEqual(cpu.cycles, reference.cycles)
+        self.assertEqual((cpu.a, cpu.f), (reference.a, reference.f))
+
+        rows = {row['opcode']: row for row in profiler.stats()}
+        self.assertEqual(set(rows), {'06', '3C', 'CB 46', 'DD CB 46', 'ED 44', '10', '76'})
+        for opcode in ('3C', 'CB 46', 'DD CB 46', 'ED 44', '10'):
+            self.assertEqual(rows[opcode]['count'], 4)
+        # Every T-state up to the HALT is accounted to some instruction
+        self.assertEqual(sum(row['t_states'] for row in rows.values()), cpu.cycles)
+        self.assertAlmostEqual(sum(row['t_state_share'] for row in rows.values()), 1.0)
+        self.assertAlmostEqual(sum(row['time_share'] for row in rows.values()), 1.0)
+        self.assertEqual(rows['DD CB 46']['mnemonic'], 'BIT 0, (IX+0)')
+        self.assertEqual(rows['ED 44']['mnemonic'], 'NEG')
+
+    def test_disable_restores_tables(self):
+        cpu = make_cpu()
+        tables = [cpu.opcodes, cpu.opcodes_cb, cpu.opcodes_ed, cpu.opcodes_dd,
+                  cpu.opcodes_fd, cpu.opcodes_ddcb, cpu.opcodes_fdcb]
+        profiler = OpcodeProfiler(cpu)
+        profiler.enable()
+        self.assertTrue(profiler.enabled)
+        self.assertIsNot(cpu.opcodes, tables[0])
+        profiler.disable()
+        self.assertFalse(profiler.enabled)
+        for original, current in zip(tables, [cpu.opcodes, cpu.opcodes_cb, cpu.opcodes_ed,
+                                              cpu.opcodes_dd, cpu.opcodes_fd,
+                                              cpu.opcodes_ddcb, cpu.opcodes_fdcb]):
+            self.assertIs(current, original)
+
+        # Nothing is counted while disabled
+        run(cpu)
+        self.assertEqual(profiler.stats(), [])
+
+    def test_report_and_dump(self):
+        _, profiler = self.profiled_run()
+        report = profiler.report(top=3)
+        self.assertIn("instructions, 7 distinct opcodes", report)
+        self.assertEqual(len(report.splitlines()), 5)
+
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, 'profile.json')
+            csv_path = os.path.join(directory, 'profile.csv')
+            profiler.dump(json_path)
+            profiler.dump(csv_path)
+            with open(json_path) as f:
+                rows = json.load(f)
+            with open(csv_path, newline='') as f:
+                csv_rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual([row['opcode'] for row in csv_rows], [row['opcode'] for row in rows])
+
+        profiler.reset()
+        self.assertEqual(profiler.stats(), [])
+
+    @unittest.skipUnless(NUMBA_AVAILABLE, "numba not installed")
+    def test_compiled_core_is_rejected(self):
+        with self.assertRaises(ValueError):
+            OpcodeProfiler(JitZ80(Memory()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import struct
+import tempfile
+import unittest
+from src.cpu_jit import NUMBA_AVAILABLE
+from src.machine import Machine
+from src.snapshot import (Snapshot, BANKS_48K, capture_snapshot, parse_sna, build_sna,
+                          parse_z80, build_z80, _compress, _decompress, load_snapshot)
+
+# Interrupt-driven loop touching the border, paging (even banks only, so no
+# contention), the paged bank and the AY; 48K ignores the 128K ports.
+# Smyčka s přerušením: okraj, stránkování, stránkovaná banka a AY.
+PROGRAM = [
+    0xF3,                   # DI
+    0x31, 0x00, 0x90,       # LD SP,0x9000
+    0xED, 0x56,             # IM 1
+    0xFB,                   # EI
+    0x21, 0x00, 0x80,       # loop: LD HL,0x8000
+    0x34,                   #       INC (HL)
+    0x7E,                   #       LD A,(HL)
+    0xE6, 0x07,             #       AND 7
+    0xD3, 0xFE,             #       OUT (0xFE),A
+    0x3A, 0x01, 0x80,       #       LD A,(0x8001)
+    0xE6, 0x0E,             #       AND 0x0E
+    0x01, 0xFD, 0x7F,       #       LD BC,0x7FFD
+    0xED, 0x79,             #       OUT (C),A
+    0x21, 0x00, 0xC0,       #       LD HL,0xC000
+    0x34,                   #       INC (HL)
+    0x3A, 0x00, 0x80,       #       LD A,(0x8000)
+    0xE6, 0x0F,             #       AND 0x0F
+    0x06, 0xFF,             #       LD B,0xFF
+    0xED, 0x79,             #       OUT (C),A (AY register)
+    0x06, 0xBF,             #       LD B,0xBF
+    0xED, 0x79,             #       OUT (C),A (AY data)
+    0x18, 0xDA,             #       JR loop
+]
+# 0x38: PUSH AF / PUSH HL / LD HL,0x8001 / INC (HL) / POP HL / POP AF / EI / RET
+ISR = [0xF5, 0xE5, 0x21, 0x01, 0x80, 0x34, 0xE1, 0xF1, 0xFB, 0xC9]
+
+def make_rom(size):
+    bank = bytearray(0x4000)
+    bank[0:len(PROGRAM)] = bytes(PROGRAM)
+    bank[0x38:0x38 + len(ISR)] = bytes(ISR)
+    return bytes(bank) * (size // 0x4000)
+
+def state(machine):
+    snapshot = capture_snapshot(machine.cpu, machine.memory, machine.ula, machine.hw128)
+    return (snapshot.registers, snapshot.border, snapshot.port_7ffd, snapshot.ay_register,
+            snapshot.ay_registers, snapshot.banks)
+
+class TestSnapshot(unittest.TestCase):
+    def machine(self, is_128k, jit=False):
+        return Machine(is_128k=is_128k, rom=make_rom(0x8000 if is_128k else 0x4000), jit=jit)
+
+    def round_trip(self, is_128k, extension, jit=False):
+        original = self.machine(is_128k)
+        original.run(7)
+        original.cpu.step() # Not on a frame boundary / Ne na hranici snímku
+        cpu = original.cpu
+        if extension == '.sna' and not is_128k:
+            # 48K .SNA keeps PC in the word below SP
+            # 48K .SNA ukládá PC do slova pod SP
+            cpu.memory.write_byte((cpu.sp - 2) & 0xFFFF, cpu.pc & 0xFF)
+            cpu.memory.write_byte((cpu.sp - 1) & 0xFFFF, cpu.pc >> 8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state' + extension)
+            original.save_snapshot(path)
+            restored = self.machine(is_128k, jit=jit)
+            restored.load_snapshot(path)
+        expected, actual = state(original), state(restored)
+        if extension == '.sna':
+            # .SNA has no AY state / .SNA neobsahuje stav AY
+            expected, actual = expected[:3] + expected[5:], actual[:3] + actual[5:]
+        self.assertEqual(actual, expected)
+
+        # Both machines carry on identically
+        # Oba stroje pokračují stejně
+        original.run(5)
+        restored.run(5)
+        self.assertEqual(state(restored), state(original))
+        return restored
+
+    def test_sna_48k(self):
+        self.round_trip(False, '.sna')
+
+    def test_sna_128k(self):
+        machine = self.round_trip(True, '.sna')
+        self.assertNotEqual(machine.memory.current_ram_bank, 0)
+
+    def test_z80_48k(self):
+        self.round_trip(False, '.z80')
+
+    def test_z80_128k(self):
+        machine = self.round_trip(True, '.z80')
+        self.assertNotEqual(machine.hw128.ay.registers, [0] * 16)
+
+    @unittest.skipUnless(NUMBA_AVAILABLE, "numba not installed")
+    def test_restore_into_jit_core(self):
+        self.round_trip(True, '.z80', jit=True)
+
+    def test_sna_128k_with_paged_bank_5(self):
+        snapshot = Snapshot(is_128k=True)
+        snapshot.port_7ffd = 0x05
+        snapshot.banks = {bank: bytes([bank]) * 0x4000 for bank in range(8)}
+        data = build_sna(snapshot)
+        # Bank 5 is stored twice / Banka 5 je uložena dvakrát
+        self.assertEqual(len(data), 147487)
+        self.assertEqual(parse_sna(data).banks, snapshot.banks)
+
+    def test_48k_snapshot_on_128k_machine(self):
+        source = self.machine(False)
+        source.run(3)
+        snapshot = source.save_snapshot()
+        machine = self.machine(True)
+        machine.load_snapshot(parse_z80(build_z80(snapshot)))
+        self.assertEqual(machine.memory.current_rom_bank, 1)
+        self.assertTrue(machine.memory.paging_locked)
+        self.assertEqual(machine.memory.read_byte(0x8000), source.memory.read_byte(0x8000))
+        with self.assertRaises(ValueError):
+            self.machine(False).load_snapshot(self.machine(True).save_snapshot())
+
+    def test_z80_version_1(self):
+        snapshot = self.machine(False).save_snapshot()
+        snapshot.banks = {bank: bytes(range(256)) * 64 for bank in BANKS_48K}
+        snapshot.registers.update(pc=0x1234, r=0x85, im=2)
+        snapshot.border = 3
+        regs = snapshot.registers
+        header = struct.pack('<BBHHHHBBBHHHHBBHHBBB', regs['a'], regs['f'], 0, 0, regs['pc'],
+                             regs['sp'], 0, regs['r'] & 0x7F, 0x20 | 0x01 | (3 << 1), 0, 0, 0, 0,
+                             0, 0, 0, 0, 1, 1, 2)
+        ram = b''.join(snapshot.banks[bank] for bank in BANKS_48K)
+        for body in (ram, _compress(ram) + b'\x00\xED\xED\x00'):
+            compressed = body is not ram
+            data = bytearray(header)
+            if not compressed:
+                data[12] &= ~0x20
+            parsed = parse_z80(bytes(data) + body)
+            self.assertFalse(parsed.is_128k)
+            self.assertEqual((parsed.registers['pc'], parsed.registers['r'], parsed.registers['im'],
+                              parsed.border), (0x1234, 0x85, 2, 3))
+            self.assertEqual(parsed.banks, snapshot.banks)
+
+    def test_rle_round_trip(self):
+        cases = [bytes(0x4000), b'\xED' * 7 + b'\x01' * 6, b'\xED\x00\x00\x00\x00\x00\x00',
+                 b'\xED\xED\x01', b'\x01\xED', bytes(range(256)) * 64, b'\x07' * 600]
+        for data in cases:
+            packed = _compress(data)
+            self.assertEqual(_decompress(packed, len(data)), data)
+        self.assertEqual(_compress(bytes(0x4000)), b'\xED\xED\xFF\x00' * 64 + b'\xED\xED\x40\x00')
+        # A single ED never swallows the following run
+        # Samostatné ED nepohltí následující běh
+        self.assertEqual(_compress(b'\xED' + bytes(6)), b'\xED\x00\xED\xED\x05\x00')
+
+    def test_unknown_extension(self):
+        with self.assertRaises(ValueError):
+            load_snapshot('game.tap')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import json
 import os
 import unittest
 from src.cpu import Z80
+from src.cpu_jit import JitZ80, NUMBA_AVAILABLE
 from src.memory import Memory
 
 class RawMemory(Memory):
@@ -30,6 +31,9 @@ class IOMock:
         self.actual_writes.append([port, value, 'w'])
 
 class TestStandardZ80(unittest.TestCase):
+    def make_cpu(self, mem, io):
+        return Z80(mem, io_bus=io)
+
     def run_z80_test_file(self, file_path):
         if not os.path.exists(file_path):
             self.skipTest(f"Test file {file_path} not found")
@@ -48,7 +52,7 @@ class TestStandardZ80(unittest.TestCase):
             # Setup CPU, Memory and I/O
             mem = RawMemory()
             io = IOMock(ports_data)
-            cpu = Z80(mem, io_bus=io)
+            cpu = self.make_cpu(mem, io)
 
             # Set registers
             cpu.a = initial['a']
@@ -174,6 +178,14 @@ if os.path.exists(test_dir):
             file_path = os.path.join(test_dir, filename)
             setattr(TestStandardZ80, test_name, create_test_method(file_path))
 
+@unittest.skipUnless(NUMBA_AVAILABLE, "numba not installed")
+class TestStandardJitZ80(TestStandardZ80):
+    """Same test files against the compiled core"""
+    def make_cpu(self, mem, io):
+        cpu = JitZ80(mem, io_bus=io)
+        cpu.rom_writable = True # RawMemory has no ROM
+        return cpu
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -75,5 +75,34 @@ class TestULAAudio(unittest.TestCase):
         for i in range(5, 10):
             self.assertEqual(buffer[i], 160, f"Sample {i} should be high")
 
+    def test_box_filtered_samples(self):
+        # A toggle inside a sample contributes its time-weighted average
+        # Přepnutí uvnitř vzorku přispěje váženým průměrem
+        self.ula.render_beeper_state = 40
+        self.cpu.cycles = 3500 # Middle of sample 0 (7000 cycles per sample)
+        self.ula.write_port(0xFE, 0x10)
+        self.cpu.cycles = 75000 # Next frame
+        self.ula.write_port(0xFE, 0x00)
+        buffer = self.ula.render_audio(10, 70000)
+        self.assertEqual(buffer.shape, (10, 2))
+        self.assertAlmostEqual(float(buffer[0, 0]), 100 / 255.0, places=5)
+        self.assertAlmostEqual(float(buffer[9, 1]), 160 / 255.0, places=5)
+        # The event beyond the frame stays queued
+        # Událost za koncem snímku zůstává ve frontě
+        self.assertEqual(self.ula.audio_events, [(75000, 40)])
+        buffer = self.ula.render_audio(10, 70000)
+        self.assertAlmostEqual(float(buffer[0, 0]), (5000 * 160 + 2000 * 40) / 7000 / 255.0, places=5)
+        self.assertEqual(self.ula.audio_event_count, 0)
+
+    def test_event_array_grows(self):
+        for i in range(10000):
+            self.cpu.cycles = i * 7
+            self.ula.write_port(0xFE, 0x10 if i & 1 == 0 else 0x00)
+        self.assertEqual(self.ula.audio_event_count, 10000)
+        buffer = self.ula.render_audio(100, 70000)
+        # Square wave with 50 % duty cycle averages to the middle level
+        # Obdélník se střídou 50 % dává průměrnou úroveň
+        self.assertAlmostEqual(float(buffer[50, 0]), 100 / 255.0, places=3)
+
 if __name__ == '__main__':
     unittest.main()
@@ -57,5 +57,146 @@ class TestULAVideo(unittest.TestCase):
         # 320 x 256 x 3
         self.assertEqual(buffer.shape, (256, 320, 3))
 
+    def test_render_matches_pixel_reference(self):
+        # Every pixel must match a direct per-pixel decode of VRAM
+        # Každý pixel musí odpovídat přímému dekódování VRAM
+        import random
+        rnd = random.Random(7)
+        for addr in range(0x4000, 0x5B00):
+            self.memory.write_byte(addr, rnd.randrange(256))
+        buffer = self.ula.render_screen()
+        for _ in range(500):
+            x, y = rnd.randrange(256), rnd.randrange(192)
+            bitmap_addr = 0x4000 | ((y & 0xC0) << 5) | ((y & 0x07) << 8) | ((y & 0x38) << 2) | (x >> 3)
+            attr = self.memory.read_byte(0x5800 + (y >> 3) * 32 + (x >> 3))
+            bit = (self.memory.read_byte(bitmap_addr) >> (7 - (x & 7))) & 1
+            color = (attr & 0x07) if bit else ((attr >> 3) & 0x07)
+            color |= (attr >> 3) & 0x08
+            self.assertEqual(tuple(buffer[32 + y, 32 + x]), self.ula.palette[color], f"x={x} y={y}")
+
+    def test_flash_swaps_ink_and_paper(self):
+        # Flashing cells swap ink and paper every 16 frames
+        # Blikající buňky prohodí inkoust a papír každých 16 snímků
+        self.memory.write_byte(0x4000, 0xFF)
+        self.memory.write_byte(0x5800, 0x80 | 0x30 | 0x01) # Flash, paper 6, ink 1
+        buffer = self.ula.render_screen()
+        self.assertEqual(tuple(buffer[32, 32]), self.ula.palette[1])
+        self.ula.flash_counter = 16
+        buffer = self.ula.render_screen()
+        self.assertEqual(tuple(buffer[32, 32]), self.ula.palette[6])
+
+    def test_dirty_rects(self):
+        # First frame is a full redraw, unchanged frames report nothing
+        # První snímek se kreslí celý, nezměněné snímky nehlásí nic
+        self.ula.render_screen()
+        self.assertEqual(self.ula.dirty_rects, [(0, 0, 320, 256)])
+        self.ula.render_screen()
+        self.assertEqual(self.ula.dirty_rects, [])
+
+        # One bitmap byte dirties exactly its character cell
+        # Jeden bajt bitmapy označí právě svou znakovou buňku
+        self.memory.write_byte(0x4000 + 0x0100 + 3, 0xFF) # Line 1, column 3
+        buffer = self.ula.render_screen()
+        self.assertEqual(self.ula.dirty_rects, [(32 + 24, 32, 8, 8)])
+        self.assertEqual(tuple(buffer[33, 32 + 24]), self.ula.palette[0]) # Ink black
+
+        # Writes through a bank view (bypassing write_byte) are seen as well
+        # Zápisy přes pohled na banku (mimo write_byte) se také projeví
+        self.memory.get_screen_data()[0x1800 + 33] = 0x08 # Cell (1, 1), paper blue
+        buffer = self.ula.render_screen()
+        self.assertEqual(self.ula.dirty_rects, [(40, 40, 8, 8)])
+        self.assertEqual(tuple(buffer[40, 40]), self.ula.palette[1])
+
+        # A border change dirties the changed scanlines
+        # Změna okraje označí změněné řádky
+        self.ula.add_border_event(0, 2)
+        self.ula.render_screen()
+        self.assertEqual(self.ula.dirty_rects, [(0, 0, 320, 256)])
+        self.assertEqual(tuple(self.ula.screen_buffer[0, 0]), self.ula.palette[2])
+        self.assertEqual(tuple(self.ula.screen_buffer[40, 40]), self.ula.palette[1])
+
+    def test_indexed_output_matches_rgb(self):
+        # Indexed mode stores palette indices that map to the RGB output
+        # Indexovaný režim ukládá indexy palety odpovídající výstupu RGB
+        import random
+        rnd = random.Random(3)
+        for addr in range(0x4000, 0x5B00):
+            self.memory.write_byte(addr, rnd.randrange(256))
+        indexed = ULA(self.memory, indexed=True)
+        for ula in (self.ula, indexed):
+            ula.add_border_event(0, 4)
+            ula.add_border_event(224 * 100, 5)
+        rgb = self.ula.render_screen()
+        indices = indexed.render_screen()
+        self.assertEqual(indices.shape, (256, 320))
+        self.assertTrue((self.ula.np_palette[indices] == rgb).all())
+
+        self.memory.write_byte(0x5AFF, 0x57)
+        rgb = self.ula.render_screen()
+        indices = indexed.render_screen()
+        self.assertEqual(indexed.dirty_rects, self.ula.dirty_rects)
+        self.assertTrue((self.ula.np_palette[indices] == rgb).all())
+
+    def test_border_t_state_resolution(self):
+        # A border change takes effect at the 8-pixel group displayed at its T-state
+        # Změna okraje se projeví od skupiny 8 pixelů zobrazené v jejím taktu
+        ula = self.ula
+        y, group = 10, 3
+        cycle = int(ula.border_cycle_grid[y, group])
+        ula.add_border_event(cycle, 2)
+        buffer = ula.render_screen()
+        self.assertEqual(tuple(buffer[y, group * 8 - 1]), ula.palette[0])
+        self.assertEqual(tuple(buffer[y, group * 8]), ula.palette[2])
+        self.assertEqual(tuple(buffer[y - 1, 319]), ula.palette[0])
+        self.assertEqual(tuple(buffer[y + 1, 0]), ula.palette[2])
+        self.assertEqual(ula.last_frame_border_color, 2)
+
+        # The next frame starts with the last colour
+        # Další snímek začíná poslední barvou
+        buffer = ula.render_screen()
+        self.assertEqual(tuple(buffer[0, 0]), ula.palette[2])
+
+    def test_border_event_array_grows(self):
+        # Dense multicolour effects overflow the preallocated array safely
+        # Husté vícebarevné efekty bezpečně zvětší předalokované pole
+        ula = self.ula
+        for i in range(5000):
+            ula.add_border_event(8000 + i * 10, i & 0x07)
+        self.assertEqual(ula.border_event_count, 5000)
+        ula.render_screen()
+        self.assertEqual(ula.border_event_count, 0)
+        self.assertEqual(ula.last_frame_border_color, 4999 & 0x07)
+
+    def test_beam_accurate_attribute_change(self):
+        # An attribute rewritten mid-frame changes only the lines fetched after the write
+        # Atribut přepsaný během snímku změní jen řádky přečtené po zápisu
+        class Clock:
+            cycles = 0
+        clock = Clock()
+        ula = self.ula
+        ula.render_screen() # Initial full redraw
+        ula.set_cpu(clock)
+        ula.set_beam_accurate(True)
+        self.memory.write_byte(0x5800, 0x38) # Line 0: paper 7
+        clock.cycles = int(ula.fetch_cycles[4 * 32]) # Fetch of pixel line 4, column 0
+        self.memory.write_byte(0x5800, 0x10) # Paper 2 from line 4
+        clock.cycles = 20000
+        self.memory.write_byte(0x4000, 0xFF) # Bitmap written after its fetch
+        buffer = ula.render_screen()
+        self.assertEqual(tuple(buffer[32 + 3, 32]), ula.palette[7])
+        self.assertEqual(tuple(buffer[32 + 4, 32]), ula.palette[2])
+        self.assertEqual(tuple(buffer[32 + 0, 33]), ula.palette[7]) # Old bitmap 0x00
+        self.assertIn((32, 32, 256, 192), ula.dirty_rects)
+
+        # Without further writes the next frame shows the final VRAM
+        # Bez dalších zápisů další snímek zobrazí konečný stav VRAM
+        buffer = ula.render_screen()
+        self.assertEqual(tuple(buffer[32 + 0, 33]), ula.palette[0])
+        self.assertEqual(tuple(buffer[32 + 7, 32]), ula.palette[2])
+        ula.render_screen()
+        self.assertEqual(ula.dirty_rects, [])
+        ula.set_beam_accurate(False)
+        self.assertNotIn('write_byte', self.memory.__dict__)
+
 if __name__ == '__main__':
     unittest.main()